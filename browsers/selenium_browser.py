@@ -15,6 +15,8 @@ def create_selenium_driver(url):
     profile_name = "Profile 1"  # Use "Profile N" if you have other accounts in Chrome
     my_options.add_argument(f"--user-data-dir={profile_path}")
     my_options.add_argument(f"--profile-directory={profile_name}")
+    # Network events in the performance log let NetworkCapture read the site's JSON responses
+    my_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
 
     # Note: Don't write profile name after "...\Chrome\User Data", because it will make a new folder in that path.
 
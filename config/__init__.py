@@ -11,7 +11,13 @@ from .settings import (
     EXPERIENCE_LEVELS,
     POSITION_TYPES,
     EXPERIENCE_LEVELS_MAPPING,
-    POSITION_TYPES_MAPPING
+    POSITION_TYPES_MAPPING,
+    SKILL_TAXONOMY,
+    INTENT_PHRASES,
+    READY_TIMEOUT,
+    READY_QUIET_MS,
+    PACING_MULTIPLIER,
+    PACING_DELAYS
 )
 
 __all__ = [
@@ -26,6 +32,12 @@ __all__ = [
     'IT_SKILLS',
     'EXPERIENCE_LEVELS',
     'POSITION_TYPES',
-    'EXPERIENCE_LEVELS_MAPPING'
-    'POSITION_TYPES_MAPPING'
+    'EXPERIENCE_LEVELS_MAPPING',
+    'POSITION_TYPES_MAPPING',
+    'SKILL_TAXONOMY',
+    'INTENT_PHRASES',
+    'READY_TIMEOUT',
+    'READY_QUIET_MS',
+    'PACING_MULTIPLIER',
+    'PACING_DELAYS'
 ]
@@ -17,9 +17,78 @@ POSITION_TYPES = ["1901", "1903"]  # Full-time, Part-time
 EXPERIENCE_LEVELS_MAPPING = ["经验不限", "应届生",
                              "1年以内", "1-3年", "3-5年", "5-10年", "10年以上", "在校生"]
 POSITION_TYPES_MAPPING = ["全职", "兼职"]  # Full-time, Part-time
+
+# Skill phrases per IT_SKILLS code, first the position name and then its
+# synonyms, matched case-insensitively in messages, previews and resume text
+SKILL_TAXONOMY = {
+    100305: ["测试开发", "测开", "sdet"],
+    100307: ["游戏测试"],
+    100308: ["性能测试", "压力测试", "压测", "jmeter", "loadrunner"],
+    100309: ["软件测试", "测试工程师", "功能测试", "qa"],
+    100310: ["渗透测试", "渗透", "penetration testing"],
+    100401: ["运维工程师", "运维", "devops", "sre"],
+    100402: ["运维开发", "ansible", "saltstack"],
+    100403: ["网络工程师", "ccna", "ccnp", "路由交换"],
+    100404: ["系统工程师", "linux", "shell"],
+    100405: ["it技术支持", "桌面运维", "it支持"],
+    100406: ["系统管理员", "windows server"],
+    100407: ["网络安全", "安全工程师", "web安全"],
+    100408: ["系统安全", "安全运维"],
+    100409: ["dba", "数据库管理", "mysql", "oracle", "postgresql"],
+    100410: ["云计算", "kubernetes", "k8s", "docker", "openstack"],
+    100506: ["etl", "kettle", "数据清洗"],
+    100507: ["数据仓库", "数仓", "hive"],
+    100508: ["数据开发", "大数据开发", "spark", "flink", "hadoop"],
+    100511: ["数据分析", "数据分析师", "tableau", "power bi"],
+    100512: ["数据架构师", "数据架构"],
+    100514: ["数据治理", "主数据", "数据质量"],
+    100515: ["数据采集", "爬虫", "scrapy"],
+    100601: ["项目经理", "pmp", "项目管理"],
+    100603: ["项目助理"],
+    100605: ["项目专员"],
+    100606: ["实施工程师", "软件实施"],
+    100607: ["实施顾问", "erp实施"],
+    100701: ["技术经理"],
+    100702: ["技术总监"],
+    100703: ["测试经理", "测试主管"],
+    100704: ["架构师", "系统架构", "微服务"],
+    100705: ["cto", "cio", "首席技术官"],
+    100706: ["运维总监", "运维经理"],
+    100707: ["技术合伙人"],
+    100817: ["硬件测试"],
+    100901: ["技术文档", "技术写作"],
+    101101: ["通信工程师", "通信技术"],
+    101201: ["售前技术支持", "售前工程师", "解决方案"],
+    101202: ["售后技术支持", "售后工程师"],
+    101299: ["技术支持"],
+    101301: ["机器学习", "machine learning", "scikit-learn", "xgboost"],
+    101302: ["深度学习", "deep learning", "pytorch", "tensorflow"],
+    101305: ["算法工程师", "算法", "nlp", "计算机视觉", "推荐算法"],
+}
+
+# Phrases showing a candidate's intent in chat, by intent
+INTENT_PHRASES = {
+    "resume": ["简历", "附件", "cv", "resume"],
+}
 # File paths
 COOKIE_FILE = 'userSecret/cookies.json'
 
 # Timeouts
 LOGIN_TIMEOUT = 60
 PAGE_LOAD_TIMEOUT = 10
+
+# Readiness waits: a page part is ready once it has rendered and then not
+# changed for READY_QUIET_MS milliseconds
+READY_TIMEOUT = 15
+READY_QUIET_MS = 300
+
+# Human pacing, added on top of readiness waits: (min, max) seconds of
+# random pause per action, scaled by PACING_MULTIPLIER (0 disables pacing)
+PACING_MULTIPLIER = 1.0
+PACING_DELAYS = {
+    "before_click": (0.3, 1.5),
+    "after_open": (0.2, 1.0),
+    "after_back": (0.3, 1.2),
+    "after_search": (0.5, 2.0),
+    "dialog": (0.2, 0.6),
+}
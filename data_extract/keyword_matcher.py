@@ -0,0 +1,181 @@
+import unicodedata
+from collections import deque
+from functools import lru_cache
+from utils.logger import logger
+from config import (
+    EXPERIENCE_LEVELS, EXPERIENCE_LEVELS_MAPPING, INTENT_PHRASES, POSITION_TYPES,
+    POSITION_TYPES_MAPPING, SKILL_TAXONOMY)
+from scraper_agents.boss_hr.resume_store import ResumeStore
+from data_extract.resume_text import TEXT_CACHE_DIR, load_cached_text
+
+
+def _normalize(text):
+    """Case- and width-folded text"""
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def _is_word_char(char):
+    return char.isascii() and char.isalnum()
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over a set of phrases, each mapped to tags.
+
+    The trie of all phrases is compiled once, with failure links, so a text
+    is scanned in a single pass however many phrases there are. Matching
+    ignores case and full-width forms; ASCII phrases only match whole words,
+    so "java" does not match inside "javascript".
+    """
+
+    def __init__(self, phrases):
+        """
+        Args:
+            phrases: {phrase: tag or iterable of tags}
+        """
+        # Node i: outgoing transitions, failure link and the tags of the
+        # phrases ending there, as (phrase length, ascii word, tags)
+        self._goto = [{}]
+        self._fail = [0]
+        self._outputs = [[]]
+
+        for phrase, tags in phrases.items():
+            phrase = _normalize(phrase).strip()
+            if not phrase:
+                continue
+            tags = (tags,) if isinstance(tags, str) else tuple(tags)
+            node = 0
+            for char in phrase:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._outputs.append([])
+                node = next_node
+            whole_word = _is_word_char(phrase[0]) or _is_word_char(phrase[-1])
+            self._outputs[node].append((len(phrase), whole_word, tags))
+
+        # Breadth-first, so a node's failure target is finished before it
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+
+        logger.debug(f"Compiled keyword matcher: {len(phrases)} phrases, {len(self._goto)} states")
+
+    def scan(self, text):
+        """
+        Every phrase occurrence in a text
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            list: (start, end, tags) tuples in order of their end position,
+                with offsets into the normalized text
+        """
+        if not text:
+            return []
+        text = _normalize(text)
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        matches = []
+        node = 0
+        for end, char in enumerate(text, 1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, whole_word, tags in outputs[node]:
+                start = end - length
+                if whole_word and ((start > 0 and _is_word_char(text[start - 1])) or
+                                   (end < len(text) and _is_word_char(text[end]))):
+                    continue
+                matches.append((start, end, tags))
+        return matches
+
+    def tags(self, *texts):
+        """
+        Tags of the phrases found in one or more texts
+
+        Args:
+            texts: Texts to scan; None and empty ones are skipped
+
+        Returns:
+            set: Tags, e.g. {"skill:100409", "intent:resume"}
+        """
+        found = set()
+        for text in texts:
+            for _, _, tags in self.scan(text):
+                found.update(tags)
+        return found
+
+
+def taxonomy_phrases(skills=SKILL_TAXONOMY, intents=INTENT_PHRASES):
+    """
+    Phrases of the configured taxonomies with their tags
+
+    Skills are tagged "skill:<IT_SKILLS code>", experience levels
+    "experience:<EXPERIENCE_LEVELS code>", position types
+    "position:<POSITION_TYPES code>" and intents "intent:<name>".
+
+    Returns:
+        dict: {phrase: [tag, ...]}
+    """
+    phrases = {}
+
+    def add(phrase, tag):
+        tags = phrases.setdefault(_normalize(phrase).strip(), [])
+        if tag not in tags:
+            tags.append(tag)
+
+    for code, synonyms in skills.items():
+        for phrase in synonyms:
+            add(phrase, f"skill:{code}")
+    # "经验不限" says nothing about a candidate
+    for code, phrase in zip(EXPERIENCE_LEVELS[1:], EXPERIENCE_LEVELS_MAPPING[1:]):
+        add(phrase, f"experience:{code}")
+    for code, phrase in zip(POSITION_TYPES, POSITION_TYPES_MAPPING):
+        add(phrase, f"position:{code}")
+    for intent, intent_phrases in intents.items():
+        for phrase in intent_phrases:
+            add(phrase, f"intent:{intent}")
+    return phrases
+
+
+@lru_cache(maxsize=1)
+def default_matcher():
+    """The matcher of the configured taxonomies, compiled on first use"""
+    return KeywordMatcher(taxonomy_phrases())
+
+
+def tag_resumes(db, store=None, cache_dir=TEXT_CACHE_DIR, matcher=None):
+    """
+    Tag candidates with the phrases found in their extracted resume texts
+
+    Args:
+        db: CandidateDatabase
+        store: ResumeStore holding the candidates' resumes
+        cache_dir: Text cache of data_extract.resume_text
+        matcher: KeywordMatcher; defaults to default_matcher()
+
+    Returns:
+        int: Number of candidates whose tags changed
+    """
+    store = store or ResumeStore()
+    matcher = matcher or default_matcher()
+    changed = 0
+    with db.transaction():
+        for candidate_id, hashes in store.hashes_by_candidate().items():
+            records = [load_cached_text(sha256, cache_dir) for sha256 in hashes]
+            tags = matcher.tags(*(record["text"] for record in records if record))
+            if tags and db.add_candidate_tags(candidate_id, tags):
+                changed += 1
+    logger.info(f"Tagged {changed} candidates from their resumes")
+    return changed
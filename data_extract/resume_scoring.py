@@ -0,0 +1,271 @@
+import time
+from collections import Counter
+import numpy as np
+from utils.logger import logger
+from scraper_agents.boss_hr.candidate_records import CandidateStatus
+from scraper_agents.boss_hr.identity import EDUCATION_LEVELS
+from scraper_agents.boss_hr.resume_store import ResumeStore
+from scraper_agents.boss_hr.search_index import tokenize
+from data_extract.resume_text import TEXT_CACHE_DIR, load_cached_text
+
+try:
+    from scipy import sparse
+except ImportError:  # The sparse product falls back to NumPy
+    sparse = None
+
+# BM25 term saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Share of each part in a candidate's score; a part the requisition does not
+# constrain scores full marks, one the candidate's profile lacks scores half
+SCORE_WEIGHTS = {"text": 0.7, "education": 0.1, "age": 0.1, "work_years": 0.1}
+
+# Canonical education levels (see identity.EDUCATION_LEVELS), lowest first
+EDUCATION_RANKS = {"high_school": 1, "associate": 2, "bachelor": 3, "master": 4, "phd": 5}
+
+# Resume rows multiplied at once by the NumPy product, bounding its memory
+BATCH_ROWS = 4096
+
+
+def education_rank(education):
+    """
+    Rank of an education level, given canonically ("bachelor") or as
+    scraped ("本科")
+
+    Returns:
+        int: Rank in EDUCATION_RANKS, or 0 if unknown
+    """
+    if not education:
+        return 0
+    if education in EDUCATION_RANKS:
+        return EDUCATION_RANKS[education]
+    for keyword, level in EDUCATION_LEVELS:
+        if keyword in education:
+            return EDUCATION_RANKS[level]
+    return 0
+
+
+class ResumeMatrix:
+    """
+    BM25-weighted term matrix of candidate documents, in CSR form.
+
+    Row i holds the BM25 weight of every term of document i, so the BM25
+    score of every document for a query is one sparse matrix product with
+    the query's IDF vector, and several requisitions are scored at once by
+    stacking their vectors as columns. Uses scipy.sparse when installed and
+    a batched NumPy product otherwise.
+    """
+
+    def __init__(self, documents, k1=BM25_K1, b=BM25_B):
+        """
+        Args:
+            documents: List of document texts, one per row
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+        """
+        self.vocabulary = {}
+        indptr = [0]
+        indices = []
+        counts = []
+        for text in documents:
+            for term, count in Counter(tokenize(text)).items():
+                indices.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                counts.append(count)
+            indptr.append(len(indices))
+
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        counts = np.asarray(counts, dtype=np.float64)
+        self.shape = (len(documents), len(self.vocabulary))
+
+        # Document lengths, expanded to one entry per stored term
+        row_counts = np.diff(self.indptr)
+        rows = np.repeat(np.arange(self.shape[0]), row_counts)
+        lengths = np.bincount(rows, weights=counts, minlength=self.shape[0])
+        average_length = lengths.mean() if lengths.sum() > 0 else 1.0
+        norm = k1 * (1 - b + b * lengths[rows] / average_length)
+        self.data = counts * (k1 + 1) / (counts + norm)
+
+        document_frequency = np.bincount(self.indices, minlength=self.shape[1])
+        self.idf = np.log(1 + (self.shape[0] - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def query_matrix(self, queries):
+        """
+        IDF-weighted term vectors of query texts, one column per query
+
+        Terms that no document holds are dropped.
+
+        Returns:
+            ndarray: (vocabulary size, number of queries)
+        """
+        matrix = np.zeros((self.shape[1], len(queries)))
+        for column, text in enumerate(queries):
+            terms = [self.vocabulary[term] for term in set(tokenize(text)) if term in self.vocabulary]
+            matrix[terms, column] = self.idf[terms]
+        return matrix
+
+    def scores(self, queries):
+        """
+        BM25 score of every document for every query, in one product
+
+        Args:
+            queries: List of query texts
+
+        Returns:
+            ndarray: (number of documents, number of queries)
+        """
+        query = self.query_matrix(queries)
+        if sparse is not None:
+            matrix = sparse.csr_matrix((self.data, self.indices, self.indptr), shape=self.shape)
+            return np.asarray(matrix @ query)
+
+        result = np.zeros((self.shape[0], query.shape[1]))
+        for start in range(0, self.shape[0], BATCH_ROWS):
+            stop = min(start + BATCH_ROWS, self.shape[0])
+            low, high = self.indptr[start], self.indptr[stop]
+            if low == high:
+                continue
+            products = self.data[low:high, None] * query[self.indices[low:high]]
+            row_starts = self.indptr[start:stop]
+            filled = np.diff(self.indptr[start:stop + 1]) > 0
+            result[start:stop][filled] = np.add.reduceat(
+                products, row_starts[filled] - low, axis=0)
+        return result
+
+
+def _field_scores(values, low, high):
+    """
+    Fit of a numeric profile field to a requisition's range, per candidate
+
+    Args:
+        values: Candidate values, NaN where unknown
+        low: Minimum accepted value, or None
+        high: Maximum accepted value, or None
+
+    Returns:
+        ndarray: 1 inside the range, 0 outside, 0.5 when unknown
+    """
+    if low is None and high is None:
+        return np.ones_like(values)
+    fits = np.ones_like(values, dtype=bool)
+    if low is not None:
+        fits &= values >= low
+    if high is not None:
+        fits &= values <= high
+    return np.where(np.isnan(values), 0.5, fits.astype(np.float64))
+
+
+def score_candidates(documents, profiles, requisitions, weights=SCORE_WEIGHTS):
+    """
+    Score candidates against requisitions with one sparse matrix product
+
+    Args:
+        documents: Resume text per candidate
+        profiles: Normalized profile per candidate (identity.normalize_profile
+            fields "education", "age", "work_years"), same order
+        requisitions: Dicts with "id", "text" (the job description) and
+            optionally "education" (minimum level), "min_age", "max_age" and
+            "min_years"
+        weights: Share of each part in the score, see SCORE_WEIGHTS
+
+    Returns:
+        ndarray: (number of candidates, number of requisitions) scores in [0, 1]
+    """
+    start = time.perf_counter()
+    matrix = ResumeMatrix(documents)
+    text_scores = matrix.scores([requisition["text"] for requisition in requisitions])
+    # Relative to the best resume for the requisition
+    best = text_scores.max(axis=0) if len(documents) else np.zeros(len(requisitions))
+    text_scores = np.divide(text_scores, best, out=np.zeros_like(text_scores), where=best > 0)
+
+    def column(field):
+        return np.array([profile.get(field, np.nan) for profile in profiles], dtype=np.float64)
+
+    education = np.array([education_rank(profile.get("education")) for profile in profiles],
+                         dtype=np.float64)
+    education[education == 0] = np.nan
+    age = column("age")
+    work_years = column("work_years")
+
+    scores = weights["text"] * text_scores
+    for j, requisition in enumerate(requisitions):
+        min_education = education_rank(requisition.get("education")) or None
+        scores[:, j] += weights["education"] * _field_scores(education, min_education, None)
+        scores[:, j] += weights["age"] * _field_scores(
+            age, requisition.get("min_age"), requisition.get("max_age"))
+        scores[:, j] += weights["work_years"] * _field_scores(
+            work_years, requisition.get("min_years"), None)
+
+    logger.info(
+        f"Scored {len(documents)} candidates against {len(requisitions)} requisitions "
+        f"({matrix.shape[1]} terms) in {time.perf_counter() - start:.2f}s")
+    return scores
+
+
+def candidate_documents(db, store=None, cache_dir=TEXT_CACHE_DIR):
+    """
+    Resume text and profile of every candidate that has either
+
+    Args:
+        db: CandidateDatabase
+        store: ResumeStore holding the candidates' resumes
+        cache_dir: Text cache of data_extract.resume_text
+
+    Returns:
+        tuple: (candidate ids, resume texts, profiles), in the same order
+    """
+    store = store or ResumeStore()
+    texts = {}
+    for candidate_id, hashes in store.hashes_by_candidate().items():
+        candidate_id = db.resolve_candidate_id(candidate_id)
+        for sha256 in hashes:
+            record = load_cached_text(sha256, cache_dir)
+            if record is not None:
+                texts.setdefault(candidate_id, []).append(record["text"])
+
+    candidate_ids, documents, profiles = [], [], []
+    for candidate_id, candidate in db.db["candidates"].items():
+        if candidate.status is CandidateStatus.MERGED:
+            continue
+        profile = candidate.extra_info.get("profile") or {}
+        if candidate_id not in texts and not profile:
+            continue
+        candidate_ids.append(candidate_id)
+        documents.append("\n".join(texts.get(candidate_id, ())))
+        profiles.append(profile)
+    return candidate_ids, documents, profiles
+
+
+def rank_candidates(db, requisitions, store=None, cache_dir=TEXT_CACHE_DIR, limit=10):
+    """
+    Score every candidate against the requisitions, store the scores in the
+    database and return the best candidates of each requisition
+
+    Args:
+        db: CandidateDatabase
+        requisitions: Requisition dicts, see score_candidates()
+        store: ResumeStore holding the candidates' resumes
+        cache_dir: Text cache of data_extract.resume_text
+        limit: Number of candidates to return per requisition
+
+    Returns:
+        dict: {requisition id: [(candidate_id, score), ...]}, best first
+    """
+    db.refresh()
+    candidate_ids, documents, profiles = candidate_documents(db, store, cache_dir)
+    if not candidate_ids or not requisitions:
+        logger.warning("Nothing to score")
+        return {requisition["id"]: [] for requisition in requisitions}
+
+    scores = score_candidates(documents, profiles, requisitions)
+    requisition_ids = [requisition["id"] for requisition in requisitions]
+    db.set_candidate_scores({
+        candidate_id: dict(zip(requisition_ids, row.tolist()))
+        for candidate_id, row in zip(candidate_ids, scores)})
+
+    ranking = {}
+    for j, requisition_id in enumerate(requisition_ids):
+        top = np.argsort(-scores[:, j], kind="stable")[:limit]
+        ranking[requisition_id] = [(candidate_ids[i], float(scores[i, j])) for i in top]
+    return ranking
@@ -0,0 +1,315 @@
+import json
+import os
+import re
+import sys
+import unicodedata
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from xml.etree import ElementTree
+from utils.logger import logger
+from scraper_agents.boss_hr.download_manager import DOWNLOAD_DIR
+from scraper_agents.boss_hr.resume_store import file_sha256
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # PDF extraction is skipped without pypdf
+    PdfReader = None
+
+# Extracted texts, one JSON file per resume content hash
+TEXT_CACHE_DIR = os.path.join(DOWNLOAD_DIR, "text_cache")
+
+# Bump when extraction or normalization changes, so cached texts are redone
+EXTRACTOR_VERSION = 1
+
+RESUME_SUFFIXES = (".pdf", ".docx", ".txt")
+
+# Section header spellings found in resumes, by canonical section
+SECTION_HEADERS = {
+    "profile": ["个人信息", "基本信息", "个人资料", "联系方式", "personal information", "contact"],
+    "intention": ["求职意向", "期望职位", "求职期望", "job objective", "objective"],
+    "education": ["教育经历", "教育背景", "学历背景", "education", "education background"],
+    "experience": ["工作经历", "工作经验", "实习经历", "职业经历", "work experience", "experience",
+                   "employment history"],
+    "projects": ["项目经历", "项目经验", "项目", "projects", "project experience"],
+    "skills": ["专业技能", "技能特长", "个人技能", "技能", "技术栈", "skills", "technical skills"],
+    "certificates": ["证书", "资格证书", "荣誉奖项", "获奖情况", "certificates", "awards"],
+    "summary": ["自我评价", "个人评价", "个人总结", "自我介绍", "summary", "about me"],
+}
+
+_HEADER_LOOKUP = {spelling: section for section, spellings in SECTION_HEADERS.items()
+                  for spelling in spellings}
+# Decoration around a header line, e.g. "【教育经历】" or "教育经历：" or "■ Skills"
+_HEADER_DECORATION = re.compile(r"^[\s\W_]+|[\s\W_]+$")
+_INLINE_SPACE = re.compile(r"[^\S\n]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+_DOCX_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+class UnsupportedResumeError(Exception):
+    """A resume whose format cannot be read in this environment"""
+
+
+def _read_pdf(path):
+    if PdfReader is None:
+        raise UnsupportedResumeError("pypdf is not installed")
+    reader = PdfReader(path)
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+def _read_docx(path):
+    """Paragraph text of a .docx, straight from its document XML"""
+    with zipfile.ZipFile(path) as archive:
+        root = ElementTree.fromstring(archive.read("word/document.xml"))
+    paragraphs = []
+    for paragraph in root.iter(f"{_DOCX_NAMESPACE}p"):
+        parts = []
+        for node in paragraph.iter():
+            if node.tag == f"{_DOCX_NAMESPACE}t":
+                parts.append(node.text or "")
+            elif node.tag == f"{_DOCX_NAMESPACE}tab":
+                parts.append("\t")
+            elif node.tag in (f"{_DOCX_NAMESPACE}br", f"{_DOCX_NAMESPACE}cr"):
+                parts.append("\n")
+        paragraphs.append("".join(parts))
+    return "\n".join(paragraphs)
+
+
+def _read_txt(path):
+    data = Path(path).read_bytes()
+    for encoding in ("utf-8-sig", "gb18030"):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode("utf-8", errors="replace")
+
+
+_READERS = {".pdf": _read_pdf, ".docx": _read_docx, ".txt": _read_txt}
+
+
+def section_of(line):
+    """
+    Canonical section of a header line
+
+    Args:
+        line: One line of normalized resume text
+
+    Returns:
+        str: Key of SECTION_HEADERS, or None if the line is not a header
+    """
+    if len(line) > 30:
+        return None
+    return _HEADER_LOOKUP.get(_HEADER_DECORATION.sub("", line).lower())
+
+
+def normalize_text(text):
+    """
+    Normalize extracted resume text
+
+    Full-width letters, digits and punctuation become half-width (NFKC),
+    runs of spaces collapse to one, blank line runs to one blank line, and
+    section header lines are rewritten to their canonical spelling.
+
+    Args:
+        text: Raw extracted text
+
+    Returns:
+        tuple: (normalized text, {section: text of the section})
+    """
+    text = unicodedata.normalize("NFKC", text).replace("\r\n", "\n").replace("\r", "\n")
+    lines = []
+    sections = {}
+    current = None
+    for line in text.split("\n"):
+        line = _INLINE_SPACE.sub(" ", line).strip()
+        section = section_of(line) if line else None
+        if section is not None:
+            current = section
+            line = SECTION_HEADERS[section][0]
+        elif line and current is not None:
+            sections.setdefault(current, []).append(line)
+        lines.append(line)
+    normalized = _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+    return normalized, {section: "\n".join(body) for section, body in sections.items()}
+
+
+def extract_text(path):
+    """
+    Read and normalize the text of one resume file
+
+    Runs in the worker processes of extract_resume_texts(), so it only uses
+    its arguments and returns plain data.
+
+    Args:
+        path: Resume file (.pdf, .docx or .txt)
+
+    Returns:
+        dict: "text", "sections" and "extractor_version"
+    """
+    reader = _READERS.get(Path(path).suffix.lower())
+    if reader is None:
+        raise UnsupportedResumeError(f"unsupported file type: {path}")
+    text, sections = normalize_text(reader(path))
+    return {"text": text, "sections": sections, "extractor_version": EXTRACTOR_VERSION}
+
+
+def _cache_path(cache_dir, sha256):
+    return Path(cache_dir) / sha256[:2] / f"{sha256}.json"
+
+
+def load_cached_text(sha256, cache_dir=TEXT_CACHE_DIR):
+    """
+    Cached extraction of a resume, by content hash
+
+    Args:
+        sha256: SHA-256 hash of the resume file
+        cache_dir: Directory of the text cache
+
+    Returns:
+        dict: Cached record, or None if the resume was not extracted (or was
+            extracted by an older EXTRACTOR_VERSION)
+    """
+    try:
+        with open(_cache_path(cache_dir, sha256), 'r', encoding='utf-8') as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if record.get("extractor_version") != EXTRACTOR_VERSION:
+        return None
+    return record
+
+
+def _save_cached_text(cache_dir, sha256, record):
+    path = _cache_path(cache_dir, sha256)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(record, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def iter_resume_files(resume_dir=DOWNLOAD_DIR, skip_dirs=(TEXT_CACHE_DIR,)):
+    """
+    Walk a directory for resume files, yielding each one as it is found
+
+    Hidden files (partial downloads, claims) and files with the same inode
+    (the resume store's hard links) are skipped.
+
+    Args:
+        resume_dir: Directory to walk
+        skip_dirs: Directories not to descend into
+
+    Yields:
+        Path: Resume files
+    """
+    skip = {os.path.abspath(directory) for directory in skip_dirs}
+    seen_inodes = set()
+    stack = [resume_dir]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError as e:
+            logger.warning(f"Cannot read resume directory {directory}: {e}")
+            continue
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                if os.path.abspath(entry.path) not in skip:
+                    stack.append(entry.path)
+            elif entry.is_file() and entry.name.lower().endswith(RESUME_SUFFIXES):
+                inode = entry.stat().st_ino
+                if inode and inode in seen_inodes:
+                    continue
+                seen_inodes.add(inode)
+                yield Path(entry.path)
+
+
+def _content_hash(path):
+    """SHA-256 of a file; resume store objects are already named by it"""
+    if re.fullmatch(r"[0-9a-f]{64}", path.stem):
+        return path.stem
+    return file_sha256(path)
+
+
+def extract_resume_texts(resume_dir=DOWNLOAD_DIR, cache_dir=TEXT_CACHE_DIR, workers=None):
+    """
+    Extract the text of every resume in a directory, in parallel
+
+    Files are streamed from the directory walk into a process pool, with a
+    bounded number of files in flight; files whose content hash is already
+    in the text cache are not read again, so a re-run only extracts new
+    resumes. Without pypdf, PDFs that are not cached are skipped with a
+    single warning.
+
+    Args:
+        resume_dir: Directory holding the resumes
+        cache_dir: Directory of the text cache
+        workers: Number of worker processes (defaults to the CPU count)
+
+    Returns:
+        dict: {sha256: record} for every readable resume, with "text",
+            "sections" and the "source" file the text came from
+    """
+    workers = workers or os.cpu_count() or 1
+    results = {}
+    in_flight = {}
+    queued = set()
+    extracted = failed = skipped = 0
+
+    def collect(done):
+        nonlocal extracted, failed
+        for future in done:
+            sha256, path = in_flight.pop(future)
+            try:
+                record = future.result()
+            except Exception as e:
+                logger.warning(f"Could not extract text from {path}: {e}")
+                failed += 1
+                continue
+            record["source"] = str(path)
+            _save_cached_text(cache_dir, sha256, record)
+            results[sha256] = record
+            extracted += 1
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for path in iter_resume_files(resume_dir, skip_dirs=(cache_dir,)):
+            try:
+                sha256 = _content_hash(path)
+            except OSError as e:
+                logger.warning(f"Could not read {path}: {e}")
+                continue
+            if sha256 in results or sha256 in queued:
+                continue
+            cached = load_cached_text(sha256, cache_dir)
+            if cached is not None:
+                results[sha256] = cached
+                continue
+            if PdfReader is None and path.suffix.lower() == ".pdf":
+                if not skipped:
+                    logger.warning("pypdf is not installed, skipping PDF resumes")
+                skipped += 1
+                continue
+
+            # Keep the pool busy without queueing the whole directory
+            if len(in_flight) >= workers * 4:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+            in_flight[executor.submit(extract_text, str(path))] = (sha256, path)
+            queued.add(sha256)
+
+        collect(wait(in_flight).done)
+
+    logger.info(
+        f"Resume texts: {extracted} extracted, {len(results) - extracted} cached, "
+        f"{failed} failed, {skipped} PDFs skipped ({workers} workers)")
+    return results
+
+
+if __name__ == "__main__":
+    # Usage: python -m data_extract.resume_text [resume_dir] [workers]
+    texts = extract_resume_texts(*sys.argv[1:2], workers=int(sys.argv[2]) if len(sys.argv) > 2 else None)
+    print(f"{len(texts)} resume texts in {TEXT_CACHE_DIR}")
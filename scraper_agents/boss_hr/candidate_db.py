@@ -1,79 +1,575 @@
+import copy
+import hashlib
+import heapq
 import json
 import os
 import time
+from collections import defaultdict
+from contextlib import contextmanager
 from datetime import datetime
+from functools import wraps
 from pathlib import Path
 from utils.logger import logger
+from scraper_agents.boss_hr.db_backup import BackupManager
+from scraper_agents.boss_hr.db_storage import create_storage, migrate_json_to_sqlite
+from scraper_agents.boss_hr.identity import IdentityIndex, normalize_profile, profile_id
+from scraper_agents.boss_hr.message_store import LazyMessageStore, MessageStore
+from scraper_agents.boss_hr.search_index import SearchIndex
+from scraper_agents.boss_hr.candidate_records import (
+    CandidateRecord, CandidateStatus, LazyCandidates, MessageDirection, MessageRecord,
+    to_epoch)
+
+
+# Seconds after the last outbound message before a silent candidate needs a follow-up
+FOLLOW_UP_SECONDS = 2 * 24 * 3600
+# Follow-ups sent before a silent candidate is left alone
+MAX_FOLLOW_UPS = 2
+# Statuses counted as contacted / responded in the funnel report
+CONTACTED_STATUSES = (CandidateStatus.CONTACTED, CandidateStatus.RESPONDED,
+                      CandidateStatus.RESUME_RECEIVED)
+RESPONDED_STATUSES = (CandidateStatus.RESPONDED, CandidateStatus.RESUME_RECEIVED)
+# Funnel order used to keep the furthest status when merging duplicates
+FUNNEL_ORDER = (CandidateStatus.NEW, CandidateStatus.CONTACTED, CandidateStatus.RESPONDED,
+                CandidateStatus.RESUME_RECEIVED, CandidateStatus.QUALIFIED)
+
+
+def message_fingerprint(direction, content, position):
+    """
+    Fingerprint of a message for idempotent ingestion
+
+    Args:
+        direction: "outbound" or "inbound"
+        content: Message content
+        position: Timestamp of the message, or its occurrence number among
+            messages with the same direction and content in the chat
+
+    Returns:
+        str: 16-character hex fingerprint
+    """
+    key = f"{direction}\x1f{content}\x1f{position}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+
+def _identity_profile(candidate):
+    """
+    A candidate's normalized profile as indexed for identity matching, or
+    None; profiles stored before genders were read get the one their
+    masked name tells
+    """
+    if candidate is None or candidate.status is CandidateStatus.MERGED:
+        return None
+    profile = candidate.extra_info.get("profile")
+    if profile and "gender" not in profile:
+        gender = normalize_profile({"name": candidate.name}).get("gender")
+        if gender:
+            profile = {**profile, "gender": gender}
+    return profile
+
+
+def _atomic(method):
+    """
+    Run a mutating CandidateDatabase method as a transaction, so it reads
+    current state and writes it back under the storage lock
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.transaction():
+            return method(self, *args, **kwargs)
+    return wrapper
 
 
 class CandidateDatabase:
     """Database for tracking candidates and their interactions"""
 
-    def __init__(self, db_file="db _database/candidates.json"):
+    def __init__(self, db_file="db _database/candidates.json", backend=None, lazy=False,
+                 backups=True):
+        """
+        Args:
+            db_file: Path of the database file
+            backend: Storage backend, "json", "sqlite" or "journal" (sqlite
+                or journal is inferred from the file suffix if omitted). The
+                journal backend uses db_file as its snapshot. Opening a .json
+                path with the "sqlite" backend migrates it into a .db file
+                next to it once.
+            lazy: Load only the candidate index (ids, status, follow-up
+                fields) up front and read full records and message histories
+                on first access. Needs a backend that supports it (sqlite);
+                other backends fall back to a full load.
+            backups: Take rotating compressed snapshots in the background;
+                True for the defaults, a dict of BackupManager options, or
+                False to disable them
+        """
         self.db_path = Path(db_file)
         self.db_dir = self.db_path.parent
         self.db_dir.mkdir(exist_ok=True)
 
+        if backend == "sqlite" and self.db_path.suffix == ".json":
+            sqlite_path = self.db_path.with_suffix(".db")
+            if create_storage(self.db_path).exists() and not sqlite_path.exists():
+                migrate_json_to_sqlite(self.db_path, sqlite_path)
+            self.db_path = sqlite_path
+
+        self.storage = create_storage(self.db_path, backend)
+        self.lazy = lazy
+        if lazy and not self.storage.supports_lazy:
+            logger.warning(
+                f"Storage {type(self.storage).__name__} cannot load lazily, loading in full")
+            self.lazy = False
+
+        self.backups = None
+        if backups:
+            self.backups = BackupManager(
+                self.storage, **(backups if isinstance(backups, dict) else {}))
+
+        # Changes not yet written to storage
+        self._dirty_ids = set()
+        self._new_messages = []
+
+        # Undo log of the open transaction, None outside a transaction
+        self._txn = None
+
+        # Secondary indexes: status -> ordered id set, and a min-heap of
+        # (follow-up due timestamp, id) with stale entries skipped lazily
+        self._status_index = defaultdict(dict)
+        self._indexed_state = {}
+        self._due_heap = []
+        self._due_at = {}
+
+        # Funnel counters kept in step with the indexes; per-status counts
+        # come from the sizes of the status index
+        self._counts = {"total": 0, "resume_received": 0}
+
+        # candidate id -> fingerprints of the messages already stored,
+        # filled per candidate on first use
+        self._fingerprints = {}
+
+        # Full-text index over messages and preview text, built on first search
+        self._search_index = None
+
+        # Blocking index over candidate profiles, built on first use
+        self._identity_index = None
+
+        # tag -> candidate ids, and the tags each candidate is indexed
+        # under, built on first use
+        self._tag_index = None
+        self._indexed_tags = {}
+
         # Initialize database if it doesn't exist
-        if not self.db_path.exists():
-            self.db = {
-                "candidates": {},
-                "stats": {
-                    "total_candidates": 0,
-                    "resumes_received": 0,
-                    "messages_sent": 0,
-                    "last_updated": datetime.now().isoformat()
-                },
-                "message_history": []
-            }
+        if not self.storage.exists():
+            self.db = self._empty_db()
             self.save_db()
         else:
             self.load_db()
 
+        self._rebuild_indexes()
+
+    @staticmethod
+    def _empty_db():
+        return {
+            "candidates": {},
+            "stats": {
+                "total_candidates": 0,
+                "resumes_received": 0,
+                "messages_sent": 0,
+                "last_updated": datetime.now().isoformat()
+            },
+            "message_history": MessageStore()
+        }
+
     def load_db(self):
         """Load database from file"""
         try:
-            with open(self.db_path, 'r', encoding='utf-8') as f:
-                self.db = json.load(f)
+            if self.lazy:
+                stats, index_rows = self.storage.load_index()
+                self.db = {
+                    "candidates": LazyCandidates(self.storage, index_rows),
+                    "stats": stats,
+                    "message_history": LazyMessageStore(self.storage, MessageRecord.from_dict)
+                }
+                logger.info(
+                    f"Loaded candidate index with {len(index_rows)} candidates")
+                return
+
+            db = self.storage.load()
+            db["candidates"] = {cid: CandidateRecord.from_dict(data)
+                                for cid, data in db["candidates"].items()}
+            db["message_history"] = MessageStore(
+                MessageRecord.from_dict(data) for data in db.get("message_history", []))
+            self.db = db
             logger.info(
                 f"Loaded candidate database with {len(self.db['candidates'])} candidates")
         except Exception as e:
             logger.error(f"Error loading database: {e}")
             # Create a new database if loading fails
-            self.db = {
-                "candidates": {},
-                "stats": {
-                    "total_candidates": 0,
-                    "resumes_received": 0,
-                    "messages_sent": 0,
-                    "last_updated": datetime.now().isoformat()
-                },
-                "message_history": []
-            }
+            self.db = self._empty_db()
+
+    def refresh(self):
+        """
+        Pick up the changes other processes saved since this instance last
+        read or wrote storage. Candidates with unsaved local changes keep the
+        local version. Does nothing inside a transaction, which already
+        refreshed when it began.
+
+        Returns:
+            int: Number of candidates and messages picked up
+        """
+        if self._txn is not None:
+            return 0
+
+        try:
+            changes = self.storage.load_changes()
+        except Exception as e:
+            logger.error(f"Error reading database changes: {e}")
+            return 0
+        if not changes:
+            return 0
+
+        candidates = self.db["candidates"]
+        picked_up = 0
+        for candidate_id, data in changes["candidates"].items():
+            if candidate_id in self._dirty_ids:
+                continue
+            # Backends may report unchanged candidates (JSON rereads the whole
+            # file); skip those rather than reindexing them
+            if not self.lazy and candidates.get(candidate_id) == data:
+                continue
+            candidates[candidate_id] = CandidateRecord.from_dict(data)
+            self._reindex(candidate_id)
+            # A merge elsewhere may have given the candidate new aliases
+            self._fingerprints.pop(candidate_id, None)
+            picked_up += 1
+
+        for data in changes["messages"]:
+            message = self.db["message_history"].append(MessageRecord.from_dict(data))
+            fingerprints = self._fingerprints.get(message.candidate_id)
+            if fingerprints is not None:
+                fingerprints.add(message.fingerprint)
+            if self._search_index is not None:
+                self._search_index.add(message.candidate_id, message.content)
+            picked_up += 1
+
+        if changes["stats"]:
+            self.db["stats"].update(changes["stats"])
+        self._sync_stats()
+
+        if picked_up:
+            logger.debug(f"Picked up {picked_up} candidate(s) and message(s) from other processes")
+        return picked_up
 
     def save_db(self):
-        """Save database to file"""
+        """Save pending changes to storage (deferred inside a transaction)"""
+        if self._txn is not None:
+            return
+
         try:
-            # Update last_updated timestamp
+            # Update last_updated timestamp and the counter-backed stats
             self.db["stats"]["last_updated"] = datetime.now().isoformat()
+            self._sync_stats()
 
-            # Save with pretty formatting
-            with open(self.db_path, 'w', encoding='utf-8') as f:
-                json.dump(self.db, f, ensure_ascii=False, indent=2)
+            self.storage.save(self.db, self._dirty_ids, self._new_messages)
+            self._dirty_ids = set()
+            self._new_messages = []
 
             logger.debug("Database saved successfully")
 
-            # Create a backup every 24 hours
-            backup_file = self.db_dir / \
-                f"candidates_backup_{datetime.now().strftime('%Y%m%d')}.json"
-            if not backup_file.exists():
-                with open(backup_file, 'w', encoding='utf-8') as f:
-                    json.dump(self.db, f, ensure_ascii=False, indent=2)
-                logger.info(f"Created database backup: {backup_file}")
+            # Snapshot in the background once the backup interval has passed
+            if self.backups is not None:
+                self.backups.request()
 
         except Exception as e:
             logger.error(f"Error saving database: {e}")
 
+    def _rebuild_indexes(self):
+        """Rebuild the status and follow-up indexes from scratch"""
+        self._search_index = None
+        self._identity_index = None
+        self._tag_index = None
+        self._indexed_tags = {}
+        self._status_index = defaultdict(dict)
+        self._indexed_state = {}
+        self._due_heap = []
+        self._due_at = {}
+        self._counts = {"total": 0, "resume_received": 0}
+
+        candidates = self.db["candidates"]
+        index_rows = (candidates.take_index_rows()
+                      if isinstance(candidates, LazyCandidates) else None)
+        if index_rows is not None:
+            self._index_rows(index_rows)
+        else:
+            for candidate_id, candidate in candidates.items():
+                self._reindex(candidate_id, candidate)
+        self._sync_stats()
+
+        self._fingerprints = {}
+
+    def _index_rows(self, rows):
+        """
+        Build the indexes straight from storage index rows, without
+        materializing any record; used by the lazy load
+        """
+        statuses = {status.value: status for status in CandidateStatus}
+        for candidate_id, status, resume_received, _, last_sent, follow_ups in rows:
+            status = statuses.get(status) or CandidateStatus.coerce(status)
+            resume_received = bool(resume_received)
+            self._status_index[status][candidate_id] = None
+            self._indexed_state[candidate_id] = (status, resume_received)
+            self._counts["total"] += 1
+            self._counts["resume_received"] += resume_received
+
+            if (status is CandidateStatus.CONTACTED and last_sent and
+                    (follow_ups or 0) < MAX_FOLLOW_UPS):
+                due = to_epoch(last_sent) + FOLLOW_UP_SECONDS
+                self._due_at[candidate_id] = due
+                self._due_heap.append((due, candidate_id))
+        heapq.heapify(self._due_heap)
+
+    def _fingerprints_for(self, candidate_id):
+        """
+        Fingerprints already stored for a candidate and the duplicates merged
+        into them, built on first use
+        """
+        fingerprints = self._fingerprints.get(candidate_id)
+        if fingerprints is None:
+            candidate = self.db["candidates"].get(candidate_id)
+            aliases = candidate.extra_info.get("aliases", []) if candidate else []
+            history = self.db["message_history"]
+            fingerprints = self._fingerprints[candidate_id] = {
+                m.fingerprint for cid in [candidate_id, *aliases]
+                for m in history.for_candidate(cid) if m.fingerprint
+            }
+        return fingerprints
+
+    @staticmethod
+    def _follow_up_due(candidate):
+        """Timestamp at which a candidate needs a follow-up, or None"""
+        if (candidate.status is not CandidateStatus.CONTACTED or
+                candidate.last_message_sent is None or
+                candidate.follow_up_count >= MAX_FOLLOW_UPS):
+            return None
+        return candidate.last_message_sent + FOLLOW_UP_SECONDS
+
+    def _reindex(self, candidate_id, candidate=None):
+        """
+        Bring the indexes in line with a candidate's current record
+
+        Args:
+            candidate_id: Candidate identifier
+            candidate: The candidate record; looked up if omitted
+        """
+        old_state = self._indexed_state.pop(candidate_id, None)
+        if old_state is not None:
+            old_status, old_resume = old_state
+            self._status_index[old_status].pop(candidate_id, None)
+            self._counts["total"] -= 1
+            self._counts["resume_received"] -= old_resume
+
+        if candidate is None:
+            candidate = self.db["candidates"].get(candidate_id)
+        if self._search_index is not None:
+            self._search_index.set_preview(
+                candidate_id, candidate.extra_info.get("preview_text") if candidate else None)
+        if self._identity_index is not None:
+            profile = _identity_profile(candidate)
+            if profile:
+                self._identity_index.add(candidate_id, profile)
+            else:
+                self._identity_index.remove(candidate_id)
+        if self._tag_index is not None:
+            self._index_tags(candidate_id, candidate)
+        if candidate is None:
+            self._due_at.pop(candidate_id, None)
+            return
+
+        status = candidate.status
+        resume_received = bool(candidate.resume_received)
+        self._status_index[status][candidate_id] = None
+        self._indexed_state[candidate_id] = (status, resume_received)
+        self._counts["total"] += 1
+        self._counts["resume_received"] += resume_received
+
+        due = self._follow_up_due(candidate)
+        if due is None:
+            self._due_at.pop(candidate_id, None)
+        elif self._due_at.get(candidate_id) != due:
+            self._due_at[candidate_id] = due
+            heapq.heappush(self._due_heap, (due, candidate_id))
+
+        # Drop stale heap entries once they outnumber the live ones
+        if len(self._due_heap) > 2 * len(self._due_at) + 64:
+            self._due_heap = [(due, cid) for cid, due in self._due_at.items()]
+            heapq.heapify(self._due_heap)
+
+    def _sync_stats(self):
+        """Copy the live counters into the persisted stats block"""
+        self.db["stats"]["total_candidates"] = (
+            self._counts["total"] - self._status_count(CandidateStatus.MERGED))
+        self.db["stats"]["resumes_received"] = self._counts["resume_received"]
+
+    def _status_count(self, *statuses):
+        """Number of candidates in any of the given statuses, in O(1)"""
+        return sum(len(self._status_index.get(status, ())) for status in statuses)
+
+    def verify_stats(self):
+        """
+        Reconcile the incremental counters against a full scan
+
+        Any drift is logged, the indexes are rebuilt and the stats block is
+        corrected and saved.
+
+        Returns:
+            dict: Mismatched counters as {name: (counted, actual)}; empty if consistent
+        """
+        candidates = self.db["candidates"].values()
+        actual = {
+            "total_candidates": len(self.db["candidates"]),
+            "new_candidates": sum(
+                1 for c in candidates if c.status is CandidateStatus.NEW),
+            "contacted_candidates": sum(
+                1 for c in candidates if c.status in CONTACTED_STATUSES),
+            "responded_candidates": sum(
+                1 for c in candidates if c.status in RESPONDED_STATUSES),
+            "resume_received": sum(1 for c in candidates if c.resume_received),
+            "messages_sent": sum(
+                1 for m in self.db["message_history"]
+                if m.direction is MessageDirection.OUTBOUND)
+        }
+        counted = {
+            "total_candidates": self._counts["total"],
+            "new_candidates": self._status_count(CandidateStatus.NEW),
+            "contacted_candidates": self._status_count(*CONTACTED_STATUSES),
+            "responded_candidates": self._status_count(*RESPONDED_STATUSES),
+            "resume_received": self._counts["resume_received"],
+            "messages_sent": self.db["stats"]["messages_sent"]
+        }
+
+        mismatches = {name: (counted[name], actual[name])
+                      for name in actual if counted[name] != actual[name]}
+        if mismatches:
+            logger.warning(f"Candidate stats drifted, rebuilding: {mismatches}")
+            self._rebuild_indexes()
+            self.db["stats"]["messages_sent"] = actual["messages_sent"]
+            self.save_db()
+
+        return mismatches
+
+    def _due_candidates(self, now, limit=None):
+        """
+        Candidates whose follow-up is due, oldest first
+
+        Args:
+            now: Current epoch timestamp
+            limit: Maximum number of candidates to return
+
+        Pops due entries off the heap (discarding stale ones) and pushes the
+        live ones back, so the cost is O(k log M) for k due candidates.
+
+        Returns:
+            list: (due timestamp, candidate id) tuples
+        """
+        due = []
+        seen = set()
+        while self._due_heap and self._due_heap[0][0] <= now:
+            if limit is not None and len(due) >= limit:
+                break
+            entry = heapq.heappop(self._due_heap)
+            if self._due_at.get(entry[1]) == entry[0] and entry[1] not in seen:
+                seen.add(entry[1])
+                due.append(entry)
+
+        for entry in due:
+            heapq.heappush(self._due_heap, entry)
+        return due
+
+    def close(self):
+        """Flush pending writes, finish a running backup and release the storage"""
+        if self.backups is not None:
+            self.backups.close()
+        self.storage.close()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group several mutations into a single write
+
+        Persistence is deferred until the block exits, then every buffered
+        change is committed with one save. If the block raises, the in-memory
+        state is rolled back and nothing is written. Nested blocks join the
+        outermost transaction.
+
+        The outermost block holds the storage's cross-process lock and first
+        picks up other processes' changes, so read-modify-write sequences
+        never lose another writer's update. A block that changed nothing
+        writes nothing.
+
+        Example:
+            with db.transaction():
+                for msg in messages:
+                    db.record_message(candidate_id, "inbound", msg)
+        """
+        if self._txn is not None:
+            yield self
+            return
+
+        with self.storage.lock():
+            self.refresh()
+            self._txn = {
+                "candidates": {},
+                "history_len": len(self.db["message_history"]),
+                "stats": copy.deepcopy(self.db["stats"]),
+                "dirty_ids": set(self._dirty_ids),
+                "new_messages_len": len(self._new_messages)
+            }
+            try:
+                yield self
+            except BaseException:
+                self._rollback()
+                raise
+
+            txn, self._txn = self._txn, None
+            if self._dirty_ids or self._new_messages or self.db["stats"] != txn["stats"]:
+                self.save_db()
+
+    def _touch(self, candidate_id):
+        """Record a candidate's state in the undo log before it is mutated"""
+        if self._txn is None or candidate_id in self._txn["candidates"]:
+            return
+
+        candidate = self.db["candidates"].get(candidate_id)
+        if candidate is None:
+            self._txn["candidates"][candidate_id] = None
+        else:
+            self._txn["candidates"][candidate_id] = candidate.clone()
+
+    def _rollback(self):
+        """Restore the in-memory state captured when the transaction began"""
+        txn, self._txn = self._txn, None
+        candidates = self.db["candidates"]
+
+        for candidate_id, saved in txn["candidates"].items():
+            if saved is None:
+                candidates.pop(candidate_id, None)
+            else:
+                candidates[candidate_id] = saved
+
+        for candidate_id in txn["candidates"]:
+            self._reindex(candidate_id)
+
+        history = self.db["message_history"]
+        for message in history.slice_from(txn["history_len"]):
+            self._fingerprints.get(message.candidate_id, set()).discard(message.fingerprint)
+            if self._search_index is not None:
+                self._search_index.remove(message.candidate_id, message.content)
+        history.truncate(txn["history_len"])
+        self.db["stats"] = txn["stats"]
+        self._sync_stats()
+        self._dirty_ids = txn["dirty_ids"]
+        del self._new_messages[txn["new_messages_len"]:]
+
+        logger.warning(
+            f"Rolled back transaction touching {len(txn['candidates'])} candidates")
+
+    @_atomic
     def add_or_update_candidate(self, candidate_id, name, source="chat", extra_info=None):
         """
         Add or update a candidate in the database
@@ -85,53 +581,55 @@ class CandidateDatabase:
             extra_info: Any additional information about the candidate
 
         Returns:
-            dict: The candidate record
+            CandidateRecord: The candidate record (supports dict-style access)
         """
-        current_time = datetime.now().isoformat()
+        current_time = time.time()
+        candidate_id = self.resolve_candidate_id(candidate_id)
+        self._touch(candidate_id)
+        candidate = self.db["candidates"].get(candidate_id)
 
-        if candidate_id not in self.db["candidates"]:
+        if candidate is None:
             # Create new candidate record
-            self.db["candidates"][candidate_id] = {
-                "name": name,
-                "status": "new",  # new, contacted, responded, resume_received, qualified, rejected
-                "source": source,
-                "first_seen": current_time,
-                "last_updated": current_time,
-                "resume_received": False,
-                "resume_requested": False,
-                "last_message_sent": None,
-                "last_message_received": None,
-                "follow_up_count": 0,
-                "messages": [],
-                "extra_info": extra_info or {},
-                "notes": ""
-            }
-            self.db["stats"]["total_candidates"] += 1
+            candidate = CandidateRecord(
+                name=name,
+                status=CandidateStatus.NEW,
+                source=source,
+                first_seen=current_time,
+                last_updated=current_time,
+                extra_info=extra_info or {}
+            )
+            self.db["candidates"][candidate_id] = candidate
             logger.info(f"Added new candidate: {name} (ID: {candidate_id})")
         else:
             # Update existing candidate
-            self.db["candidates"][candidate_id]["last_updated"] = current_time
+            candidate.last_updated = current_time
 
             # Only update name if it wasn't available before
-            if not self.db["candidates"][candidate_id]["name"] or self.db["candidates"][candidate_id]["name"] == "Unknown":
-                self.db["candidates"][candidate_id]["name"] = name
+            if not candidate.name or candidate.name == "Unknown":
+                candidate.name = name
 
             # Update extra info if provided
             if extra_info:
-                self.db["candidates"][candidate_id]["extra_info"].update(
-                    extra_info)
+                candidate.extra_info.update(extra_info)
 
             logger.debug(f"Updated candidate: {name} (ID: {candidate_id})")
 
+        self._reindex(candidate_id)
+        self._dirty_ids.add(candidate_id)
         self.save_db()
-        return self.db["candidates"][candidate_id]
+        return candidate
 
+    @_atomic
     def update_candidate_status(self, candidate_id, status):
         """Update a candidate's status"""
+        candidate_id = self.resolve_candidate_id(candidate_id)
         if candidate_id in self.db["candidates"]:
-            self.db["candidates"][candidate_id]["status"] = status
-            self.db["candidates"][candidate_id]["last_updated"] = datetime.now(
-            ).isoformat()
+            self._touch(candidate_id)
+            candidate = self.db["candidates"][candidate_id]
+            candidate.status = CandidateStatus.coerce(status)
+            candidate.last_updated = time.time()
+            self._reindex(candidate_id)
+            self._dirty_ids.add(candidate_id)
             self.save_db()
             logger.info(
                 f"Updated candidate {candidate_id} status to: {status}")
@@ -141,90 +639,550 @@ class CandidateDatabase:
                 f"Attempted to update non-existent candidate: {candidate_id}")
             return False
 
-    def record_message(self, candidate_id, direction, content, has_resume=False):
+    @_atomic
+    def mark_resume_received(self, candidate_id):
+        """
+        Record that a candidate's resume is stored, e.g. once a background
+        download finished
+
+        Returns:
+            bool: True if updated, False if the candidate does not exist
+        """
+        candidate_id = self.resolve_candidate_id(candidate_id)
+        candidate = self.db["candidates"].get(candidate_id)
+        if candidate is None:
+            logger.warning(
+                f"Attempted to mark resume for non-existent candidate: {candidate_id}")
+            return False
+        if candidate.resume_received and candidate.status is CandidateStatus.RESUME_RECEIVED:
+            return True
+
+        self._touch(candidate_id)
+        candidate.resume_received = True
+        candidate.status = CandidateStatus.RESUME_RECEIVED
+        candidate.last_updated = time.time()
+        self._reindex(candidate_id)
+        self._dirty_ids.add(candidate_id)
+        self.save_db()
+        logger.info(f"Resume received from candidate {candidate_id}")
+        return True
+
+    @_atomic
+    def record_message(self, candidate_id, direction, content, has_resume=False,
+                       fingerprint=None):
         """
         Record a message sent to or received from a candidate
 
+        Messages whose fingerprint is already stored for the candidate are
+        skipped, so re-reading a chat does not append its history again.
+
         Args:
             candidate_id: Candidate identifier
             direction: "outbound" or "inbound"
             content: Message content
             has_resume: Whether the message contains a resume
+            fingerprint: Fingerprint from message_fingerprint(); defaults to
+                one keyed by the current timestamp
 
         Returns:
-            bool: Success or failure
+            bool: True if recorded, False if the candidate does not exist or
+                the message was already recorded
         """
-        current_time = datetime.now().isoformat()
+        current_time = time.time()
+        candidate_id = self.resolve_candidate_id(candidate_id)
+        direction = MessageDirection.coerce(direction)
+        if fingerprint is None:
+            fingerprint = message_fingerprint(
+                direction.value, content, datetime.fromtimestamp(current_time).isoformat())
+
+        candidate = self.db["candidates"].get(candidate_id)
+        if candidate is None:
+            logger.warning(
+                f"Attempted to record message for non-existent candidate: {candidate_id}")
+            return False
+
+        if fingerprint in self._fingerprints_for(candidate_id):
+            logger.debug(
+                f"Skipping already recorded message for candidate {candidate_id}")
+            return False
+
+        self._touch(candidate_id)
 
         # Create message record
-        message = {
-            "candidate_id": candidate_id,
-            "direction": direction,
-            "content": content,
-            "timestamp": current_time,
-            "has_resume": has_resume
-        }
+        message = MessageRecord(
+            candidate_id=candidate_id,
+            direction=direction,
+            content=content,
+            timestamp=current_time,
+            has_resume=has_resume,
+            fingerprint=fingerprint
+        )
 
         # Add to global message history
         self.db["message_history"].append(message)
+        self._new_messages.append(message)
+        self._fingerprints_for(candidate_id).add(fingerprint)
+        if self._search_index is not None:
+            self._search_index.add(candidate_id, content)
 
-        # If candidate exists, update their record
-        if candidate_id in self.db["candidates"]:
-            candidate = self.db["candidates"][candidate_id]
+        # Update last message timestamp based on direction
+        if direction is MessageDirection.OUTBOUND:
+            candidate.last_message_sent = current_time
+            candidate.resume_requested = True
+            self.db["stats"]["messages_sent"] += 1
 
-            # Add to candidate message list
-            candidate["messages"].append(message)
+            if candidate.status is CandidateStatus.NEW:
+                candidate.status = CandidateStatus.CONTACTED
 
-            # Update last message timestamp based on direction
-            if direction == "outbound":
-                candidate["last_message_sent"] = current_time
-                candidate["resume_requested"] = True
-                self.db["stats"]["messages_sent"] += 1
+        elif direction is MessageDirection.INBOUND:
+            candidate.last_message_received = current_time
 
-                if candidate["status"] == "new":
-                    candidate["status"] = "contacted"
+            if candidate.status is CandidateStatus.CONTACTED:
+                candidate.status = CandidateStatus.RESPONDED
 
-            elif direction == "inbound":
-                candidate["last_message_received"] = current_time
+            # If message contains a resume, update status
+            if has_resume:
+                candidate.resume_received = True
+                candidate.status = CandidateStatus.RESUME_RECEIVED
 
-                if candidate["status"] == "contacted":
-                    candidate["status"] = "responded"
+        # Update last_updated timestamp
+        candidate.last_updated = current_time
+
+        self._reindex(candidate_id)
+        self._dirty_ids.add(candidate_id)
+        self.save_db()
+        return True
 
-                # If message contains a resume, update status
-                if has_resume:
-                    candidate["resume_received"] = True
-                    candidate["status"] = "resume_received"
-                    self.db["stats"]["resumes_received"] += 1
+    def next_message_fingerprint(self, candidate_id, direction, content):
+        """
+        Fingerprint for a message known to be new, numbered after the
+        messages with the same direction and content already stored
 
-            # Update last_updated timestamp
-            candidate["last_updated"] = current_time
+        Args:
+            candidate_id: Candidate identifier
+            direction: "outbound" or "inbound"
+            content: Message content
 
-            self.save_db()
+        Returns:
+            str: Fingerprint from message_fingerprint()
+        """
+        candidate_id = self.resolve_candidate_id(candidate_id)
+        direction = MessageDirection.coerce(direction).value
+        fingerprints = self._fingerprints_for(candidate_id)
+        occurrence = 0
+        while message_fingerprint(direction, content, occurrence) in fingerprints:
+            occurrence += 1
+        return message_fingerprint(direction, content, occurrence)
+
+    def get_chat_cursor(self, candidate_id):
+        """
+        Keys of the last chat messages seen for a candidate
+
+        Returns:
+            list: Message keys, or None if the chat was never read
+        """
+        candidate = self.get_candidate_by_id(candidate_id)
+        if candidate is None:
+            return None
+        cursor = candidate.extra_info.get("chat_cursor")
+        return cursor["keys"] if cursor else None
+
+    @_atomic
+    def set_chat_cursor(self, candidate_id, keys):
+        """
+        Remember the last chat messages seen for a candidate
+
+        Args:
+            candidate_id: Candidate identifier
+            keys: Message keys of the last messages, oldest first
+
+        Returns:
+            bool: True if saved, False if the candidate does not exist
+        """
+        candidate_id = self.resolve_candidate_id(candidate_id)
+        candidate = self.db["candidates"].get(candidate_id)
+        if candidate is None:
+            logger.warning(
+                f"Attempted to set chat cursor for non-existent candidate: {candidate_id}")
+            return False
+        cursor = {"keys": list(keys), "updated": time.time()}
+        if candidate.extra_info.get("chat_cursor", {}).get("keys") == cursor["keys"]:
             return True
+
+        self._touch(candidate_id)
+        candidate.extra_info["chat_cursor"] = cursor
+        self._dirty_ids.add(candidate_id)
+        self.save_db()
+        return True
+
+    @_atomic
+    def set_candidate_scores(self, scores):
+        """
+        Store requisition match scores, written with a single save
+
+        Args:
+            scores: {candidate_id: {requisition_id: score}}; scores for other
+                requisitions already stored are kept
+
+        Returns:
+            int: Number of candidates updated
+        """
+        now = time.time()
+        updated = 0
+        for candidate_id, requisition_scores in scores.items():
+            candidate_id = self.resolve_candidate_id(candidate_id)
+            candidate = self.db["candidates"].get(candidate_id)
+            if candidate is None:
+                continue
+            self._touch(candidate_id)
+            stored = dict(candidate.extra_info.get("scores", {}))
+            stored.update({requisition_id: {"score": round(float(score), 6), "updated": now}
+                           for requisition_id, score in requisition_scores.items()})
+            candidate.extra_info["scores"] = stored
+            self._dirty_ids.add(candidate_id)
+            updated += 1
+        self.save_db()
+        return updated
+
+    def top_scored_candidates(self, requisition_id, limit=10, status=None):
+        """
+        Candidates ranked by their stored score for a requisition
+
+        Args:
+            requisition_id: Requisition the scores were computed for
+            limit: Maximum number of results
+            status: Only return candidates with this status
+
+        Returns:
+            list: Dicts with the candidate id, record and score, best first
+        """
+        self.refresh()
+        candidates = self.db["candidates"]
+        if status is not None:
+            pool = self._status_index.get(CandidateStatus.coerce(status), {})
         else:
+            pool = candidates
+        scored = []
+        for candidate_id in pool:
+            candidate = candidates[candidate_id]
+            entry = candidate.extra_info.get("scores", {}).get(requisition_id)
+            if entry is not None and candidate.status is not CandidateStatus.MERGED:
+                scored.append((entry["score"], candidate_id))
+        return [{"id": candidate_id, "record": candidates[candidate_id], "score": score}
+                for score, candidate_id in heapq.nlargest(limit, scored)]
+
+    def _identities(self):
+        """The identity index, built from every candidate profile on first use"""
+        if self._identity_index is None:
+            index = IdentityIndex()
+            for candidate_id, candidate in self.db["candidates"].items():
+                profile = _identity_profile(candidate)
+                if profile:
+                    index.add(candidate_id, profile)
+            self._identity_index = index
+            logger.info(f"Built identity index over {len(index)} candidates")
+        return self._identity_index
+
+    def resolve_candidate_id(self, candidate_id):
+        """
+        The id a candidate is kept under, following merges
+
+        Args:
+            candidate_id: Candidate identifier, possibly of a merged duplicate
+
+        Returns:
+            str: Id of the candidate the duplicate was merged into, or the id itself
+        """
+        seen = {candidate_id}
+        candidate = self.db["candidates"].get(candidate_id)
+        while candidate is not None and candidate.status is CandidateStatus.MERGED:
+            target = candidate.extra_info.get("merged_into")
+            if not target or target in seen:
+                break
+            seen.add(target)
+            candidate_id = target
+            candidate = self.db["candidates"].get(candidate_id)
+        return candidate_id
+
+    @_atomic
+    def register_candidate(self, profile, source="search"):
+        """
+        Add a candidate found on any platform, reusing the record of the
+        same person when one is already known
+
+        The profile is normalized (masked names like "张先生", education,
+        city, age) and looked up in a blocking index, so only candidates
+        sharing a name or surname block are scored. A confident match reuses
+        that candidate's id; weaker ones are kept for possible_duplicates().
+        Masked names only match on a shared uid, phone or resume hash.
+
+        Args:
+            profile: Scraped details with "name" (or "candidate_name") and
+                optionally "age", "gender", "education", "current_location",
+                "uid", "phone" and "resume_hash"
+            source: Platform or page the candidate was found on
+
+        Returns:
+            str: Id of the candidate the profile was registered under
+        """
+        normalized = normalize_profile(profile)
+        index = self._identities()
+        candidate_id = index.resolve(normalized)
+        if candidate_id is None:
+            candidate_id = profile_id(normalized, source)
+            if candidate_id not in self.db["candidates"]:
+                candidate_id = self._legacy_profile_id(normalized, source) or candidate_id
+        candidate_id = self.resolve_candidate_id(candidate_id)
+
+        candidate = self.db["candidates"].get(candidate_id)
+        extra_info = candidate.extra_info if candidate is not None else {}
+        # Keep what earlier sightings knew, e.g. the full name behind a mask
+        merged_profile = {**extra_info.get("profile", {}), **normalized}
+        if "name" in merged_profile:
+            merged_profile["masked"] = False
+        sources = list(extra_info.get("sources", []))
+        if source not in sources:
+            sources.append(source)
+
+        name = profile.get("name") or profile.get("candidate_name") or "Unknown"
+        self.add_or_update_candidate(
+            candidate_id, name, source=source,
+            extra_info={"profile": merged_profile, "sources": sources})
+        index.resolve(merged_profile, exclude=candidate_id)
+        return candidate_id
+
+    def _legacy_profile_id(self, normalized, source):
+        """
+        Id a profile was registered under before profile ids took the gender
+        and uid, if that record exists and does not contradict them
+        """
+        legacy = {field: value for field, value in normalized.items()
+                  if field not in ("gender", "uid")}
+        candidate_id = profile_id(legacy, source)
+        candidate = self.db["candidates"].get(candidate_id)
+        if candidate is None or candidate_id == profile_id(normalized, source):
+            return None
+        stored = _identity_profile(candidate) or {}
+        for field in ("gender", "uid"):
+            if field in stored and stored[field] != normalized.get(field, stored[field]):
+                return None
+        return candidate_id
+
+    def possible_duplicates(self):
+        """
+        Candidate pairs that look alike but were not matched confidently
+
+        Returns:
+            list: ((candidate_id, candidate_id), score) tuples, best first
+        """
+        return self._identities().possible_duplicates()
+
+    @_atomic
+    def merge_candidates(self, primary_id, duplicate_id):
+        """
+        Fold a duplicate candidate into a primary one
+
+        The primary keeps the earliest first sighting, the latest activity,
+        the furthest funnel status and the union of the extra info; the
+        duplicate is kept as a MERGED record pointing at the primary, so its
+        id and messages still resolve to the primary.
+
+        Args:
+            primary_id: Candidate to keep
+            duplicate_id: Candidate to merge into the primary
+
+        Returns:
+            bool: True if merged, False if either candidate does not exist
+        """
+        primary_id = self.resolve_candidate_id(primary_id)
+        duplicate_id = self.resolve_candidate_id(duplicate_id)
+        candidates = self.db["candidates"]
+        if primary_id not in candidates or duplicate_id not in candidates:
             logger.warning(
-                f"Attempted to record message for non-existent candidate: {candidate_id}")
+                f"Attempted to merge non-existent candidates: {primary_id}, {duplicate_id}")
+            return False
+        if primary_id == duplicate_id:
             return False
 
-    def get_candidates_for_processing(self, max_count=10):
+        self._touch(primary_id)
+        self._touch(duplicate_id)
+        primary = candidates[primary_id]
+        duplicate = candidates[duplicate_id]
+
+        first_seen = [v for v in (primary.first_seen, duplicate.first_seen) if v is not None]
+        primary.first_seen = min(first_seen) if first_seen else None
+        primary.last_updated = time.time()
+        for field in ("last_message_sent", "last_message_received"):
+            values = [v for v in (getattr(primary, field), getattr(duplicate, field))
+                      if v is not None]
+            setattr(primary, field, max(values) if values else None)
+        primary.resume_requested = primary.resume_requested or duplicate.resume_requested
+        primary.resume_received = primary.resume_received or duplicate.resume_received
+        primary.follow_up_count = max(primary.follow_up_count, duplicate.follow_up_count)
+        if not primary.name or primary.name == "Unknown":
+            primary.name = duplicate.name
+        primary.notes = "\n".join(n for n in (primary.notes, duplicate.notes) if n)
+
+        if CandidateStatus.REJECTED in (primary.status, duplicate.status):
+            primary.status = CandidateStatus.REJECTED
+        elif duplicate.status in FUNNEL_ORDER and (
+                primary.status not in FUNNEL_ORDER or
+                FUNNEL_ORDER.index(duplicate.status) > FUNNEL_ORDER.index(primary.status)):
+            primary.status = duplicate.status
+
+        extra_info = {**duplicate.extra_info, **primary.extra_info}
+        extra_info.pop("merged_into", None)
+        profile = {**duplicate.extra_info.get("profile", {}),
+                   **primary.extra_info.get("profile", {})}
+        if profile:
+            if "name" in profile:
+                profile["masked"] = False
+            extra_info["profile"] = profile
+        sources = list(primary.extra_info.get("sources", []))
+        sources += [s for s in duplicate.extra_info.get("sources", []) if s not in sources]
+        if sources:
+            extra_info["sources"] = sources
+        tags = set(primary.extra_info.get("tags", [])) | set(duplicate.extra_info.get("tags", []))
+        if tags:
+            extra_info["tags"] = sorted(tags)
+        aliases = list(primary.extra_info.get("aliases", []))
+        for alias in [duplicate_id, *duplicate.extra_info.get("aliases", [])]:
+            if alias not in aliases:
+                aliases.append(alias)
+        extra_info["aliases"] = aliases
+        primary.extra_info = extra_info
+
+        # The duplicate's resume now counts towards the primary only
+        duplicate.status = CandidateStatus.MERGED
+        duplicate.resume_received = False
+        duplicate.extra_info["merged_into"] = primary_id
+        duplicate.last_updated = primary.last_updated
+
+        self._reindex(primary_id)
+        self._reindex(duplicate_id)
+        self._dirty_ids.update((primary_id, duplicate_id))
+        self._fingerprints.pop(primary_id, None)
+        self._fingerprints.pop(duplicate_id, None)
+        self.save_db()
+        logger.info(f"Merged candidate {duplicate_id} into {primary_id}")
+        return True
+
+    @_atomic
+    def merge_duplicates(self):
+        """
+        Merge every pair of candidates whose profiles match confidently,
+        keeping the one seen first
+
+        Returns:
+            int: Number of candidates merged away
+        """
+        index = self._identities()
+        candidates = self.db["candidates"]
+        merged = 0
+        for candidate_id in list(index):
+            profile = index.get(candidate_id)
+            if profile is None:
+                continue
+            match_id = index.resolve(profile, exclude=candidate_id)
+            if match_id is None:
+                continue
+            primary_id, duplicate_id = sorted(
+                (candidate_id, match_id), key=lambda cid: candidates[cid].first_seen or 0)
+            merged += self.merge_candidates(primary_id, duplicate_id)
+        if merged:
+            logger.info(f"Merged {merged} duplicate candidates")
+        return merged
+
+    def _index_tags(self, candidate_id, candidate):
+        """Bring the tag index in line with a candidate's tags"""
+        for tag in self._indexed_tags.pop(candidate_id, ()):
+            self._tag_index[tag].pop(candidate_id, None)
+        if candidate is None or candidate.status is CandidateStatus.MERGED:
+            return
+        tags = tuple(candidate.extra_info.get("tags", ()))
+        for tag in tags:
+            self._tag_index[tag][candidate_id] = None
+        if tags:
+            self._indexed_tags[candidate_id] = tags
+
+    def _tags(self):
+        """The tag index, built from every candidate's tags on first use"""
+        if self._tag_index is None:
+            self._tag_index = defaultdict(dict)
+            self._indexed_tags = {}
+            for candidate_id, candidate in self.db["candidates"].items():
+                self._index_tags(candidate_id, candidate)
+            logger.info(f"Built tag index over {len(self._indexed_tags)} candidates")
+        return self._tag_index
+
+    @_atomic
+    def add_candidate_tags(self, candidate_id, tags):
+        """
+        Tag a candidate, e.g. with the skills and intents matched in their
+        messages and resume
+
+        Args:
+            candidate_id: Candidate identifier
+            tags: Tags to add, e.g. {"skill:100409", "intent:resume"}
+
+        Returns:
+            bool: True if the candidate got new tags, False otherwise
+        """
+        candidate_id = self.resolve_candidate_id(candidate_id)
+        candidate = self.db["candidates"].get(candidate_id)
+        if candidate is None:
+            logger.warning(f"Attempted to tag non-existent candidate: {candidate_id}")
+            return False
+        current = candidate.extra_info.get("tags", [])
+        new_tags = set(tags) - set(current)
+        if not new_tags:
+            return False
+
+        self._touch(candidate_id)
+        candidate.extra_info["tags"] = sorted(set(current) | new_tags)
+        self._reindex(candidate_id, candidate)
+        self._dirty_ids.add(candidate_id)
+        self.save_db()
+        return True
+
+    def get_candidates_by_tag(self, tag):
+        """Get all candidates with a specific tag"""
+        candidates = self.db["candidates"]
+        return {cid: candidates[cid] for cid in self._tags().get(tag, ())}
+
+    def get_candidates_for_processing(self, max_count=10, tag=None):
         """
         Get candidates that need processing, ordered by priority:
         1. New candidates who haven't been messaged
         2. Candidates who responded but no resume detected yet (need checking)
-        3. Candidates who were messaged X days ago but haven't responded (need follow-up)
+        3. Candidates who were messaged X days ago but haven't responded (need follow-up),
+           longest-waiting first
+
+        Changes saved by other processes are picked up first. Candidates are
+        read from the status index and the follow-up heap, so selecting N of
+        M candidates costs O(N log M) rather than a full scan.
 
         Args:
             max_count: Maximum number of candidates to return
+            tag: Only return candidates with this tag, e.g. "skill:100409"
 
         Returns:
             list: Candidate records sorted by priority
         """
-        now = datetime.now()
+        self.refresh()
+        now = time.time()
+        candidates = self.db["candidates"]
         candidates_to_process = []
+        tagged = self._tags().get(tag, {}) if tag is not None else None
 
         # First priority: New candidates who haven't been messaged
-        for candidate_id, candidate in self.db["candidates"].items():
-            if candidate["status"] == "new" and not candidate["resume_requested"]:
+        for candidate_id in self._status_index[CandidateStatus.NEW]:
+            if len(candidates_to_process) >= max_count:
+                return candidates_to_process
+            if tagged is not None and candidate_id not in tagged:
+                continue
+            candidate = candidates[candidate_id]
+            if not candidate.resume_requested:
                 candidates_to_process.append({
                     "id": candidate_id,
                     "record": candidate,
@@ -232,8 +1190,13 @@ class CandidateDatabase:
                 })
 
         # Second priority: Candidates who have responded but no resume detected
-        for candidate_id, candidate in self.db["candidates"].items():
-            if candidate["status"] == "responded" and not candidate["resume_received"]:
+        for candidate_id in self._status_index[CandidateStatus.RESPONDED]:
+            if len(candidates_to_process) >= max_count:
+                return candidates_to_process
+            if tagged is not None and candidate_id not in tagged:
+                continue
+            candidate = candidates[candidate_id]
+            if not candidate.resume_received:
                 candidates_to_process.append({
                     "id": candidate_id,
                     "record": candidate,
@@ -241,65 +1204,114 @@ class CandidateDatabase:
                 })
 
         # Third priority: Candidates who were messaged 2+ days ago but haven't responded
-        for candidate_id, candidate in self.db["candidates"].items():
-            if (candidate["status"] == "contacted" and
-                candidate["last_message_sent"] and
-                    candidate["follow_up_count"] < 2):
-
-                # Check if it's been at least 2 days since last message
-                last_msg = datetime.fromisoformat(
-                    candidate["last_message_sent"])
-                days_since = (now - last_msg).days
-
-                if days_since >= 2:
-                    candidates_to_process.append({
-                        "id": candidate_id,
-                        "record": candidate,
-                        "priority": 3,
-                        "days_since_contact": days_since
-                    })
-
-        # Sort by priority and limit to max_count
-        candidates_to_process.sort(key=lambda x: x["priority"])
-        return candidates_to_process[:max_count]
+        remaining = max_count - len(candidates_to_process)
+        due = self._due_candidates(now, limit=remaining if tagged is None else None)
+        if tagged is not None:
+            due = [entry for entry in due if entry[1] in tagged][:remaining]
+        for _, candidate_id in due:
+            candidate = candidates[candidate_id]
+            candidates_to_process.append({
+                "id": candidate_id,
+                "record": candidate,
+                "priority": 3,
+                "days_since_contact": int((now - candidate.last_message_sent) // 86400)
+            })
+
+        return candidates_to_process
 
     def get_candidate_by_id(self, candidate_id):
-        """Get candidate record by ID"""
-        return self.db["candidates"].get(candidate_id)
+        """Get candidate record by ID, following merges"""
+        return self.db["candidates"].get(self.resolve_candidate_id(candidate_id))
+
+    def get_candidate_messages(self, candidate_id):
+        """
+        Get a candidate's messages, oldest first, as a view over the message
+        store; the messages of duplicates merged into them are included
+        """
+        candidate_id = self.resolve_candidate_id(candidate_id)
+        history = self.db["message_history"]
+        candidate = self.db["candidates"].get(candidate_id)
+        aliases = candidate.extra_info.get("aliases") if candidate else None
+        if not aliases:
+            return history.for_candidate(candidate_id)
+        messages = [m for cid in [candidate_id, *aliases] for m in history.for_candidate(cid)]
+        return sorted(messages, key=lambda m: m.timestamp)
+
+    def _search(self):
+        """The full-text index, built from every message and preview on first use"""
+        if self._search_index is None:
+            index = SearchIndex()
+            for message in self.db["message_history"]:
+                index.add(message.candidate_id, message.content)
+            for candidate_id, candidate in self.db["candidates"].items():
+                index.set_preview(candidate_id, candidate.extra_info.get("preview_text"))
+            self._search_index = index
+            logger.info(f"Built search index over {len(index)} candidates")
+        return self._search_index
+
+    def search(self, query, status=None, limit=10):
+        """
+        Full-text search over candidates' messages and preview text
+
+        Text is split into CJK bigrams and lowercase ASCII words. A candidate
+        matches when their text holds every term of the query, and matches
+        are ranked with BM25. The index is built on the first search and
+        kept up to date as messages and candidates are recorded.
+
+        Args:
+            query: Search text, e.g. "已发简历" or "python"
+            status: Only return candidates with this status
+            limit: Maximum number of results
+
+        Returns:
+            list: Dicts with the candidate id, record and score, best match first
+        """
+        self.refresh()
+        candidates = self.db["candidates"]
+        allowed = candidates
+        if status is not None:
+            allowed = self._status_index.get(CandidateStatus.coerce(status), {})
+
+        results = []
+        seen = set()
+        # Merged duplicates are indexed under their own id; report the primary
+        for candidate_id, score in self._search().search(query, limit, allowed):
+            candidate_id = self.resolve_candidate_id(candidate_id)
+            if candidate_id in seen:
+                continue
+            seen.add(candidate_id)
+            results.append(
+                {"id": candidate_id, "record": candidates[candidate_id], "score": score})
+        return results
 
     def get_candidates_by_status(self, status):
         """Get all candidates with a specific status"""
-        return {cid: candidate for cid, candidate in self.db["candidates"].items()
-                if candidate["status"] == status}
+        candidates = self.db["candidates"]
+        status = CandidateStatus.coerce(status)
+        return {cid: candidates[cid] for cid in self._status_index.get(status, ())}
 
     def generate_report(self):
         """Generate a summary report of the database"""
+        self.refresh()
         now = datetime.now()
 
-        # Calculate statistics
-        total_candidates = len(self.db["candidates"])
-        resume_received = sum(
-            1 for c in self.db["candidates"].values() if c["resume_received"])
-        contacted = sum(1 for c in self.db["candidates"].values() if c["status"] in [
-                        "contacted", "responded", "resume_received"])
-        responded = sum(1 for c in self.db["candidates"].values(
-        ) if c["status"] in ["responded", "resume_received"])
-        new_candidates = sum(
-            1 for c in self.db["candidates"].values() if c["status"] == "new")
+        # Funnel statistics come from the incremental counters in O(1)
+        total_candidates = self._counts["total"] - self._status_count(CandidateStatus.MERGED)
+        resume_received = self._counts["resume_received"]
+        contacted = self._status_count(*CONTACTED_STATUSES)
+        responded = self._status_count(*RESPONDED_STATUSES)
+        new_candidates = self._status_count(CandidateStatus.NEW)
 
         # Count candidates needing follow-up
         needs_followup = []
-        for cid, candidate in self.db["candidates"].items():
-            if candidate["status"] == "contacted" and candidate["last_message_sent"]:
-                last_msg = datetime.fromisoformat(
-                    candidate["last_message_sent"])
-                days_since = (now - last_msg).days
-                if days_since >= 2 and candidate["follow_up_count"] < 2:
-                    needs_followup.append({
-                        "id": cid,
-                        "name": candidate["name"],
-                        "days_since_contact": days_since
-                    })
+        now_ts = now.timestamp()
+        for _, cid in self._due_candidates(now_ts):
+            candidate = self.db["candidates"][cid]
+            needs_followup.append({
+                "id": cid,
+                "name": candidate.name,
+                "days_since_contact": int((now_ts - candidate.last_message_sent) // 86400)
+            })
 
         # Generate report
         report = {
@@ -313,8 +1325,10 @@ class CandidateDatabase:
                 "resume_rate": round(resume_received / contacted * 100, 2) if contacted > 0 else 0
             },
             "needing_followup": sorted(needs_followup, key=lambda x: x["days_since_contact"], reverse=True),
+            # Candidates per skill / intent tag
+            "tags": {tag: len(ids) for tag, ids in sorted(self._tags().items()) if ids},
             # Last 10 messages
-            "recent_activity": self.db["message_history"][-10:]
+            "recent_activity": [m.to_dict() for m in self.db["message_history"].tail(10)]
         }
 
         # Save report to file
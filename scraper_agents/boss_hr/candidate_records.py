@@ -0,0 +1,227 @@
+import sys
+from collections.abc import MutableMapping
+from datetime import datetime
+from enum import Enum
+
+
+class CandidateStatus(str, Enum):
+    """Stage of a candidate in the recruiting funnel"""
+    NEW = "new"
+    CONTACTED = "contacted"
+    RESPONDED = "responded"
+    RESUME_RECEIVED = "resume_received"
+    QUALIFIED = "qualified"
+    REJECTED = "rejected"
+    # Duplicate folded into another record (see extra_info["merged_into"])
+    MERGED = "merged"
+
+    @classmethod
+    def coerce(cls, value):
+        """Return the enum member for a status, or the interned string if unknown"""
+        try:
+            return cls(value)
+        except ValueError:
+            return sys.intern(str(value))
+
+
+class MessageDirection(str, Enum):
+    """Whether a message was sent to or received from a candidate"""
+    OUTBOUND = "outbound"
+    INBOUND = "inbound"
+
+    @classmethod
+    def coerce(cls, value):
+        try:
+            return cls(value)
+        except ValueError:
+            return sys.intern(str(value))
+
+
+def to_epoch(value):
+    """Convert an ISO timestamp (or epoch seconds) to epoch seconds"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    return datetime.fromisoformat(value).timestamp()
+
+
+def to_iso(value):
+    """Convert epoch seconds to the ISO format used on disk"""
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value).isoformat()
+
+
+class _Record:
+    """
+    Slotted record with a dict-compatible view.
+
+    Attribute access returns the compact in-memory values (enums, epoch
+    floats). Item access and to_dict() return the on-disk representation
+    (plain strings, ISO timestamps), so code written against the old dict
+    records keeps working.
+    """
+
+    __slots__ = ()
+    FIELDS = ()
+    TIME_FIELDS = ()
+    DEFAULTS = {}
+
+    def __init__(self, **values):
+        for field in self.FIELDS:
+            default = self.DEFAULTS.get(field)
+            self._set(field, values.get(field, default() if callable(default) else default))
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls.__new__(cls)
+        for field in cls.FIELDS:
+            default = cls.DEFAULTS.get(field)
+            value = data.get(field, default() if callable(default) else default)
+            record[field] = value
+        return record
+
+    def to_dict(self):
+        return {field: self[field] for field in self.FIELDS}
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        value = getattr(self, key)
+        if key in self.TIME_FIELDS:
+            return to_iso(value)
+        if isinstance(value, Enum):
+            return value.value
+        return value
+
+    def __setitem__(self, key, value):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        self._set(key, value)
+
+    def _set(self, key, value):
+        if key in self.TIME_FIELDS:
+            value = to_epoch(value)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.FIELDS
+
+    def get(self, key, default=None):
+        return self[key] if key in self.FIELDS else default
+
+    def keys(self):
+        return iter(self.FIELDS)
+
+    def items(self):
+        return ((field, self[field]) for field in self.FIELDS)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def __eq__(self, other):
+        if isinstance(other, _Record):
+            return type(self) is type(other) and self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+
+class CandidateRecord(_Record):
+    """A candidate tracked by CandidateDatabase"""
+
+    __slots__ = (
+        "name", "status", "source", "first_seen", "last_updated",
+        "resume_received", "resume_requested", "last_message_sent",
+        "last_message_received", "follow_up_count", "extra_info", "notes"
+    )
+    FIELDS = __slots__
+    TIME_FIELDS = ("first_seen", "last_updated",
+                   "last_message_sent", "last_message_received")
+    DEFAULTS = {
+        "status": CandidateStatus.NEW,
+        "source": "chat",
+        "resume_received": False,
+        "resume_requested": False,
+        "follow_up_count": 0,
+        "extra_info": dict,
+        "notes": ""
+    }
+
+    def _set(self, key, value):
+        if key == "status":
+            value = CandidateStatus.coerce(value)
+        elif key == "source" and value is not None:
+            value = sys.intern(value)
+        super()._set(key, value)
+
+    def clone(self):
+        """Copy of the record that does not share its extra_info dict"""
+        record = CandidateRecord.__new__(CandidateRecord)
+        for field in self.FIELDS:
+            setattr(record, field, getattr(self, field))
+        record.extra_info = dict(self.extra_info)
+        return record
+
+
+class MessageRecord(_Record):
+    """A message sent to or received from a candidate"""
+
+    __slots__ = (
+        "candidate_id", "direction", "content", "timestamp",
+        "has_resume", "fingerprint", "seq"
+    )
+    FIELDS = __slots__
+    TIME_FIELDS = ("timestamp",)
+    DEFAULTS = {"has_resume": False}
+
+    def _set(self, key, value):
+        if key == "direction":
+            value = MessageDirection.coerce(value)
+        super()._set(key, value)
+
+
+class LazyCandidates(MutableMapping):
+    """
+    Candidate mapping that starts from the index rows only and materializes
+    a full CandidateRecord from storage on first access.
+    """
+
+    def __init__(self, storage, index_rows):
+        self._storage = storage
+        self._ids = dict.fromkeys(row[0] for row in index_rows)
+        self._loaded = {}
+        self._index_rows = index_rows
+
+    def __getitem__(self, candidate_id):
+        record = self._loaded.get(candidate_id)
+        if record is not None:
+            return record
+        if candidate_id not in self._ids:
+            raise KeyError(candidate_id)
+        data = self._storage.load_candidate(candidate_id)
+        if data is None:
+            raise KeyError(candidate_id)
+        record = self._loaded[candidate_id] = CandidateRecord.from_dict(data)
+        return record
+
+    def __setitem__(self, candidate_id, record):
+        self._ids[candidate_id] = None
+        self._loaded[candidate_id] = record
+
+    def __delitem__(self, candidate_id):
+        del self._ids[candidate_id]
+        self._loaded.pop(candidate_id, None)
+
+    def __contains__(self, candidate_id):
+        return candidate_id in self._ids
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def take_index_rows(self):
+        """The index rows loaded at open, handed out once for index building"""
+        rows, self._index_rows = self._index_rows, None
+        return rows
@@ -0,0 +1,340 @@
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from utils.logger import logger
+from scraper_agents.boss_hr.db_storage import FileLock, create_storage, encode_record
+
+
+class BackupManager:
+    """
+    Rotating, compressed snapshots of a candidate database.
+
+    Snapshots are read from the storage backend and written as gzip-compressed
+    JSON by a background thread, so a save never waits on backup I/O. Every
+    snapshot is listed with its sha256 checksum in a manifest next to the
+    files. With deltas enabled, the snapshots between two full ones only hold
+    the candidates that changed and the messages appended since the previous
+    snapshot.
+
+    Retention keeps the newest snapshot of each of the last `daily` days and
+    of each of the last `weekly` ISO weeks, plus every snapshot a kept delta
+    is built on.
+
+    Snapshot, manifest update and pruning run under a lock file in the
+    backup directory, so processes sharing the database do not drop each
+    other's manifest entries or prune a file another one just listed.
+    """
+
+    FORMAT = 1
+
+    def __init__(self, storage, backup_dir=None, interval=24 * 3600,
+                 daily=7, weekly=4, deltas=False, full_every=7):
+        """
+        Args:
+            storage: StorageBackend of the database to back up
+            backup_dir: Directory of the snapshots (defaults to "backups"
+                next to the database file)
+            interval: Minimum seconds between two snapshots
+            daily: Number of days to keep a snapshot for
+            weekly: Number of ISO weeks to keep a snapshot for
+            deltas: Write delta snapshots between full ones
+            full_every: With deltas, write a full snapshot after this many
+                snapshots in a chain
+        """
+        self.storage = storage
+        self.name = storage.path.stem
+        self.backup_dir = Path(backup_dir) if backup_dir else storage.path.parent / "backups"
+        self.manifest_path = self.backup_dir / f"{self.name}_manifest.json"
+        self._dir_lock = FileLock(self.backup_dir / f"{self.name}.lock")
+        self.interval = interval
+        self.daily = daily
+        self.weekly = weekly
+        self.deltas = deltas
+        self.full_every = full_every
+
+        entries = self.load_manifest()
+        self._last_created = (datetime.fromisoformat(entries[-1]["created"]).timestamp()
+                              if entries else None)
+
+        # Delta state: digests of the candidates in the last snapshot taken by
+        # this process and its message count; unknown after a restart, so
+        # the first snapshot of a session is always full
+        self._last_file = None
+        self._last_digests = None
+        self._last_message_count = 0
+        self._chain_length = 0
+
+        self._snapshot_lock = threading.Lock()
+        self._pending = False
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._worker = None
+
+    def load_manifest(self):
+        """
+        Snapshots listed in the manifest
+
+        Returns:
+            list: Manifest entries, oldest first
+        """
+        if not self.manifest_path.exists():
+            return []
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_manifest(self, entries):
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def due(self):
+        """Whether the interval since the last snapshot has passed"""
+        return self._last_created is None or time.time() - self._last_created >= self.interval
+
+    def request(self):
+        """
+        Ask the background thread for a snapshot if one is due; never blocks
+
+        Returns:
+            bool: Whether a snapshot was scheduled
+        """
+        if self._pending or not self.due():
+            return False
+        self._pending = True
+        if self._worker is None:
+            self._worker = threading.Thread(
+                target=self._run_worker, name="db-backup", daemon=True)
+            self._worker.start()
+        self._wake.set()
+        return True
+
+    def _run_worker(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if self._pending:
+                try:
+                    self.snapshot()
+                except Exception as e:
+                    logger.error(f"Error creating database backup: {e}")
+                finally:
+                    self._pending = False
+            if self._stop.is_set():
+                break
+
+    @staticmethod
+    def _digest(candidate):
+        return hashlib.sha1(json.dumps(
+            candidate, sort_keys=True, ensure_ascii=False, default=encode_record
+        ).encode('utf-8')).hexdigest()
+
+    def snapshot(self):
+        """
+        Take a snapshot now, on the calling thread
+
+        Returns:
+            dict: The manifest entry of the new snapshot
+        """
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        with self._snapshot_lock, self._dir_lock:
+            return self._snapshot()
+
+    def _snapshot(self):
+        db = self.storage.read_snapshot()
+        candidates = db["candidates"]
+        messages = db.get("message_history", [])
+        digests = {candidate_id: self._digest(candidate)
+                   for candidate_id, candidate in candidates.items()}
+
+        entries = self.load_manifest()
+        base = entries[-1] if entries else None
+        use_delta = (self.deltas and base is not None and base["file"] == self._last_file
+                     and self._chain_length < self.full_every
+                     and len(messages) >= self._last_message_count)
+
+        if use_delta:
+            document = {
+                "format": self.FORMAT,
+                "kind": "delta",
+                "candidates": {
+                    candidate_id: candidates[candidate_id]
+                    for candidate_id, digest in digests.items()
+                    if self._last_digests.get(candidate_id) != digest
+                },
+                "removed": [candidate_id for candidate_id in self._last_digests
+                            if candidate_id not in digests],
+                "message_offset": self._last_message_count,
+                "messages": messages[self._last_message_count:],
+                "stats": db.get("stats", {})
+            }
+        else:
+            document = {"format": self.FORMAT, "kind": "full", "db": db}
+
+        created = datetime.now()
+        file_name = f"{self.name}_{created.strftime('%Y%m%d_%H%M%S_%f')}_{document['kind']}.json.gz"
+        data = gzip.compress(json.dumps(
+            document, ensure_ascii=False, default=encode_record).encode('utf-8'))
+
+        tmp_path = self.backup_dir / (file_name + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.backup_dir / file_name)
+
+        entry = {
+            "file": file_name,
+            "kind": document["kind"],
+            "base": base["file"] if use_delta else None,
+            "created": created.isoformat(),
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "size": len(data),
+            "candidates": len(candidates),
+            "messages": len(messages)
+        }
+        self._save_manifest(self._prune(entries + [entry]))
+
+        self._last_created = created.timestamp()
+        self._last_file = file_name
+        self._last_digests = digests
+        self._last_message_count = len(messages)
+        self._chain_length = self._chain_length + 1 if use_delta else 1
+
+        logger.info(f"Created {document['kind']} database backup: {file_name} ({len(data)} bytes)")
+        return entry
+
+    def _prune(self, entries):
+        """Apply the retention policy, deleting the dropped snapshot files"""
+        by_day = {}
+        by_week = {}
+        for entry in entries:
+            created = datetime.fromisoformat(entry["created"])
+            by_day[created.date()] = entry
+            by_week[tuple(created.isocalendar())[:2]] = entry
+
+        keep = {entries[-1]["file"]} if entries else set()
+        for day in sorted(by_day, reverse=True)[:self.daily]:
+            keep.add(by_day[day]["file"])
+        for week in sorted(by_week, reverse=True)[:self.weekly]:
+            keep.add(by_week[week]["file"])
+
+        # A kept delta needs every snapshot down to its full base
+        by_file = {entry["file"]: entry for entry in entries}
+        for file_name in list(keep):
+            base = by_file[file_name]["base"]
+            while base and base in by_file and base not in keep:
+                keep.add(base)
+                base = by_file[base]["base"]
+
+        for entry in entries:
+            if entry["file"] not in keep:
+                path = self.backup_dir / entry["file"]
+                if path.exists():
+                    path.unlink()
+                logger.debug(f"Pruned database backup: {entry['file']}")
+        return [entry for entry in entries if entry["file"] in keep]
+
+    def _read(self, entry):
+        with open(self.backup_dir / entry["file"], 'rb') as f:
+            data = f.read()
+        if hashlib.sha256(data).hexdigest() != entry["sha256"]:
+            raise ValueError(f"Checksum mismatch for backup {entry['file']}")
+        return json.loads(gzip.decompress(data).decode('utf-8'))
+
+    def load_snapshot(self, file_name=None):
+        """
+        Rebuild the database held by a snapshot, verifying checksums
+
+        Args:
+            file_name: Snapshot file from the manifest (defaults to the newest)
+
+        Returns:
+            dict: Database with "candidates", "stats" and "message_history"
+        """
+        by_file = {entry["file"]: entry for entry in self.load_manifest()}
+        if not by_file:
+            raise FileNotFoundError(f"No backups in {self.backup_dir}")
+        if file_name is None:
+            file_name = list(by_file)[-1]
+        if file_name not in by_file:
+            raise FileNotFoundError(f"Backup not in manifest: {file_name}")
+
+        chain = [by_file[file_name]]
+        while chain[-1]["base"]:
+            chain.append(by_file[chain[-1]["base"]])
+
+        db = None
+        for entry in reversed(chain):
+            document = self._read(entry)
+            if document["kind"] == "full":
+                db = document["db"]
+                continue
+            db["candidates"].update(document["candidates"])
+            for candidate_id in document["removed"]:
+                db["candidates"].pop(candidate_id, None)
+            db["message_history"] = (db["message_history"][:document["message_offset"]]
+                                     + document["messages"])
+            db["stats"] = document["stats"]
+        return db
+
+    def restore(self, target_file, file_name=None, backend=None):
+        """
+        Write a snapshot into a new database
+
+        Args:
+            target_file: Path of the database to create; must not exist yet
+            file_name: Snapshot file from the manifest (defaults to the newest)
+            backend: Storage backend of the target, inferred from its suffix if omitted
+
+        Returns:
+            Path: The path of the restored database
+        """
+        db = self.load_snapshot(file_name)
+        storage = create_storage(target_file, backend)
+        try:
+            if storage.exists():
+                raise FileExistsError(f"Restore target already exists: {target_file}")
+            storage.save(db, dirty_ids=list(db["candidates"]),
+                         new_messages=db.get("message_history", []))
+        finally:
+            storage.close()
+
+        logger.info(
+            f"Restored {len(db['candidates'])} candidates and "
+            f"{len(db.get('message_history', []))} messages into {target_file}")
+        return Path(target_file)
+
+    def close(self, timeout=30):
+        """Let a snapshot in progress or already requested finish"""
+        if self._worker is not None:
+            self._stop.set()
+            self._wake.set()
+            self._worker.join(timeout)
+            self._worker = None
+
+
+if __name__ == "__main__":
+    # Usage:
+    #   python -m scraper_agents.boss_hr.db_backup list <db_file>
+    #   python -m scraper_agents.boss_hr.db_backup restore <db_file> <target_file> [snapshot_file]
+    if len(sys.argv) < 3 or sys.argv[1] not in ("list", "restore") or \
+            (sys.argv[1] == "restore" and len(sys.argv) < 4):
+        print("Usage: python -m scraper_agents.boss_hr.db_backup list <db_file>\n"
+              "       python -m scraper_agents.boss_hr.db_backup restore "
+              "<db_file> <target_file> [snapshot_file]")
+        sys.exit(1)
+
+    manager = BackupManager(create_storage(sys.argv[2]))
+    if sys.argv[1] == "list":
+        for entry in manager.load_manifest():
+            print(f"{entry['created']}  {entry['kind']:5}  {entry['size']:>10}  "
+                  f"{entry['candidates']:>7} candidates  {entry['file']}")
+    else:
+        manager.restore(sys.argv[3], *sys.argv[4:5])
@@ -0,0 +1,957 @@
+import atexit
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from utils.logger import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """
+    Exclusive lock shared between processes through a lock file.
+
+    Reentrant within one instance, and threads of the same process serialize
+    on it too. Uses flock on POSIX and msvcrt.locking on Windows.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._thread_lock = threading.RLock()
+        self._file = None
+        self._depth = 0
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                lock_file = open(self.path, 'a+b')
+                self._lock(lock_file)
+            except BaseException:
+                self._thread_lock.release()
+                raise
+            self._file = lock_file
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            self._unlock(self._file)
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
+
+    @staticmethod
+    def _lock(lock_file):
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            return
+        lock_file.seek(0)
+        while True:
+            try:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                # LK_LOCK gives up after about ten seconds; keep waiting
+                continue
+
+    @staticmethod
+    def _unlock(lock_file):
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class StorageBackend:
+    """
+    Base class for CandidateDatabase persistence.
+
+    Backends receive the in-memory database dict together with the ids of the
+    candidates and the messages that changed since the last save, so they can
+    choose between rewriting everything and writing only the changed rows.
+
+    Several processes may share one database. Writers serialize through
+    lock(); each backend remembers how far it has read and written, and
+    load_changes() returns what other processes saved since. Saves merge
+    into what is on disk instead of overwriting it, and reads never take
+    the lock.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file_lock = FileLock(self.path.with_name(self.path.name + ".lock"))
+
+    @contextmanager
+    def lock(self):
+        """Hold the cross-process write lock of the database"""
+        with self._file_lock:
+            yield
+
+    def exists(self):
+        """Whether the storage already holds a database"""
+        return self.path.exists()
+
+    def load(self):
+        """
+        Load the full database
+
+        Returns:
+            dict: Database with "candidates", "stats" and "message_history"
+        """
+        raise NotImplementedError
+
+    def save(self, db, dirty_ids=(), new_messages=()):
+        """
+        Persist changes to the database
+
+        Args:
+            db: The in-memory database dict
+            dirty_ids: Candidate ids added or modified since the last save
+            new_messages: Message records appended since the last save
+        """
+        raise NotImplementedError
+
+    def load_changes(self):
+        """
+        Changes saved by other processes since this instance last loaded,
+        saved or called load_changes(). Call under lock() before saving, so
+        the in-memory database is current when it is written back.
+
+        Returns:
+            dict: {"candidates": {id: record dict}, "messages": [message
+                dicts], "stats": dict}, or None if nothing changed. Backends
+                that cannot tell which candidates changed return all of them.
+        """
+        raise NotImplementedError
+
+    def read_snapshot(self):
+        """
+        Read a consistent copy of the persisted database without using this
+        backend's open handles, so it can run on a background thread while
+        saves continue
+
+        Returns:
+            dict: Database with "candidates", "stats" and "message_history"
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release any open handles"""
+        pass
+
+    # Backends that can serve the index and individual records on demand
+    # set this and implement the lazy loading methods below
+    supports_lazy = False
+
+    def load_index(self):
+        """
+        Load only what the in-memory indexes need
+
+        Returns:
+            tuple: (stats dict, list of (candidate_id, status, resume_received,
+                resume_requested, last_message_sent, follow_up_count) rows)
+        """
+        raise NotImplementedError
+
+    def load_candidate(self, candidate_id):
+        """Load one candidate record, or None"""
+        raise NotImplementedError
+
+    def message_watermark(self):
+        """Position of the newest persisted message"""
+        raise NotImplementedError
+
+    def load_messages(self, candidate_id, upto):
+        """A candidate's persisted messages up to the watermark, oldest first"""
+        raise NotImplementedError
+
+    def iter_messages(self, upto):
+        """Stream every persisted message up to the watermark, oldest first"""
+        raise NotImplementedError
+
+    def tail_messages(self, count, upto):
+        """The newest `count` persisted messages up to the watermark, oldest first"""
+        raise NotImplementedError
+
+    def count_messages(self, upto, candidate_id=None):
+        """Number of persisted messages up to the watermark"""
+        raise NotImplementedError
+
+
+def encode_record(obj):
+    """json default hook for typed records, which serialize through to_dict()"""
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _drop_candidate_messages(db):
+    """
+    Remove the per-candidate message copies written by older versions;
+    message_history already holds every message.
+    """
+    for candidate in db["candidates"].values():
+        candidate.pop("messages", None)
+    return db
+
+
+class JSONStorage(StorageBackend):
+    """
+    Stores the whole database as a single JSON document.
+
+    The document is replaced atomically on every save, so readers always see
+    a complete file, but every save costs O(database); JSON files use the
+    journal backend unless this one is asked for. Saves merge the changed
+    candidates and new messages into the current file rather than writing
+    the in-memory copy, so messages are only ever appended to the file and
+    writers never clobber each other.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        # (mtime, size, inode) of the file as last read or written, and the
+        # number of its messages this instance has seen
+        self._seen_signature = None
+        self._seen_messages = 0
+
+    def _signature(self):
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _read(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return _drop_candidate_messages(json.load(f))
+
+    def load(self):
+        signature = self._signature()
+        db = self._read()
+        self._seen_signature = signature
+        self._seen_messages = len(db.get("message_history", []))
+        return db
+
+    def save(self, db, dirty_ids=(), new_messages=()):
+        with self.lock():
+            up_to_date = self._signature() == self._seen_signature
+            if self.path.exists():
+                current = self._read()
+                candidates = db["candidates"]
+                current["candidates"].update(
+                    (candidate_id, candidates[candidate_id])
+                    for candidate_id in dirty_ids if candidate_id in candidates)
+                current["message_history"].extend(new_messages)
+                current["stats"] = db["stats"]
+            else:
+                current = {**db, "message_history": list(db["message_history"])}
+
+            # The JSON layout cannot be patched in place, so always rewrite it
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(current, f, ensure_ascii=False, indent=2, default=encode_record)
+            os.replace(tmp_path, self.path)
+
+            # Our own write counts as seen unless others wrote since we looked
+            if up_to_date:
+                self._seen_signature = self._signature()
+                self._seen_messages = len(current["message_history"])
+
+    def load_changes(self):
+        signature = self._signature()
+        if signature is None or signature == self._seen_signature:
+            return None
+        db = self._read()
+        messages = db.get("message_history", [])
+        changes = {
+            "candidates": db["candidates"],
+            "messages": messages[self._seen_messages:],
+            "stats": db.get("stats", {})
+        }
+        self._seen_signature = signature
+        self._seen_messages = len(messages)
+        return changes
+
+    def read_snapshot(self):
+        return self._read()
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    Stores candidates, messages and stats in separate SQLite tables.
+
+    Candidate rows hold the candidate record plus the few columns the
+    in-memory indexes need, so a lazy load can read just those; messages
+    live in their own table, indexed by candidate id and sequence. Each save
+    only touches the changed rows.
+    """
+
+    # Columns copied out of the record for lazy index loads
+    INDEX_COLUMNS = ("status", "resume_received", "resume_requested",
+                     "last_message_sent", "follow_up_count")
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS candidates (
+            id TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS messages (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            candidate_id TEXT NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_messages_candidate
+            ON messages (candidate_id, seq);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._conn = None
+        # Newest candidate revision and message seq this instance has seen
+        self._seen_rev = 0
+        self._seen_seq = 0
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(str(self.path))
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self.SCHEMA)
+            self._add_index_columns()
+        return self._conn
+
+    def _add_index_columns(self):
+        """Add and backfill the index columns on databases created before them"""
+        existing = {row[1] for row in
+                    self._conn.execute("PRAGMA table_info(candidates)")}
+        if "rev" not in existing:
+            # Revision of the save that last wrote the row, for load_changes()
+            with self._conn:
+                self._conn.execute(
+                    "ALTER TABLE candidates ADD COLUMN rev INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_candidates_rev ON candidates (rev)")
+
+        missing = [c for c in self.INDEX_COLUMNS if c not in existing]
+        if not missing:
+            return
+
+        with self._conn:
+            for column in missing:
+                self._conn.execute(f"ALTER TABLE candidates ADD COLUMN {column}")
+            rows = [
+                tuple(json.loads(data).get(c) for c in self.INDEX_COLUMNS) + (candidate_id,)
+                for candidate_id, data in self._conn.execute("SELECT id, data FROM candidates")
+            ]
+            assignments = ", ".join(f"{c} = ?" for c in self.INDEX_COLUMNS)
+            self._conn.executemany(
+                f"UPDATE candidates SET {assignments} WHERE id = ?", rows)
+
+    def exists(self):
+        if not self.path.exists():
+            return False
+        row = self.conn.execute(
+            "SELECT 1 FROM meta WHERE key = 'stats'").fetchone()
+        return row is not None
+
+    def _position(self):
+        """(newest candidate revision, newest message seq) in the database"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'rev'").fetchone()
+        rev = int(row[0]) if row else 0
+        seq = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM messages").fetchone()[0]
+        return rev, seq
+
+    def _load_stats(self):
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = 'stats'").fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def load(self):
+        conn = self.conn
+        conn.execute("BEGIN")
+        try:
+            self._seen_rev, self._seen_seq = self._position()
+            stats = self._load_stats()
+            candidates = {candidate_id: json.loads(data) for candidate_id, data in
+                          conn.execute("SELECT id, data FROM candidates")}
+            message_history = [json.loads(data) for (data,) in conn.execute(
+                "SELECT data FROM messages WHERE seq <= ? ORDER BY seq", (self._seen_seq,))]
+        finally:
+            conn.commit()
+
+        return {
+            "candidates": candidates,
+            "stats": stats,
+            "message_history": message_history
+        }
+
+    def load_changes(self):
+        conn = self.conn
+        conn.execute("BEGIN")
+        try:
+            rev, seq = self._position()
+            if (rev, seq) == (self._seen_rev, self._seen_seq):
+                return None
+            changes = {
+                "candidates": {candidate_id: json.loads(data) for candidate_id, data in
+                               conn.execute("SELECT id, data FROM candidates WHERE rev > ?",
+                                            (self._seen_rev,))},
+                "messages": [json.loads(data) for (data,) in conn.execute(
+                    "SELECT data FROM messages WHERE seq > ? AND seq <= ? ORDER BY seq",
+                    (self._seen_seq, seq))],
+                "stats": self._load_stats()
+            }
+        finally:
+            conn.commit()
+        self._seen_rev, self._seen_seq = rev, seq
+        return changes
+
+    def read_snapshot(self):
+        # sqlite3 connections are bound to the thread that opened them, so
+        # read through a separate connection inside one read transaction
+        conn = sqlite3.connect(str(self.path))
+        try:
+            conn.execute("BEGIN")
+            row = conn.execute(
+                "SELECT value FROM meta WHERE key = 'stats'").fetchone()
+            return {
+                "candidates": {candidate_id: json.loads(data) for candidate_id, data in
+                               conn.execute("SELECT id, data FROM candidates")},
+                "stats": json.loads(row[0]) if row else {},
+                "message_history": [json.loads(data) for (data,) in
+                                    conn.execute("SELECT data FROM messages ORDER BY seq")]
+            }
+        finally:
+            conn.close()
+
+    def save(self, db, dirty_ids=(), new_messages=()):
+        candidates = db["candidates"]
+        rows = []
+        for candidate_id in dirty_ids:
+            candidate = candidates.get(candidate_id)
+            if candidate is None:
+                continue
+            rows.append((candidate_id, json.dumps(
+                candidate, ensure_ascii=False, default=encode_record))
+                + tuple(candidate.get(c) for c in self.INDEX_COLUMNS))
+
+        with self.lock(), self.conn:
+            # Only rows and messages are written, so other processes' changes
+            # are never overwritten; our own writes count as seen unless
+            # someone else wrote since we last looked
+            before = self._position()
+            rev = before[0] + 1
+            if rows:
+                columns = ", ".join(self.INDEX_COLUMNS)
+                placeholders = ", ".join("?" * len(self.INDEX_COLUMNS))
+                self.conn.executemany(
+                    f"INSERT OR REPLACE INTO candidates (id, data, rev, {columns}) "
+                    f"VALUES (?, ?, {rev}, {placeholders})", rows)
+            if new_messages:
+                self.conn.executemany(
+                    "INSERT INTO messages (candidate_id, data) VALUES (?, ?)",
+                    [(m["candidate_id"], json.dumps(m, ensure_ascii=False, default=encode_record))
+                     for m in new_messages])
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('rev', ?)", (str(rev),))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('stats', ?)",
+                (json.dumps(db["stats"], ensure_ascii=False),))
+            if before == (self._seen_rev, self._seen_seq):
+                self._seen_rev, self._seen_seq = self._position()
+
+    supports_lazy = True
+
+    def load_index(self):
+        conn = self.conn
+        conn.execute("BEGIN")
+        try:
+            self._seen_rev, self._seen_seq = self._position()
+            stats = self._load_stats()
+            columns = ", ".join(self.INDEX_COLUMNS)
+            rows = conn.execute(f"SELECT id, {columns} FROM candidates").fetchall()
+        finally:
+            conn.commit()
+        return stats, rows
+
+    def load_candidate(self, candidate_id):
+        row = self.conn.execute(
+            "SELECT data FROM candidates WHERE id = ?", (candidate_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def message_watermark(self):
+        # Messages past what the last load saw arrive through load_changes()
+        return self._seen_seq
+
+    def load_messages(self, candidate_id, upto):
+        return [json.loads(data) for (data,) in self.conn.execute(
+            "SELECT data FROM messages WHERE candidate_id = ? AND seq <= ? ORDER BY seq",
+            (candidate_id, upto))]
+
+    def iter_messages(self, upto):
+        cursor = self.conn.execute(
+            "SELECT data FROM messages WHERE seq <= ? ORDER BY seq", (upto,))
+        for (data,) in cursor:
+            yield json.loads(data)
+
+    def tail_messages(self, count, upto):
+        rows = self.conn.execute(
+            "SELECT data FROM messages WHERE seq <= ? ORDER BY seq DESC LIMIT ?",
+            (upto, count)).fetchall()
+        return [json.loads(data) for (data,) in reversed(rows)]
+
+    def count_messages(self, upto, candidate_id=None):
+        if candidate_id is None:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM messages WHERE seq <= ?", (upto,)).fetchone()[0]
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM messages WHERE candidate_id = ? AND seq <= ?",
+            (candidate_id, upto)).fetchone()[0]
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class JournalStorage(StorageBackend):
+    """
+    Append-only journal with periodic snapshot compaction.
+
+    The snapshot is the regular JSON database file. Every save appends one
+    JSONL record holding the changed candidate rows, the new messages and
+    the current stats, so a write costs O(event) instead of O(database).
+    Records are flushed immediately and fsynced in groups of `group_size`
+    records or every `group_interval` seconds, whichever comes first, so a
+    crash loses at most one group-commit window.
+
+    A background thread seals the active journal once it grows past
+    `compact_threshold` bytes and folds the sealed segments into a new
+    snapshot without touching the in-memory database. Startup loads the
+    snapshot and replays the segments it has not folded yet plus the active
+    journal.
+    """
+
+    SEGMENT_PATTERN = r"\.journal\.(\d+)\.jsonl$"
+
+    def __init__(self, path, group_size=32, group_interval=1.0,
+                 compact_threshold=16 * 1024 * 1024):
+        super().__init__(path)
+        self.group_size = group_size
+        self.group_interval = group_interval
+        self.compact_threshold = compact_threshold
+        self.journal_path = self.path.with_name(f"{self.path.stem}.journal.jsonl")
+
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._journal = None
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._stop = threading.Event()
+        self._worker = None
+
+        # File layout (see _layout()) and active journal offset this instance
+        # has read up to, and the number of messages seen in total
+        self._seen_layout = None
+        self._seen_offset = 0
+        self._seen_messages = 0
+
+    def _segment_path(self, number):
+        return self.path.with_name(f"{self.path.stem}.journal.{number}.jsonl")
+
+    def _segments(self):
+        """Sealed journal segments as (number, path), oldest first"""
+        pattern = re.compile(re.escape(self.path.stem) + self.SEGMENT_PATTERN)
+        segments = []
+        for candidate_path in self.path.parent.glob(f"{self.path.stem}.journal.*.jsonl"):
+            match = pattern.match(candidate_path.name)
+            if match:
+                segments.append((int(match.group(1)), candidate_path))
+        return sorted(segments)
+
+    def exists(self):
+        return self.path.exists() or self.journal_path.exists() or bool(self._segments())
+
+    @staticmethod
+    def _apply(db, record):
+        """Replay one journal record onto a database dict"""
+        db["candidates"].update(record.get("candidates", {}))
+        db["message_history"].extend(record.get("messages", []))
+
+        if "stats" in record:
+            db["stats"] = record["stats"]
+
+    @classmethod
+    def _replay(cls, db, journal_path):
+        """
+        Replay a journal file, stopping at a torn last record
+
+        Returns:
+            tuple: (records replayed, byte offset of the end of the last good record)
+        """
+        with open(journal_path, 'rb') as f:
+            return cls._replay_from(db, f)
+
+    @classmethod
+    def _replay_from(cls, db, journal, start=0):
+        """
+        Replay the records of an open journal from a byte offset, stopping at
+        a torn record or one another process is still appending
+
+        Returns:
+            tuple: (records replayed, byte offset of the end of the last good record)
+        """
+        count = 0
+        offset = start
+        journal.seek(start)
+        for line in journal:
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("record is not newline-terminated")
+                record = json.loads(line.decode('utf-8'))
+            except ValueError:
+                break
+            cls._apply(db, record)
+            count += 1
+            offset += len(line)
+        return count, offset
+
+    def _load_snapshot(self):
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return _drop_candidate_messages(json.load(f))
+        return {"candidates": {}, "stats": {}, "message_history": []}
+
+    @staticmethod
+    def _inode(path):
+        try:
+            return path.stat().st_ino
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _identity(journal):
+        """(inode, id from the header record) of an open journal"""
+        inode = os.fstat(journal.fileno()).st_ino
+        journal.seek(0)
+        try:
+            journal_id = json.loads(journal.readline()).get("journal_id")
+        except ValueError:
+            journal_id = None
+        return inode, journal_id
+
+    def _layout(self):
+        """
+        Identity of the snapshot, the sealed segments and the active journal.
+        Inodes alone are reused too quickly, so the snapshot also carries its
+        mtime and the journal the random id written in its header.
+        """
+        try:
+            stat = self.path.stat()
+            snapshot = (stat.st_ino, stat.st_mtime_ns)
+        except FileNotFoundError:
+            snapshot = None
+        try:
+            with open(self.journal_path, 'rb') as f:
+                journal = self._identity(f)
+        except FileNotFoundError:
+            journal = None
+        return snapshot, tuple(n for n, _ in self._segments()), journal
+
+    def _load_all(self):
+        """
+        Snapshot plus the unfolded segments and the active journal. Retried
+        if another process seals or compacts the journal meanwhile.
+
+        Returns:
+            tuple: (database, records replayed, layout read, end offset of
+                the last good active journal record)
+        """
+        while True:
+            layout = self._layout()
+            try:
+                db = self._load_snapshot()
+                folded = db.get("journal_segment", 0)
+
+                replayed = 0
+                offset = 0
+                for number, segment in self._segments():
+                    if number > folded:
+                        replayed += self._replay(db, segment)[0]
+                if layout[2] is not None:
+                    count, offset = self._replay(db, self.journal_path)
+                    replayed += count
+            except FileNotFoundError:
+                continue
+            if self._layout() == layout:
+                return db, replayed, layout, offset
+
+    def load(self):
+        # Under the lock a record without its newline is a torn write from a
+        # crash, not another process mid-append
+        with self.lock():
+            db, replayed, layout, offset = self._load_all()
+            # Drop a torn tail so new records start on a clean line
+            if layout[2] is not None and offset < self.journal_path.stat().st_size:
+                logger.warning(
+                    f"Ignoring incomplete journal record in {self.journal_path}")
+                with open(self.journal_path, 'r+b') as f:
+                    f.truncate(offset)
+
+        self._seen_layout = layout
+        self._seen_offset = offset
+        self._seen_messages = len(db["message_history"])
+        logger.debug(f"Replayed {replayed} journal records on top of snapshot")
+        self._start_worker()
+        return db
+
+    def load_changes(self):
+        if self._layout() == self._seen_layout:
+            if self._seen_layout[2] is None:
+                return None
+            # Same files: read just the records appended to the active journal,
+            # through a handle checked to still be that journal, since it can
+            # be sealed and replaced at any time without the lock
+            try:
+                with open(self.journal_path, 'rb') as f:
+                    if self._identity(f) == self._seen_layout[2]:
+                        if os.fstat(f.fileno()).st_size == self._seen_offset:
+                            return None
+                        db = {"candidates": {}, "stats": None, "message_history": []}
+                        _, offset = self._replay_from(db, f, self._seen_offset)
+                        if offset == self._seen_offset:
+                            return None
+                        self._seen_offset = offset
+                        self._seen_messages += len(db["message_history"])
+                        return {"candidates": db["candidates"],
+                                "messages": db["message_history"], "stats": db["stats"]}
+            except FileNotFoundError:
+                pass
+
+        # The journal was created, sealed or compacted since: reload it all
+        db, _, self._seen_layout, self._seen_offset = self._load_all()
+        messages = db["message_history"]
+        changes = {"candidates": db["candidates"],
+                   "messages": messages[self._seen_messages:], "stats": db["stats"]}
+        self._seen_messages = len(messages)
+        return changes
+
+    def read_snapshot(self):
+        # Hold off this process's compaction; other processes' compactions
+        # make _load_all() retry
+        with self._compact_lock:
+            return self._load_all()[0]
+
+    def save(self, db, dirty_ids=(), new_messages=()):
+        candidates = db["candidates"]
+        record = {
+            "candidates": {
+                candidate_id: candidates[candidate_id]
+                for candidate_id in dirty_ids if candidate_id in candidates
+            },
+            "messages": list(new_messages),
+            "stats": db["stats"]
+        }
+        line = json.dumps(record, ensure_ascii=False, default=encode_record) + "\n"
+
+        with self.lock(), self._lock:
+            # Another process may have sealed the journal we hold open
+            journal = self._inode(self.journal_path)
+            if self._journal is not None and os.fstat(self._journal.fileno()).st_ino != journal:
+                self._sync()
+                self._journal.close()
+                self._journal = None
+            up_to_date = (self._layout() == self._seen_layout and
+                          (journal is None or self.journal_path.stat().st_size == self._seen_offset))
+            if self._journal is None:
+                self._journal = open(self.journal_path, 'a', encoding='utf-8')
+                if self._journal.tell() == 0:
+                    self._journal.write(json.dumps({"journal_id": uuid.uuid4().hex}) + "\n")
+
+            self._journal.write(line)
+            self._journal.flush()
+            self._pending += 1
+            if (self._pending >= self.group_size or
+                    time.monotonic() - self._last_sync >= self.group_interval):
+                self._sync()
+
+            # Our own record counts as seen unless others wrote since we looked
+            if up_to_date:
+                self._seen_layout = self._layout()
+                self._seen_offset = os.fstat(self._journal.fileno()).st_size
+                self._seen_messages += len(record["messages"])
+
+        self._start_worker()
+
+    def _sync(self):
+        """fsync the active journal; caller must hold the lock"""
+        if self._journal is not None and self._pending:
+            os.fsync(self._journal.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def _start_worker(self):
+        if self._worker is None:
+            self._worker = threading.Thread(
+                target=self._run_worker, name="journal-compactor", daemon=True)
+            self._worker.start()
+            atexit.register(self.close)
+
+    def _run_worker(self):
+        while not self._stop.wait(self.group_interval):
+            with self._lock:
+                self._sync()
+            try:
+                if (self.journal_path.exists() and
+                        self.journal_path.stat().st_size >= self.compact_threshold):
+                    self.compact()
+            except Exception as e:
+                logger.error(f"Error compacting candidate journal: {e}")
+
+    def _seal(self):
+        """Rotate the active journal into a numbered segment"""
+        segments = self._segments()
+        number = max(segments[-1][0] if segments else 0,
+                     self._load_snapshot().get("journal_segment", 0)) + 1
+
+        with self._lock:
+            self._sync()
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            if self.journal_path.exists():
+                os.replace(self.journal_path, self._segment_path(number))
+
+    def compact(self):
+        """Fold sealed journal segments into a new snapshot"""
+        with self.lock(), self._compact_lock:
+            self._seal()
+
+            db = self._load_snapshot()
+            folded = db.get("journal_segment", 0)
+            segments = [(n, p) for n, p in self._segments() if n > folded]
+            if not segments:
+                return
+
+            for number, segment in segments:
+                self._replay(db, segment)
+            db["journal_segment"] = segments[-1][0]
+
+            # Write the new snapshot atomically, then drop the folded segments
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(db, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+            for number, segment in self._segments():
+                if number <= db["journal_segment"]:
+                    segment.unlink()
+
+            logger.info(
+                f"Compacted {len(segments)} journal segment(s) into {self.path}")
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            self._sync()
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+
+BACKENDS = {
+    "json": JSONStorage,
+    "sqlite": SQLiteStorage,
+    "journal": JournalStorage,
+}
+
+
+def create_storage(db_file, backend=None):
+    """
+    Create the storage backend for a database file
+
+    Args:
+        db_file: Path of the database file
+        backend: "json", "sqlite" or "journal"; inferred from the file
+            suffix if omitted. Other files than SQLite ones get the journal
+            backend, which reads a plain JSON database as its snapshot and
+            appends to it instead of rewriting the whole file on each save
+
+    Returns:
+        StorageBackend: The storage instance
+    """
+    path = Path(db_file)
+    if backend is None:
+        backend = "sqlite" if path.suffix in (".db", ".sqlite", ".sqlite3") else "journal"
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown storage backend: {backend}")
+
+    return BACKENDS[backend](path)
+
+
+def migrate_json_to_sqlite(json_file, sqlite_file=None):
+    """
+    One-shot migration of a JSON candidate database into SQLite
+
+    Args:
+        json_file: Path of the existing candidates.json, with its journal
+            if it has one
+        sqlite_file: Target database path (defaults to the JSON path with a .db suffix)
+
+    Returns:
+        Path: The path of the SQLite database
+    """
+    json_path = Path(json_file)
+    sqlite_path = Path(sqlite_file) if sqlite_file else json_path.with_suffix(".db")
+
+    db = JournalStorage(json_path).read_snapshot()
+    storage = SQLiteStorage(sqlite_path)
+    try:
+        if storage.exists():
+            raise FileExistsError(
+                f"SQLite database already populated: {sqlite_path}")
+        storage.save(db, dirty_ids=list(db["candidates"]),
+                     new_messages=db.get("message_history", []))
+    finally:
+        storage.close()
+
+    logger.info(
+        f"Migrated {len(db['candidates'])} candidates and "
+        f"{len(db.get('message_history', []))} messages from {json_path} to {sqlite_path}")
+    return sqlite_path
+
+
+if __name__ == "__main__":
+    # Usage: python -m scraper_agents.boss_hr.db_storage <candidates.json> [<candidates.db>]
+    if len(sys.argv) < 2:
+        print("Usage: python -m scraper_agents.boss_hr.db_storage <json_file> [sqlite_file]")
+        sys.exit(1)
+    migrate_json_to_sqlite(*sys.argv[1:3])
@@ -0,0 +1,223 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import sys
+import time
+from pathlib import Path
+from utils.logger import logger
+
+# Folder the browser saves downloads to (SeleniumBase's default)
+DOWNLOAD_DIR = "downloaded_files"
+
+# Suffixes of downloads still being written
+PARTIAL_SUFFIXES = (".crdownload", ".part", ".partial", ".download", ".tmp")
+# Files that are never downloads, e.g. the driver's own process locks
+IGNORED_SUFFIXES = (".lock",)
+
+# inotify events meaning a file appeared or was finished
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+
+class _DirectoryWatcher:
+    """
+    Blocks until a directory changes: inotify on Linux, polling elsewhere
+    or when inotify is unavailable
+    """
+
+    def __init__(self, directory, poll_interval=0.2):
+        self.poll_interval = poll_interval
+        self._fd = None
+        if sys.platform.startswith("linux"):
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+                fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+                if fd < 0:
+                    raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+                mask = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+                if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+                    os.close(fd)
+                    raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+                self._fd = fd
+            except (OSError, AttributeError) as e:
+                logger.debug(f"inotify unavailable, polling {directory}: {e}")
+
+    @property
+    def uses_inotify(self):
+        return self._fd is not None
+
+    def wait(self, timeout):
+        """Wait up to `timeout` seconds for a change (or one poll interval)"""
+        if self._fd is None:
+            time.sleep(min(timeout, self.poll_interval))
+            return
+        readable, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+        if readable:
+            try:
+                # Drain the queued events; the directory is rescanned anyway
+                while os.read(self._fd, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class DownloadManager:
+    """
+    Waits for browser downloads to complete and files them per candidate.
+
+    Take a token with begin() before clicking a download link, then wait()
+    returns as soon as a new, complete file is in the download folder:
+    partial files (.crdownload etc.) are skipped until the browser renames
+    them, and a file must keep the same size for `stable_seconds`. The file
+    is then renamed to `<candidate_id>_<n>.<ext>`; the rename is atomic, so
+    two processes sharing the folder never claim the same file. The name the
+    browser gave each filed download is kept in `original_names`.
+    """
+
+    def __init__(self, download_dir=DOWNLOAD_DIR, target_dir=None, timeout=60,
+                 stable_seconds=0.3):
+        """
+        Args:
+            download_dir: Folder the browser downloads to
+            target_dir: Folder for the renamed files (defaults to "resumes"
+                inside download_dir, where other processes' filed downloads
+                cannot be mistaken for new ones)
+            timeout: Default seconds to wait for a download
+            stable_seconds: How long a file's size must not change before it
+                counts as complete
+        """
+        self.download_dir = Path(download_dir)
+        self.target_dir = Path(target_dir) if target_dir else self.download_dir / "resumes"
+        self.timeout = timeout
+        self.stable_seconds = stable_seconds
+        # Filed path -> name the browser saved the file under
+        self.original_names = {}
+        self.download_dir.mkdir(parents=True, exist_ok=True)
+        self.target_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def _is_download(name):
+        return not name.startswith(".") and not name.endswith(IGNORED_SUFFIXES)
+
+    def _scan(self):
+        """Names of the complete and the partial files in the download folder"""
+        complete, partial = set(), set()
+        with os.scandir(self.download_dir) as entries:
+            for entry in entries:
+                if not entry.is_file() or not self._is_download(entry.name):
+                    continue
+                if entry.name.endswith(PARTIAL_SUFFIXES):
+                    partial.add(entry.name)
+                else:
+                    complete.add(entry.name)
+        return complete, partial
+
+    def begin(self):
+        """
+        Note the files already present; call right before starting a download
+
+        Returns:
+            frozenset: Token to pass to wait()
+        """
+        complete, _ = self._scan()
+        return frozenset(complete)
+
+    def wait(self, token, candidate_id, timeout=None):
+        """
+        Wait for the download started after begin() and file it
+
+        Args:
+            token: Result of begin()
+            candidate_id: Candidate the file belongs to
+            timeout: Seconds to wait (defaults to the manager's timeout)
+
+        Returns:
+            Path: The renamed file, or None if no download completed in time
+        """
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        watcher = _DirectoryWatcher(self.download_dir)
+        sizes = {}
+        try:
+            while True:
+                complete, partial = self._scan()
+                now = time.monotonic()
+                for name in sorted(complete - token):
+                    # Chrome renames the .crdownload when done; a file with a
+                    # partial twin is still being written
+                    if any(p.startswith(name) for p in partial):
+                        continue
+                    try:
+                        size = (self.download_dir / name).stat().st_size
+                    except FileNotFoundError:
+                        continue
+                    first_size, first_seen = sizes.setdefault(name, (size, now))
+                    if size != first_size or size == 0:
+                        sizes[name] = (size, now)
+                        continue
+                    if now - first_seen < self.stable_seconds:
+                        continue
+                    path = self._claim(name, candidate_id)
+                    if path is not None:
+                        logger.info(
+                            f"Download complete after {now - start:.1f}s: {path}")
+                        return path
+
+                if now >= deadline:
+                    break
+                wait_for = deadline - now
+                if sizes:
+                    wait_for = min(wait_for, self.stable_seconds)
+                watcher.wait(wait_for)
+        finally:
+            watcher.close()
+
+        _, partial = self._scan()
+        if partial:
+            logger.error(
+                f"Download for candidate {candidate_id} still incomplete after "
+                f"{timeout}s: {', '.join(sorted(partial))}")
+        else:
+            logger.error(f"No download for candidate {candidate_id} within {timeout}s")
+        return None
+
+    def _claim(self, name, candidate_id):
+        """
+        Rename a downloaded file to the next free `<candidate_id>_<n>.<ext>`
+
+        The file is first renamed to a hidden claim name, which only one
+        process can do; the claimed file is then moved to a target name that
+        does not exist yet, never overwriting another file.
+        """
+        source = self.download_dir / name
+        claimed = self.download_dir / f".{name}.{os.getpid()}.claim"
+        try:
+            os.rename(source, claimed)
+        except FileNotFoundError:
+            # Another process filed it first
+            return None
+
+        n = 1
+        while True:
+            target = self.target_dir / f"{candidate_id}_{n}{Path(name).suffix}"
+            try:
+                if os.name == "nt":
+                    # Fails instead of overwriting on Windows
+                    os.rename(claimed, target)
+                else:
+                    os.link(claimed, target)
+                    os.unlink(claimed)
+                self.original_names[target] = name
+                return target
+            except FileExistsError:
+                n += 1
@@ -0,0 +1,314 @@
+import hashlib
+import re
+import unicodedata
+from collections import defaultdict
+
+# Canonical education levels, matched as substrings of the scraped text
+EDUCATION_LEVELS = (
+    ("博士", "phd"),
+    ("硕士", "master"),
+    ("研究生", "master"),
+    ("本科", "bachelor"),
+    ("学士", "bachelor"),
+    ("大专", "associate"),
+    ("专科", "associate"),
+    ("高中", "high_school"),
+    ("中专", "high_school"),
+)
+
+# Platforms hide full names behind a surname and a title or mask
+_MASKED_NAME = re.compile(r"^(.{1,2}?)(先生|女士|小姐|同学|某+|\*+|＊+|x+|×+)$")
+
+# Genders told by a masked name's title, or given as a profile field
+_TITLE_GENDERS = {"先生": "male", "女士": "female", "小姐": "female"}
+_GENDERS = {"男": "male", "女": "female", "male": "male", "female": "female"}
+
+# Fields that identify a person on their own: a platform uid, a phone
+# number, or the hash of a resume they sent
+STRONG_FIELDS = ("uid", "phone", "resume_hash")
+
+# Scores of a candidate pair; a known attribute that disagrees vetoes the pair
+NAME_SCORE = 2
+MASKED_NAME_SCORE = 1
+ATTRIBUTE_SCORE = 1
+# Pairs at or above this score are the same person
+MATCH_SCORE = 3
+# A shared strong field makes a pair the same person by itself
+STRONG_SCORE = MATCH_SCORE
+# Agreeing attributes (age, education, location) a shared full name needs
+# to reach MATCH_SCORE without a strong field; common names recur
+MIN_AGREEING_ATTRIBUTES = 2
+# Pairs at or above this score are kept as possible duplicates
+POSSIBLE_SCORE = 2
+
+
+def normalize_profile(profile):
+    """
+    Normalize scraped candidate details for identity matching
+
+    Args:
+        profile: Dict that may hold "name" (or "candidate_name"), "age",
+            "gender", "education", "current_location" (or "location"),
+            "degree_duration" (years of work, e.g. "5年" or "应届生") and the
+            STRONG_FIELDS "uid", "phone" and "resume_hash"
+
+    Returns:
+        dict: Normalized profile with only the known fields among "name",
+            "surname", "masked", "gender", "age", "education", "location",
+            "work_years" and the STRONG_FIELDS
+    """
+    normalized = {}
+
+    name = profile.get("name") or profile.get("candidate_name")
+    if name:
+        name = re.sub(r"\s+", "", unicodedata.normalize("NFKC", name)).lower()
+    if name and name != "unknown":
+        match = _MASKED_NAME.match(name)
+        normalized["masked"] = bool(match)
+        normalized["surname"] = match.group(1) if match else name[0]
+        if not match:
+            normalized["name"] = name
+        elif match.group(2) in _TITLE_GENDERS:
+            normalized["gender"] = _TITLE_GENDERS[match.group(2)]
+
+    gender = _GENDERS.get(str(profile.get("gender") or "").strip().lower())
+    if gender:
+        normalized["gender"] = gender
+
+    age = re.search(r"\d+", str(profile.get("age") or ""))
+    if age and 15 < int(age.group()) < 80:
+        normalized["age"] = int(age.group())
+
+    education = profile.get("education") or ""
+    for keyword, level in EDUCATION_LEVELS:
+        if keyword in education:
+            normalized["education"] = level
+            break
+
+    location = profile.get("current_location") or profile.get("location")
+    if location:
+        location = unicodedata.normalize("NFKC", location).strip()
+        # "合肥市·蜀山区" and "合肥" are the same city
+        location = re.split(r"[·・\-\s/]", location)[0]
+        location = re.sub(r"(市|省)$", "", location)
+        if location:
+            normalized["location"] = location
+
+    duration = unicodedata.normalize("NFKC", profile.get("degree_duration") or "")
+    years = re.search(r"(\d+)\s*年", duration)
+    if years:
+        normalized["work_years"] = int(years.group(1))
+    elif re.search(r"应届|在校|无经验", duration):
+        normalized["work_years"] = 0
+
+    uid = str(profile.get("uid") or "").strip()
+    if uid:
+        normalized["uid"] = uid
+    phone = re.sub(r"\D", "", unicodedata.normalize("NFKC", str(profile.get("phone") or "")))
+    if len(phone) >= 7:
+        # Without the country code, e.g. "+86 138..." and "138..."
+        normalized["phone"] = phone[-11:]
+    if profile.get("resume_hash"):
+        normalized["resume_hash"] = profile["resume_hash"]
+
+    return normalized
+
+
+def profile_id(profile, source):
+    """
+    Stable candidate id derived from a normalized profile
+
+    The gender and uid only take part when known, so profiles without them
+    keep the ids they were given before these fields were read.
+
+    Args:
+        profile: Normalized profile
+        source: Platform or page the candidate was found on
+
+    Returns:
+        str: 16 character id
+    """
+    key = "\x1f".join(str(profile.get(field, "")) for field in
+                      ("name", "surname", "age", "education", "location"))
+    for field in ("gender", "uid"):
+        if field in profile:
+            key += f"\x1f{field}={profile[field]}"
+    return hashlib.md5(f"{source}\x1f{key}".encode("utf-8")).hexdigest()[:16]
+
+
+def blocking_keys(profile, query=False):
+    """
+    Keys of the blocks a profile belongs to
+
+    Only profiles sharing a block are compared, which keeps resolution
+    sub-quadratic. Ages drift by a year between runs, so a query also looks
+    in the neighbouring age blocks.
+
+    Args:
+        profile: Normalized profile
+        query: Return the keys to look up rather than the keys to insert
+
+    Returns:
+        list: Blocking keys
+    """
+    keys = [(field, profile[field]) for field in STRONG_FIELDS if field in profile]
+    if "name" in profile:
+        keys.append(("name", profile["name"]))
+
+    surname = profile.get("surname")
+    if surname and "age" in profile:
+        ages = (profile["age"] - 1, profile["age"], profile["age"] + 1) if query else (profile["age"],)
+        keys.extend(("surname_age", surname, age) for age in ages)
+    if surname and "education" in profile and "location" in profile:
+        keys.append(("surname_education_location", surname,
+                     profile["education"], profile["location"]))
+    return keys
+
+
+def match_score(a, b):
+    """
+    How strongly two normalized profiles look like the same person
+
+    Without a shared strong field, a full name only reaches MATCH_SCORE
+    with MIN_AGREEING_ATTRIBUTES agreeing attributes, and a masked name
+    ("张先生") never does; such pairs stay possible duplicates.
+
+    Returns:
+        int: Score, or -1 when a known attribute disagrees
+    """
+    if a.get("surname") != b.get("surname"):
+        return -1
+    # A resume hash may differ for the same person, a uid or phone may not
+    for field in ("gender", "uid", "phone"):
+        if field in a and field in b and a[field] != b[field]:
+            return -1
+
+    if "name" in a and "name" in b:
+        if a["name"] != b["name"]:
+            return -1
+        score = NAME_SCORE
+    else:
+        score = MASKED_NAME_SCORE
+
+    agreeing = 0
+    if "age" in a and "age" in b:
+        if abs(a["age"] - b["age"]) > 1:
+            return -1
+        agreeing += 1
+    for field in ("education", "location"):
+        if field in a and field in b:
+            if a[field] != b[field]:
+                return -1
+            agreeing += 1
+    score += agreeing * ATTRIBUTE_SCORE
+
+    if any(field in a and a.get(field) == b.get(field) for field in STRONG_FIELDS):
+        score += STRONG_SCORE
+    elif "name" not in a or "name" not in b or agreeing < MIN_AGREEING_ATTRIBUTES:
+        score = min(score, MATCH_SCORE - 1)
+    return score
+
+
+class IdentityIndex:
+    """
+    Blocking index over candidate profiles.
+
+    Profiles are grouped into blocks by blocking_keys(); resolving a profile
+    only scores it against the candidates sharing one of its blocks. Pairs
+    scoring POSSIBLE_SCORE or more are remembered in a pair index, so likely
+    duplicates that fall short of MATCH_SCORE can be reviewed.
+    """
+
+    def __init__(self):
+        self._profiles = {}
+        self._blocks = defaultdict(set)
+        self._pairs = {}
+
+    def __len__(self):
+        return len(self._profiles)
+
+    def __contains__(self, candidate_id):
+        return candidate_id in self._profiles
+
+    def __iter__(self):
+        return iter(self._profiles)
+
+    def get(self, candidate_id):
+        """A candidate's indexed profile, or None"""
+        return self._profiles.get(candidate_id)
+
+    def add(self, candidate_id, profile):
+        """Index a candidate's normalized profile, replacing the previous one"""
+        self.remove(candidate_id)
+        if not profile.get("surname"):
+            return
+        self._profiles[candidate_id] = profile
+        for key in blocking_keys(profile):
+            self._blocks[key].add(candidate_id)
+
+    def remove(self, candidate_id):
+        """Drop a candidate from the blocks and the pair index"""
+        profile = self._profiles.pop(candidate_id, None)
+        if profile is None:
+            return
+        for key in blocking_keys(profile):
+            block = self._blocks.get(key)
+            if block is not None:
+                block.discard(candidate_id)
+                if not block:
+                    del self._blocks[key]
+        for pair in [pair for pair in self._pairs if candidate_id in pair]:
+            del self._pairs[pair]
+
+    def candidates_for(self, profile, exclude=None):
+        """
+        Indexed candidates that may be the same person as a profile
+
+        Args:
+            profile: Normalized profile
+            exclude: Candidate id to leave out (the profile's own)
+
+        Returns:
+            list: (candidate_id, score) tuples scoring POSSIBLE_SCORE or more,
+                best first
+        """
+        seen = set()
+        scored = []
+        for key in blocking_keys(profile, query=True):
+            for candidate_id in self._blocks.get(key, ()):
+                if candidate_id in seen or candidate_id == exclude:
+                    continue
+                seen.add(candidate_id)
+                score = match_score(profile, self._profiles[candidate_id])
+                if score >= POSSIBLE_SCORE:
+                    scored.append((candidate_id, score))
+        scored.sort(key=lambda item: -item[1])
+        return scored
+
+    def resolve(self, profile, exclude=None):
+        """
+        The indexed candidate a profile belongs to, if any
+
+        Pairs scoring between POSSIBLE_SCORE and MATCH_SCORE are recorded as
+        possible duplicates of `exclude` when it is given.
+
+        Returns:
+            str: Candidate id, or None
+        """
+        matches = self.candidates_for(profile, exclude)
+        if exclude is not None:
+            for candidate_id, score in matches:
+                self._pairs[tuple(sorted((exclude, candidate_id)))] = score
+        if matches and matches[0][1] >= MATCH_SCORE:
+            return matches[0][0]
+        return None
+
+    def possible_duplicates(self):
+        """
+        Candidate pairs that look alike but were not merged
+
+        Returns:
+            list: ((candidate_id, candidate_id), score) tuples, best first
+        """
+        return sorted(((pair, score) for pair, score in self._pairs.items()
+                       if score < MATCH_SCORE), key=lambda item: -item[1])
@@ -0,0 +1,148 @@
+from collections import defaultdict
+from collections.abc import Sequence
+from itertools import chain
+
+
+class CandidateMessages(Sequence):
+    """Read-only view of one candidate's messages inside a MessageStore"""
+
+    def __init__(self, store, positions):
+        self._store = store
+        self._positions = positions
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._store._messages[p] for p in self._positions[index]]
+        return self._store._messages[self._positions[index]]
+
+
+class MessageStore:
+    """
+    Single store for every recorded message.
+
+    MessageRecords are kept once, in recording order, and keyed by candidate
+    id plus a per-candidate sequence number (seq). Per-candidate histories
+    are views over this store rather than copies.
+    """
+
+    def __init__(self, messages=()):
+        self._messages = []
+        self._by_candidate = defaultdict(list)
+        for message in messages:
+            self.append(message)
+
+    def __len__(self):
+        return len(self._messages)
+
+    def __iter__(self):
+        return iter(self._messages)
+
+    def append(self, message):
+        """
+        Add a message, assigning its per-candidate sequence number if missing
+
+        Returns:
+            MessageRecord: The stored message
+        """
+        positions = self._by_candidate[message.candidate_id]
+        if message.seq is None:
+            message.seq = len(positions)
+        positions.append(len(self._messages))
+        self._messages.append(message)
+        return message
+
+    def for_candidate(self, candidate_id):
+        """Messages of one candidate, oldest first"""
+        return CandidateMessages(self, self._by_candidate.get(candidate_id, []))
+
+    def count(self, candidate_id):
+        """Number of messages recorded for a candidate"""
+        return len(self._by_candidate.get(candidate_id, ()))
+
+    def tail(self, count):
+        """The most recent messages across all candidates, oldest first"""
+        return self._messages[-count:] if count > 0 else []
+
+    def slice_from(self, length):
+        """Messages recorded after the store held `length` messages"""
+        return self._messages[length:]
+
+    def truncate(self, length):
+        """Drop every message recorded after the store held `length` messages"""
+        while len(self._messages) > length:
+            message = self._messages.pop()
+            positions = self._by_candidate[message.candidate_id]
+            positions.pop()
+            if not positions:
+                del self._by_candidate[message.candidate_id]
+
+
+class LazyMessageStore(MessageStore):
+    """
+    MessageStore over a storage backend that only keeps in memory the
+    messages recorded in this session plus the histories of candidates that
+    have been accessed. Persisted messages are read on demand up to the
+    watermark taken at open, so they are never double counted once this
+    session's messages are saved too.
+    """
+
+    def __init__(self, storage, record_factory):
+        super().__init__()
+        self._storage = storage
+        self._record_factory = record_factory
+        self._watermark = storage.message_watermark()
+        self._base_count = storage.count_messages(self._watermark)
+        self._persisted = {}
+
+    def _persisted_for(self, candidate_id):
+        messages = self._persisted.get(candidate_id)
+        if messages is None:
+            messages = [self._record_factory(data) for data in
+                        self._storage.load_messages(candidate_id, self._watermark)]
+            for seq, message in enumerate(messages):
+                if message.seq is None:
+                    message.seq = seq
+            self._persisted[candidate_id] = messages
+        return messages
+
+    def __len__(self):
+        return self._base_count + len(self._messages)
+
+    def __iter__(self):
+        persisted = (self._record_factory(data)
+                     for data in self._storage.iter_messages(self._watermark))
+        return chain(persisted, self._messages)
+
+    def append(self, message):
+        if message.seq is None:
+            message.seq = self.count(message.candidate_id)
+        self._by_candidate[message.candidate_id].append(len(self._messages))
+        self._messages.append(message)
+        return message
+
+    def for_candidate(self, candidate_id):
+        session = super().for_candidate(candidate_id)
+        return self._persisted_for(candidate_id) + list(session)
+
+    def count(self, candidate_id):
+        return len(self._persisted_for(candidate_id)) + super().count(candidate_id)
+
+    def tail(self, count):
+        if count <= 0:
+            return []
+        session = self._messages[-count:]
+        missing = count - len(session)
+        if missing <= 0:
+            return session
+        older = [self._record_factory(data) for data in
+                 self._storage.tail_messages(missing, self._watermark)]
+        return older + session
+
+    def slice_from(self, length):
+        return super().slice_from(max(0, length - self._base_count))
+
+    def truncate(self, length):
+        super().truncate(max(0, length - self._base_count))
@@ -0,0 +1,428 @@
+import json
+import mimetypes
+import re
+import sys
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+from utils.logger import logger
+from scraper_agents.boss_hr.page_scripts import CURSOR_LENGTH
+
+# JSON endpoints of the site, matched against the URL path so a local
+# stand-in server serving recorded responses is captured the same way
+ENDPOINTS = {
+    "chat_list": re.compile(r"/wapi/zprelation/friend/\w*[Ff]riendList\w*\.json"),
+    "messages": re.compile(r"/wapi/zpchat/\w+/historyMsg"),
+    "search": re.compile(r"/wapi/zpitem/web/boss/search/geeks\.json|/wapi/zpjob/rec/geek/list"),
+}
+
+
+def _text(value):
+    """Strip a scraped string; anything else that is empty becomes None"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def parse_chat_list(payload, url=None):
+    """
+    Chat list items from a chat-list response, shaped like snapshot_inbox()
+
+    Args:
+        payload: Decoded JSON response
+        url: Request URL (unused)
+
+    Returns:
+        list: Item dicts with "position", "name", "preview", "time",
+            "unread" and "element_id"
+    """
+    data = payload.get("zpData") or {}
+    friends = data.get("friendList") or data.get("result") or []
+    return [{
+        "position": position,
+        "name": _text(friend.get("name")),
+        "preview": _text(friend.get("lastMsg") or friend.get("lastText")),
+        "time": _text(friend.get("lastTime") or friend.get("updateTime")),
+        "unread": int(friend.get("unreadMsgCount") or friend.get("unreadCount") or 0),
+        "element_id": str(friend.get("uid") or friend.get("encryptUid") or friend.get("friendId") or ""),
+    } for position, friend in enumerate(friends)]
+
+
+def parse_messages(payload, url=None):
+    """
+    Chat messages from a message-history response, shaped like the
+    messages of snapshot_chat()
+
+    Messages from the uid the history was requested for ("gid" in the URL)
+    are the candidate's; the rest were sent by us.
+
+    Args:
+        payload: Decoded JSON response
+        url: Request URL
+
+    Returns:
+        list: Message dicts in chat order with "position", "sender", "text",
+            "has_attachment", "attachment_name", "attachment_url", "status"
+            and "key"
+    """
+    params = parse_qs(urlparse(url).query) if url else {}
+    friend_uid = (params.get("gid") or params.get("uid") or [None])[0]
+    data = payload.get("zpData") or {}
+    raw_messages = sorted(data.get("messages") or [],
+                          key=lambda m: (m.get("time") or 0, m.get("mid") or 0))
+
+    messages = []
+    for raw in raw_messages:
+        body = raw.get("body") or {}
+        sender_uid = str((raw.get("from") or {}).get("uid") or "")
+        if friend_uid is not None:
+            sender = "candidate" if sender_uid == str(friend_uid) else "self"
+        else:
+            sender = "candidate" if raw.get("received") else "self"
+        attachment = body.get("resume") or body.get("file") or body.get("attachment")
+        attachment_name = attachment_url = None
+        if isinstance(attachment, dict):
+            attachment_name = _text(attachment.get("name") or attachment.get("fileName"))
+            attachment_url = _text(attachment.get("downloadUrl") or attachment.get("url")
+                                   or attachment.get("fileUrl"))
+        text = _text(body.get("text") or raw.get("pushText")) or ""
+        if not text and not attachment:
+            continue
+        status = None
+        if sender == "self" and (raw.get("read") or raw.get("status") == 2):
+            status = "已读"
+        message = {
+            "position": len(messages),
+            "sender": sender,
+            "text": text,
+            "has_attachment": bool(attachment),
+            "attachment_name": attachment_name,
+            "attachment_url": attachment_url,
+            "status": status,
+        }
+        message["key"] = "\x1f".join((sender, text, attachment_name or ""))
+        messages.append(message)
+    return messages
+
+
+def parse_search(payload, url=None):
+    """
+    Search result cards from a search response, shaped like extract_search_cards()
+
+    Args:
+        payload: Decoded JSON response
+        url: Request URL (unused)
+
+    Returns:
+        list: Card dicts with "candidate_name", "education",
+            "current_location", "age" and "degree_duration"
+    """
+    data = payload.get("zpData") or {}
+    cards = []
+    for geek in data.get("geekList") or data.get("list") or []:
+        card = geek.get("geekCard") or geek
+        cards.append({
+            "candidate_name": _text(card.get("geekName") or card.get("name")),
+            "education": _text(card.get("geekDegree") or card.get("degreeName")),
+            "current_location": _text(card.get("expectLocationName") or card.get("cityName")),
+            "age": _text(card.get("ageDesc") or card.get("age")),
+            "degree_duration": _text(card.get("geekWorkYear") or card.get("workYearDesc")),
+        })
+    return cards
+
+
+PARSERS = {
+    "chat_list": parse_chat_list,
+    "messages": parse_messages,
+    "search": parse_search,
+}
+
+
+def align_chat_list(captured, items):
+    """
+    Lay captured chat list items over the rows of snapshot_inbox()
+
+    The response's uids are not the ids of the list's elements, so the
+    position and element_id always come from the page; the capture is only
+    used when every row holds the same name, so each row keeps the candidate
+    id it gets from the DOM.
+
+    Args:
+        captured: Items from parse_chat_list()
+        items: Items from snapshot_inbox()
+
+    Returns:
+        list: Captured items with the rows' position and element_id, or
+            None if the capture does not line up with the page
+    """
+    if len(captured) != len(items):
+        return None
+    aligned = []
+    for entry, item in zip(captured, items):
+        if (entry["name"] or "").strip() != (item["name"] or "").strip():
+            return None
+        aligned.append({**entry, "position": item["position"], "element_id": item["element_id"]})
+    return aligned
+
+
+def messages_after(messages, anchor):
+    """
+    Apply a chat cursor to captured messages the way the transcript
+    snapshot script does
+
+    Args:
+        messages: Messages from parse_messages()
+        anchor: Message keys of a chat cursor, or None
+
+    Returns:
+        dict: "messages", "anchor_found" and "tail", like snapshot_chat()
+    """
+    tail = [message["key"] for message in messages[-CURSOR_LENGTH:]]
+    if anchor:
+        keys = [message["key"] for message in messages]
+        for end in range(len(keys), len(anchor) - 1, -1):
+            if keys[end - len(anchor):end] == list(anchor):
+                return {"messages": messages[end:], "anchor_found": True, "tail": tail}
+    return {"messages": messages, "anchor_found": False, "tail": tail}
+
+
+class NetworkCapture:
+    """
+    Structured data read from the site's own JSON responses over CDP.
+
+    Network.responseReceived events for the ENDPOINTS are noted as they
+    arrive, either from a CDP listener (SeleniumBase with uc_cdp_events) or
+    from Chrome's performance log. Once Network.loadingFinished is seen,
+    poll() reads the body with Network.getResponseBody and parses it into
+    the records the DOM extractors return. Callers take() the latest
+    capture of a kind and fall back to DOM extraction when there is none.
+    File URLs of the attachments in captured messages are kept by name for
+    attachment_url().
+    """
+
+    def __init__(self, driver, endpoints=None, record_dir=None):
+        """
+        Args:
+            driver: Selenium or SeleniumBase driver of a Chromium browser
+            endpoints: {kind: compiled URL path pattern}; defaults to ENDPOINTS
+            record_dir: Directory to save captured response bodies in, for
+                replaying them with serve_recorded()
+        """
+        self.driver = driver
+        self.endpoints = endpoints or ENDPOINTS
+        self.record_dir = Path(record_dir) if record_dir else None
+        self.enabled = False
+        self._uses_listener = False
+        self._requests = {}
+        self._finished = deque()
+        self._captured = {}
+        self._attachment_urls = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Enable the Network domain and subscribe to response events
+
+        Returns:
+            bool: True if capturing, False if the driver has no CDP access
+        """
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+        except Exception as e:
+            logger.warning(f"Network capture unavailable, using DOM extraction: {e}")
+            return False
+
+        if hasattr(self.driver, "add_cdp_listener"):
+            try:
+                self.driver.add_cdp_listener("Network.responseReceived", self._on_event)
+                self.driver.add_cdp_listener("Network.loadingFinished", self._on_event)
+                self._uses_listener = True
+            except Exception as e:
+                logger.debug(f"CDP listener unavailable, reading the performance log: {e}")
+
+        self.enabled = True
+        logger.info(
+            f"Network capture started ({'CDP events' if self._uses_listener else 'performance log'})")
+        return True
+
+    def _kind_of(self, url):
+        path = urlparse(url).path
+        for kind, pattern in self.endpoints.items():
+            if pattern.search(path):
+                return kind
+        return None
+
+    def _on_event(self, message):
+        """Note a matching response, or its load finishing; may run on a CDP thread"""
+        method = message.get("method")
+        params = message.get("params") or {}
+        request_id = params.get("requestId")
+        with self._lock:
+            if method == "Network.responseReceived":
+                url = (params.get("response") or {}).get("url", "")
+                kind = self._kind_of(url)
+                if kind is not None:
+                    self._requests[request_id] = (kind, url)
+            elif method == "Network.loadingFinished" and request_id in self._requests:
+                self._finished.append((request_id, *self._requests.pop(request_id)))
+
+    def _read_performance_log(self):
+        try:
+            entries = self.driver.get_log("performance")
+        except Exception as e:
+            logger.debug(f"Could not read performance log: {e}")
+            return
+        for entry in entries:
+            try:
+                self._on_event(json.loads(entry["message"])["message"])
+            except (KeyError, ValueError):
+                continue
+
+    def poll(self):
+        """
+        Read and parse the bodies of the matching responses that finished
+        loading since the last poll
+
+        Returns:
+            int: Number of responses parsed
+        """
+        if not self.enabled:
+            return 0
+        if not self._uses_listener:
+            self._read_performance_log()
+
+        parsed = 0
+        while True:
+            with self._lock:
+                if not self._finished:
+                    break
+                request_id, kind, url = self._finished.popleft()
+            try:
+                body = self.driver.execute_cdp_cmd(
+                    "Network.getResponseBody", {"requestId": request_id})
+                payload = json.loads(body.get("body") or "null")
+                records = PARSERS[kind](payload or {}, url)
+            except Exception as e:
+                logger.debug(f"Could not parse captured {kind} response {url}: {e}")
+                continue
+
+            if self.record_dir is not None:
+                self._record(kind, url, body.get("body"))
+            with self._lock:
+                self._captured[kind] = (url, records)
+                if kind == "messages":
+                    self._attachment_urls.update(
+                        (record["attachment_name"], record["attachment_url"]) for record in records
+                        if record["attachment_name"] and record["attachment_url"])
+            parsed += 1
+            logger.debug(f"Captured {len(records)} {kind} records from {url}")
+        return parsed
+
+    def _record(self, kind, url, body):
+        self.record_dir.mkdir(parents=True, exist_ok=True)
+        name = urlparse(url).path.strip("/").replace("/", "_") or kind
+        (self.record_dir / f"{name}.json").write_text(body or "", encoding="utf-8")
+
+    def take(self, kind):
+        """
+        The records of the latest captured response of a kind, consumed
+
+        Args:
+            kind: "chat_list", "messages" or "search"
+
+        Returns:
+            tuple: (url, records), or None if nothing was captured
+        """
+        self.poll()
+        with self._lock:
+            return self._captured.pop(kind, None)
+
+    def attachment_url(self, card_text):
+        """
+        File URL of a captured attachment whose name appears on a card
+
+        Args:
+            card_text: Text of the attachment card in the chat
+
+        Returns:
+            str: The URL, or None if no captured attachment matches
+        """
+        self.poll()
+        with self._lock:
+            for name, url in self._attachment_urls.items():
+                if name in card_text:
+                    return url
+        return None
+
+    def clear(self, kind=None):
+        """Drop captured records (of one kind) so a later take() only sees new ones"""
+        self.poll()
+        with self._lock:
+            if kind is None:
+                self._captured.clear()
+            else:
+                self._captured.pop(kind, None)
+
+
+def serve_recorded(record_dir, port=8765):
+    """
+    Serve recorded response bodies over HTTP as a local stand-in for the site
+
+    A request is answered with `<record_dir>/<path with / as _>.json`, the
+    name NetworkCapture records bodies under, so pages and captures can be
+    exercised without the real site. Other files are served under their
+    name without the .json suffix, e.g. resume attachments for the
+    ResumeFetcher.
+
+    Args:
+        record_dir: Directory of recorded responses
+        port: Port to listen on (0 picks a free one)
+
+    Returns:
+        ThreadingHTTPServer: The running server; call shutdown() to stop it
+    """
+    record_dir = Path(record_dir)
+
+    class RecordedHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            name = urlparse(self.path).path.strip("/").replace("/", "_")
+            path = record_dir / f"{name}.json"
+            content_type = "application/json; charset=utf-8"
+            if not path.is_file():
+                path = record_dir / name
+                content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            if not name or not path.is_file():
+                self.send_error(404)
+                return
+            body = path.read_bytes()
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_POST = do_GET
+
+        def log_message(self, format, *args):
+            logger.debug(f"Recorded response server: {format % args}")
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), RecordedHandler)
+    threading.Thread(target=server.serve_forever, name="recorded-responses", daemon=True).start()
+    logger.info(f"Serving recorded responses from {record_dir} on port {server.server_address[1]}")
+    return server
+
+
+if __name__ == "__main__":
+    # Usage: python -m scraper_agents.boss_hr.network_capture serve <record_dir> [port]
+    if len(sys.argv) < 3 or sys.argv[1] != "serve":
+        print("Usage: python -m scraper_agents.boss_hr.network_capture serve <record_dir> [port]")
+        sys.exit(1)
+
+    server = serve_recorded(sys.argv[2], *(int(port) for port in sys.argv[3:4]))
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,328 @@
+import time
+from utils.logger import logger
+
+# Bump when the selectors below change, so logs and saved data show which
+# page layout they were extracted with
+SELECTOR_VERSION = 1
+
+# Search results list, one `li` card per candidate
+SEARCH_RESULTS_XPATH = '//*[@id="is-gray-batch-chat"]/div[1]'
+
+# Card fields, as XPaths relative to a result card
+SEARCH_CARD_SELECTORS = {
+    "candidate_name": './/div[2]/div/div[2]/div/div[1]/div[1]/span[1]',
+    "education": './/div[2]/div/div[2]/div/div[1]/div[2]/span[3]',
+    "current_location": './/div[2]/div/div[2]/div/div[2]/ul[1]/li/span[2]',
+    "age": './/div[2]/div/div[2]/div/div[1]/div[2]/span[1]',
+    "degree_duration": './/div[2]/div/div[2]/div/div[1]/div[2]/span[2]',
+}
+
+# Reads every card of the results list in one round trip. Returns null when
+# the list is missing, otherwise one object per card with null for the
+# fields the card does not have.
+EXTRACT_SEARCH_CARDS_JS = """
+const [containerXPath, selectors] = arguments;
+const first = (xpath, context) => document.evaluate(
+    xpath, context, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+const container = first(containerXPath, document);
+if (!container) {
+    return null;
+}
+return Array.from(container.children)
+    .filter(card => card.tagName === 'LI')
+    .map(card => {
+        const data = {};
+        for (const [field, xpath] of Object.entries(selectors)) {
+            const node = first(xpath, card);
+            data[field] = node ? (node.innerText || node.textContent || '').trim() : null;
+        }
+        return data;
+    });
+"""
+
+
+def extract_search_cards(driver, container_xpath=SEARCH_RESULTS_XPATH,
+                         selectors=SEARCH_CARD_SELECTORS):
+    """
+    Extract every search result card with a single execute_script call
+
+    Args:
+        driver: Selenium WebDriver instance
+        container_xpath: XPath of the results list
+        selectors: {field: XPath relative to a card}
+
+    Returns:
+        list: One dict per card with every field of `selectors` (None when
+            the card lacks it), or None if the results list is not on the page
+    """
+    start = time.perf_counter()
+    cards = driver.execute_script(EXTRACT_SEARCH_CARDS_JS, container_xpath, selectors)
+    if cards is None:
+        logger.warning(f"Search results list not found (selectors v{SELECTOR_VERSION})")
+        return None
+
+    logger.debug(
+        f"Extracted {len(cards)} search result cards in "
+        f"{(time.perf_counter() - start) * 1000:.1f}ms (selectors v{SELECTOR_VERSION})")
+    return cards
+
+
+# Open chat window and its messages, as CSS selectors
+CHAT_SELECTORS = {
+    "container_xpath": "//*[@id='container']/div[1]/div/div[2]/div[2]/div[2]/div[1]/div[1]/div[2]/div[2]",
+    "candidate_message": "div[class*='item-friend']",
+    "hr_message": "div[class*='item-myself']",
+    # Candidate messages: the text block and any attachment card title
+    "candidate_text": "div[class='text']",
+    "attachment": "h3[class*='message-card-top-title'], div[class*='message-card-top-content']",
+    # HR messages: the text block, its delivery status and the message span
+    "hr_text": "div[class*='text']",
+    "hr_status": "i[class*='status']",
+    "hr_span": ":scope > span",
+}
+
+# Messages of the chat cursor: the last few message keys seen in a chat.
+CURSOR_LENGTH = 3
+
+# Reads the messages of the open chat in DOM order in one round trip.
+# Messages without a text block are skipped like the per-element lookups
+# did. Each message gets a key (sender, text and attachment name); given the
+# keys of a cursor, only the messages after the last place that sequence
+# appears are returned.
+SNAPSHOT_CHAT_JS = """
+const [selectors, anchor] = arguments;
+const text = node => node ? (node.innerText || node.textContent || '').trim() : '';
+const items = document.querySelectorAll(
+    selectors.candidate_message + ', ' + selectors.hr_message);
+const messages = [];
+items.forEach((item, position) => {
+    let message;
+    if (item.matches(selectors.candidate_message)) {
+        const body = item.querySelector(selectors.candidate_text);
+        if (!body) {
+            return;
+        }
+        const attachment = item.querySelector(selectors.attachment);
+        message = {
+            position: position,
+            sender: 'candidate',
+            text: text(body),
+            has_attachment: attachment !== null,
+            attachment_name: attachment ? text(attachment) : null,
+            status: null
+        };
+    } else {
+        const body = item.querySelector(selectors.hr_text);
+        const span = body ? body.querySelector(selectors.hr_span) : null;
+        if (!span) {
+            return;
+        }
+        const status = body.querySelector(selectors.hr_status);
+        message = {
+            position: position,
+            sender: 'self',
+            text: text(span),
+            has_attachment: false,
+            attachment_name: null,
+            status: status ? text(status) : null
+        };
+    }
+    if (!message.text && !message.has_attachment) {
+        return;
+    }
+    message.key = [message.sender, message.text, message.attachment_name || ''].join('\\u001f');
+    messages.push(message);
+});
+
+const tail = messages.slice(-selectors.cursor_length).map(message => message.key);
+if (!anchor || !anchor.length) {
+    return {messages: messages, anchor_found: false, tail: tail};
+}
+for (let end = messages.length; end >= anchor.length; end--) {
+    if (anchor.every((key, i) => messages[end - anchor.length + i].key === key)) {
+        return {messages: messages.slice(end), anchor_found: true, tail: tail};
+    }
+}
+return {messages: messages, anchor_found: false, tail: tail};
+"""
+
+# Scrolls the message list of the open chat to the top, which makes the
+# page load older history; returns the number of messages rendered
+SCROLL_CHAT_TOP_JS = """
+const selectors = arguments[0];
+const items = document.querySelectorAll(
+    selectors.candidate_message + ', ' + selectors.hr_message);
+let list = items.length ? items[0].parentElement : null;
+while (list && list.scrollHeight <= list.clientHeight) {
+    list = list.parentElement;
+}
+if (list) {
+    list.scrollTop = 0;
+}
+return items.length;
+"""
+
+
+def snapshot_chat(driver, anchor=None, selectors=CHAT_SELECTORS):
+    """
+    Read the messages of the open chat with a single execute_script call
+
+    Args:
+        driver: Selenium WebDriver instance
+        anchor: Message keys of a chat cursor; only the messages after them
+            are returned when they are found
+        selectors: Chat selector map
+
+    Returns:
+        dict: "messages" (message dicts in DOM order with "position",
+            "sender" ("candidate" or "self"), "text", "has_attachment",
+            "attachment_name", "status" (HR delivery status, e.g. "已读") and
+            "key"), "anchor_found" and "tail" (keys of the last messages)
+    """
+    start = time.perf_counter()
+    snapshot = driver.execute_script(
+        SNAPSHOT_CHAT_JS, {**selectors, "cursor_length": CURSOR_LENGTH}, anchor or [])
+    logger.debug(
+        f"Snapshot of {len(snapshot['messages'])} chat messages in "
+        f"{(time.perf_counter() - start) * 1000:.1f}ms (selectors v{SELECTOR_VERSION})")
+    return snapshot
+
+
+def load_older_chat_history(driver, selectors=CHAT_SELECTORS):
+    """
+    Scroll the open chat to the top so the page loads older messages
+
+    Returns:
+        int: Number of messages rendered before scrolling
+    """
+    return driver.execute_script(SCROLL_CHAT_TOP_JS, selectors)
+
+
+# Chat list, as CSS selectors relative to a list item
+INBOX_SELECTORS = {
+    "list_xpath": '//*[@id="container"]/div[1]/div/div[2]/div[2]/div[1]/div[2]/div/div[2]/div[1]',
+    "name": "h4, div[class*='name'], span[class*='name']",
+    "preview": "p, div[class*='preview'], span[class*='content']",
+    "time": "span[class*='time'], div[class*='time']",
+    "unread": "span[class*='badge'], span[class*='unread'], span[class*='count'], i[class*='notice']",
+    # Attributes that identify the conversation, first non-empty wins
+    "id_attributes": ["data-id", "data-uid", "data-geek-id", "id"],
+    # Avatar image, whose URL tells same-name chats apart when the item has
+    # none of the id attributes
+    "avatar": "img",
+}
+
+# Reads every item of the chat list in one round trip. Items are the nodes
+# an XPath matches under the list element, so positions line up with
+# find_elements() on the same XPath.
+EXTRACT_INBOX_JS = """
+const [list, itemXPath, selectors] = arguments;
+const text = node => node ? (node.innerText || node.textContent || '').trim() : null;
+const found = document.evaluate(
+    itemXPath, list, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+const items = [];
+for (let position = 0; position < found.snapshotLength; position++) {
+    const item = found.snapshotItem(position);
+    const badge = item.querySelector(selectors.unread);
+    const count = badge ? parseInt(text(badge), 10) : 0;
+    let elementId = '';
+    for (const attribute of selectors.id_attributes) {
+        elementId = item.getAttribute(attribute) || '';
+        if (elementId) {
+            break;
+        }
+    }
+    if (!elementId) {
+        const avatar = item.querySelector(selectors.avatar);
+        const src = avatar ? avatar.getAttribute('src') : null;
+        elementId = src ? 'avatar:' + src : '';
+    }
+    items.push({
+        position: position,
+        name: text(item.querySelector(selectors.name)),
+        preview: text(item.querySelector(selectors.preview)),
+        time: text(item.querySelector(selectors.time)),
+        unread: badge ? (isNaN(count) ? 1 : count) : 0,
+        element_id: elementId
+    });
+}
+return items;
+"""
+
+
+def snapshot_inbox(driver, list_element, item_xpath="./div", selectors=INBOX_SELECTORS):
+    """
+    Read every chat list item with a single execute_script call
+
+    Args:
+        driver: Selenium WebDriver instance
+        list_element: WebElement of the chat list
+        item_xpath: XPath of the items relative to the list
+        selectors: Chat list selector map
+
+    Returns:
+        list: Item dicts in list order with "position", "name", "preview",
+            "time", "unread" (badge count, 0 when read) and "element_id"
+            (an id attribute, else "avatar:" and the avatar URL)
+    """
+    start = time.perf_counter()
+    items = driver.execute_script(EXTRACT_INBOX_JS, list_element, item_xpath, selectors)
+    logger.debug(
+        f"Snapshot of {len(items)} chat list items in "
+        f"{(time.perf_counter() - start) * 1000:.1f}ms (selectors v{SELECTOR_VERSION})")
+    return items
+
+
+# Attachment card around a resume preview button, and where its file URL
+# may be: a link inside the card, or one of the URL attributes on the card
+# or any node in it
+ATTACHMENT_SELECTORS = {
+    "card": "[class*='message-card']",
+    "link": "a[href*='download'], a[href*='attachment'], a[href*='.pdf'], a[download]",
+    "url_attributes": ["data-url", "data-href", "data-download-url", "data-src"],
+}
+
+# Text and file URL (null when the card has none) of the attachment card
+# of each preview button
+ATTACHMENT_CARDS_JS = """
+const [buttons, selectors] = arguments;
+const urlOf = card => {
+    const link = card.querySelector(selectors.link);
+    if (link) {
+        return link.href;
+    }
+    for (const node of [card, ...card.querySelectorAll('*')]) {
+        for (const attribute of selectors.url_attributes) {
+            const value = node.getAttribute(attribute);
+            if (value) {
+                return new URL(value, document.baseURI).href;
+            }
+        }
+    }
+    return null;
+};
+return buttons.map(button => {
+    const card = button.closest(selectors.card) || button.parentElement;
+    if (!card) {
+        return {text: '', url: null};
+    }
+    return {text: (card.innerText || card.textContent || '').trim(), url: urlOf(card)};
+});
+"""
+
+
+def attachment_cards(driver, buttons, selectors=ATTACHMENT_SELECTORS):
+    """
+    Text and file URL of the attachment card of each resume preview button,
+    in one call
+
+    Args:
+        driver: Selenium WebDriver instance
+        buttons: Preview button WebElements
+        selectors: Card selector, link selector and URL attributes
+
+    Returns:
+        list: Dicts with "text" and "url" (None when the card has no URL),
+            one per button
+    """
+    return driver.execute_script(ATTACHMENT_CARDS_JS, buttons, selectors)
@@ -0,0 +1,114 @@
+from utils.logger import logger
+from config import READY_QUIET_MS, READY_TIMEOUT
+
+# WebDriver's script timeout in seconds, assumed when the driver cannot
+# report its current one
+DEFAULT_SCRIPT_TIMEOUT = 30
+
+# Resolves once one of the XPaths matches and the matched node has not
+# changed for quietMs, or once none matches when waiting for absence. A
+# MutationObserver on the document notices the node appearing (or being
+# replaced); a second one on the node itself restarts the quiet period on
+# every change inside it.
+WAIT_FOR_STABLE_JS = """
+const [xpaths, quietMs, timeoutMs, absent] = arguments;
+const done = arguments[arguments.length - 1];
+const start = performance.now();
+const find = () => {
+    for (const xpath of xpaths) {
+        const node = document.evaluate(
+            xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        if (node) {
+            return node;
+        }
+    }
+    return null;
+};
+
+let watched = null;
+let quietTimer = null;
+let finished = false;
+const nodeObserver = new MutationObserver(() => restartQuiet());
+const documentObserver = new MutationObserver(() => check());
+const finish = ready => {
+    if (finished) {
+        return;
+    }
+    finished = true;
+    documentObserver.disconnect();
+    nodeObserver.disconnect();
+    clearTimeout(quietTimer);
+    clearTimeout(deadline);
+    done({ready: ready, elapsed: performance.now() - start});
+};
+const restartQuiet = () => {
+    clearTimeout(quietTimer);
+    quietTimer = setTimeout(() => finish(true), quietMs);
+};
+const check = () => {
+    const node = find();
+    if (absent) {
+        if (!node) {
+            finish(true);
+        }
+        return;
+    }
+    if (node && node !== watched) {
+        watched = node;
+        nodeObserver.disconnect();
+        nodeObserver.observe(node, {
+            childList: true, subtree: true, attributes: true, characterData: true});
+        restartQuiet();
+    }
+};
+
+const deadline = setTimeout(() => finish(false), timeoutMs);
+documentObserver.observe(document.documentElement, {childList: true, subtree: true});
+check();
+"""
+
+
+def wait_until_ready(driver, xpaths, timeout=READY_TIMEOUT, quiet_ms=READY_QUIET_MS,
+                     absent=False):
+    """
+    Wait until a part of the page has rendered and stopped changing
+
+    Returns as soon as the page is ready rather than after a fixed sleep;
+    add human pacing separately with random_sleep.pace(). The driver's
+    script timeout is raised for the wait and restored afterwards.
+
+    Args:
+        driver: Selenium WebDriver instance
+        xpaths: XPath or list of XPaths; the first one that matches is watched
+        timeout: Maximum seconds to wait
+        quiet_ms: Milliseconds without changes after which the part is ready
+        absent: Wait for none of the XPaths to match instead (e.g. a dialog
+            closing)
+
+    Returns:
+        bool: True if ready, False on timeout or error
+    """
+    if isinstance(xpaths, str):
+        xpaths = [xpaths]
+    try:
+        previous_timeout = driver.timeouts.script
+    except Exception:
+        previous_timeout = DEFAULT_SCRIPT_TIMEOUT
+    try:
+        driver.set_script_timeout(timeout + 5)
+        result = driver.execute_async_script(
+            WAIT_FOR_STABLE_JS, xpaths, quiet_ms, int(timeout * 1000), absent)
+    except Exception as e:
+        logger.debug(f"Readiness wait failed for {xpaths}: {e}")
+        return False
+    finally:
+        try:
+            driver.set_script_timeout(previous_timeout)
+        except Exception as e:
+            logger.debug(f"Could not restore the script timeout: {e}")
+
+    if result["ready"]:
+        logger.debug(f"Page ready after {result['elapsed']:.0f}ms: {xpaths[0]}")
+    else:
+        logger.debug(f"Timed out after {timeout}s waiting for {xpaths[0]}")
+    return result["ready"]
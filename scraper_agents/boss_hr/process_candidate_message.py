@@ -4,39 +4,80 @@ from selenium.webdriver.support import expected_conditions as EC
 import time
 import re
 import json
+from collections import Counter
 import hashlib
 import os
 from datetime import datetime
 from utils.logger import logger
-from scraper_agents.boss_hr.random_sleep import random_delay
-from scraper_agents.boss_hr.candidate_db import CandidateDatabase
+from scraper_agents.boss_hr.random_sleep import pace
+from scraper_agents.boss_hr.page_waits import wait_until_ready
+from scraper_agents.boss_hr.network_capture import align_chat_list, messages_after
+from scraper_agents.boss_hr.download_manager import DownloadManager
+from scraper_agents.boss_hr.resume_store import ResumeStore, attachment_fingerprint
+from scraper_agents.boss_hr.resume_fetcher import ResumeFetcher
+from data_extract.keyword_matcher import default_matcher
+from scraper_agents.boss_hr.candidate_db import CandidateDatabase, message_fingerprint
+from scraper_agents.boss_hr.candidate_records import CandidateStatus
+from scraper_agents.boss_hr.page_scripts import (
+    CHAT_SELECTORS, CURSOR_LENGTH, INBOX_SELECTORS, attachment_cards,
+    load_older_chat_history, snapshot_chat, snapshot_inbox)
 from pathlib import Path
 from selenium.webdriver.common.action_chains import ActionChains
 import requests
 
+# Times to scroll up for older history while looking for the chat cursor
+MAX_HISTORY_SCROLLS = 10
+# Maximum seconds to wait for older history to load after scrolling up
+HISTORY_LOAD_WAIT = 3
 
-def process_candidate_message(driver, wait_time=30, auto_reply=True, max_candidates=5):
+# Any of these marks an open chat pane
+CHAT_PANE_XPATHS = [
+    "//div[contains(@class, 'conversation-main')]",
+    "//div[contains(@class, 'base-info-content')]",
+    "//div[contains(@class, 'chat-message-list is-to-top')]"
+]
+# Confirmation button of the resume template dialog
+CONFIRM_BUTTON_XPATH = "//button[contains(@class, 'boss-btn-primary')]"
+
+# Version of candidate_id_for(), stored on the chat records it keys
+CHAT_ID_SCHEME = 2
+
+
+def process_candidate_message(driver, wait_time=30, auto_reply=True, max_candidates=5,
+                              capture=None):
     """
     Process candidate messages by selecting and clicking them to open chat windows
     and optionally send automatic messages requesting resumes
 
+    The chat list is read in one pass and compared with the state stored on
+    the last run; only conversations with new activity are opened, unread
+    ones first.
+
     Args:
         driver: Selenium WebDriver instance
         wait_time: Maximum time to wait for elements in seconds
         auto_reply: Whether to automatically send messages to candidates
         max_candidates: Maximum number of candidates to process in one run
+        capture: Started NetworkCapture; captured chat-list and message
+            responses are used instead of the page when there are some
 
     Returns:
         bool: True if successful, False otherwise
     """
+    fetcher = None
     try:
         logger.info("Starting to process candidate messages")
 
         # Initialize the database
         db = CandidateDatabase()
+        downloads = DownloadManager()
+        resumes = ResumeStore()
+        # Resumes with a known URL download alongside the chat navigation
+        fetcher = ResumeFetcher(resumes)
+        fetcher.sync_cookies(driver)
 
         # Define parent xpath for the message container
-        parent_xpath = '//*[@id="container"]/div[1]/div/div[2]/div[2]/div[1]/div[2]/div/div[2]/div[1]'
+        parent_xpath = INBOX_SELECTORS["list_xpath"]
 
         # Wait for the parent element to be present
         wait = WebDriverWait(driver, wait_time)
@@ -48,7 +89,8 @@ def process_candidate_message(driver, wait_time=30, auto_reply=True, max_candida
 
         # Find all child elements (typically these would be message items/cards)
         # Using a more general selector to find clickable children
-        child_elements = parent_element.find_elements(By.XPATH, './div')
+        item_xpath = './div'
+        child_elements = parent_element.find_elements(By.XPATH, item_xpath)
 
         if not child_elements:
             logger.warning("No message items found in the container")
@@ -68,6 +110,7 @@ def process_candidate_message(driver, wait_time=30, auto_reply=True, max_candida
                 if child_elements:
                     logger.info(
                         f"Found {len(child_elements)} message items using selector: {selector}")
+                    item_xpath = selector
                     break
 
             # If still no elements found
@@ -80,15 +123,28 @@ def process_candidate_message(driver, wait_time=30, auto_reply=True, max_candida
                     "Could not identify any message items. Saved page source for debugging.")
                 return False
 
-        total_messages = len(child_elements)
+        # Read the whole chat list in one pass and keep only the
+        # conversations with activity since the last run
+        inbox = snapshot_inbox(driver, parent_element, item_xpath)
+        captured = capture.take("chat_list") if capture else None
+        # Captured items are only usable if they line up with the clickable ones
+        aligned = align_chat_list(captured[1], inbox) if captured else None
+        if aligned is not None and len(aligned) == len(child_elements):
+            logger.info(f"Using captured chat list: {captured[0]}")
+            inbox = aligned
+        elif captured:
+            logger.info("Captured chat list does not match the page, using the page")
+        rekey_legacy_chat_ids(db, inbox)
+        work_queue = select_changed_conversations(db, inbox)
+        total_messages = len(work_queue)
         logger.info(
-            f"Found {total_messages} candidate message items to process")
+            f"Found {total_messages} of {len(inbox)} conversations with new activity")
 
         # Store results of processing
         processed_results = []
 
-        # Process each message item, limited by max_candidates
-        for index, message_item in enumerate(child_elements):
+        # Process each changed conversation, limited by max_candidates
+        for index, (entry, candidate_id) in enumerate(work_queue):
             if index >= max_candidates:
                 logger.info(
                     f"Reached maximum candidates to process ({max_candidates})")
@@ -97,30 +153,28 @@ def process_candidate_message(driver, wait_time=30, auto_reply=True, max_candida
             try:
                 logger.info(
                     f"Processing message {index + 1} of {total_messages}")
-
-                # Extract candidate info from preview before clicking
-                candidate_info = extract_candidate_info_from_preview(
-                    message_item)
-
-                # Generate a unique ID for this candidate
-                candidate_name = candidate_info.get('name', 'Unknown')
-                candidate_id = generate_candidate_id(
-                    candidate_name, message_item)
+                message_item = child_elements[entry["position"]]
+                candidate_name = entry["name"] or 'Unknown'
 
                 # Add or update candidate in database
                 db.add_or_update_candidate(candidate_id, candidate_name, source="chat",
-                                           extra_info={"preview_text": candidate_info.get('preview')})
+                                           extra_info={"preview_text": entry["preview"],
+                                                       "chat_id_scheme": CHAT_ID_SCHEME})
 
                 # Scroll the element into view
                 driver.execute_script(
                     "arguments[0].scrollIntoView({block: 'center'});", message_item)
-                random_delay(1, 5)
+                pace("before_click")
 
                 # Take screenshot before clicking (for debugging)
                 if index == 0:  # Only for first item to avoid too many screenshots
                     driver.save_screenshot(
                         f"logs/before_click_message_{index}.png")
 
+                # Only a message response from this click should be used
+                if capture:
+                    capture.clear("messages")
+
                 # Try clicking the element
                 try:
                     message_item.click()
@@ -139,8 +193,9 @@ def process_candidate_message(driver, wait_time=30, auto_reply=True, max_candida
                             f"JavaScript click also failed on message {index + 1}: {js_error}")
                         continue
 
-                # Wait for the chat to load
-                random_delay(1, 4)
+                # Wait for the chat to render, then pause like a reader would
+                wait_until_ready(driver, CHAT_PANE_XPATHS)
+                pace("after_open")
 
                 # Check if chat opened successfully
                 chat_opened = is_chat_window_open(driver)
@@ -149,52 +204,77 @@ def process_candidate_message(driver, wait_time=30, auto_reply=True, max_candida
                     logger.info(
                         f"Chat window for {candidate_name} opened successfully")
 
-                    # Extract messages from chat
-                    messages = extract_chat_messages(driver)
+                    # Extract the messages after the last visit's cursor
+                    cursor = db.get_chat_cursor(candidate_id)
+                    messages = extract_chat_messages(driver, cursor, capture)
                     check_if_resume_found = check_and_download_resume(
-                        driver, candidate_id)
-
-                    # Record messages in the database
-                    if messages:
-                        for msg in messages:
-                            db.record_message(
-                                candidate_id,
-                                "inbound" if msg["sender"] == "candidate" else "outbound",
-                                msg["content"],
-                                has_resume=check_if_resume_found
-                            )
-
-                    # Get candidate record to check status
-                    candidate = db.get_candidate_by_id(candidate_id)
-
-                    # Check if candidate has sent a resume
-                    has_resume = candidate.get("resume_received", False)
-
-                    # Re-check messages for resume if database says no resume
-                    if not has_resume:
-                        for msg in messages:
-                            if msg["sender"] == "candidate" and check_if_resume_found:
-                                has_resume = True
-                                # Update database
-                                db.update_candidate_status(
-                                    candidate_id, "resume_received")
-                                break
+                        driver, candidate_id, downloads, resumes, fetcher, capture)
+                    # A resume still downloading is neither counted nor
+                    # asked for again
+                    resume_pending = not check_if_resume_found and fetcher.awaiting(candidate_id)
+
+                    # Record messages in the database with a single write.
+                    # Fingerprints number repeated identical messages so a
+                    # re-read chat maps onto the records already stored;
+                    # messages after the cursor are new and numbered after
+                    # the stored ones.
+                    occurrences = Counter()
+                    after_cursor = bool(messages) and messages[0]["after_cursor"]
+                    with db.transaction():
+                        if messages:
+                            for msg in messages:
+                                direction = "inbound" if msg["sender"] == "candidate" else "outbound"
+                                if after_cursor:
+                                    fingerprint = db.next_message_fingerprint(
+                                        candidate_id, direction, msg["content"])
+                                else:
+                                    occurrence = occurrences[(direction, msg["content"])]
+                                    occurrences[(direction, msg["content"])] += 1
+                                    fingerprint = message_fingerprint(
+                                        direction, msg["content"], occurrence)
+                                db.record_message(
+                                    candidate_id,
+                                    direction,
+                                    msg["content"],
+                                    has_resume=check_if_resume_found,
+                                    fingerprint=fingerprint
+                                )
+                            keys = (cursor if after_cursor else []) + [msg["key"] for msg in messages]
+                            cursor = keys[-CURSOR_LENGTH:]
+                            db.set_chat_cursor(candidate_id, cursor)
+
+                            # Tag skills and intents the candidate mentions;
+                            # our own messages (the resume request) are left
+                            # out, and the list preview is one of the two
+                            db.add_candidate_tags(candidate_id, default_matcher().tags(
+                                *(msg["content"] for msg in messages if msg["sender"] == "candidate")))
+
+                        # Get candidate record to check status
+                        candidate = db.get_candidate_by_id(candidate_id)
+
+                        # Check if candidate has sent a resume
+                        has_resume = candidate.get("resume_received", False)
+
+                        # Re-check messages for resume if database says no resume
+                        if not has_resume:
+                            for msg in messages:
+                                if msg["sender"] == "candidate" and check_if_resume_found:
+                                    has_resume = True
+                                    # Update database
+                                    db.update_candidate_status(
+                                        candidate_id, "resume_received")
+                                    break
 
                     # Only send message if:
                     # 1. Candidate is new (no messages sent yet)
-                    if not check_if_resume_found:
+                    if not check_if_resume_found and not resume_pending:
 
                         # Send initial resume request
                         logger.debug("Send initial resume request ... ")
                         resume_request_success = send_resume_request(
                             driver, candidate_name)
                         if resume_request_success:
-                            db.record_message(
-                                candidate_id,
-                                "outbound",
-                                f"您好{candidate_name}，感谢您的关注。请问您方便发一份最新的简历过来吗？",
-                                has_resume=False
-                            )
+                            record_resume_request(db, candidate_id, candidate_name, cursor)
 
                     # Record results
                     processed_results.append({
@@ -211,7 +291,8 @@ def process_candidate_message(driver, wait_time=30, auto_reply=True, max_candida
                     if back_buttons:
                         back_buttons[0].click()
                         logger.info("Returned to message list")
-                        random_delay(1, 5)
+                        wait_until_ready(driver, parent_xpath)
+                        pace("after_back")
                     else:
                         logger.debug(
                             "No back button found, continuing to next message")
@@ -224,6 +305,15 @@ def process_candidate_message(driver, wait_time=30, auto_reply=True, max_candida
                     f"Error processing message item {index + 1}: {e}")
                 continue
 
+        # Let the background resume downloads finish
+        fetcher.close()
+
+        # Remember how the processed conversations look now, after their
+        # unread badges cleared and any reply was sent
+        save_inbox_state(db, driver, parent_element, item_xpath, inbox,
+                         [result['candidate_id'] for result in processed_results])
+        apply_fetched_resumes(db, fetcher)
+
         # Generate report after processing
         report = db.generate_report()
         logger.info(
@@ -240,6 +330,166 @@ def process_candidate_message(driver, wait_time=30, auto_reply=True, max_candida
         except:
             pass
         return False
+    finally:
+        # Never leave the download threads and connections behind
+        if fetcher is not None:
+            fetcher.close()
+
+
+def rekey_legacy_chat_ids(db, inbox):
+    """
+    Move chat candidates stored under an older id scheme to their current id
+
+    Earlier ids hashed the chat item's class and text, or only the name when
+    the item had no id attribute, so the records they keyed are not found
+    again. A chat list item whose id is unknown takes over the one unmarked
+    chat record with the same name, which is merged into it and keeps
+    resolving there; names shared by several unmarked records are left
+    alone. Records found under their current id are marked with
+    CHAT_ID_SCHEME, like the ones created since, and are never moved, so
+    each record is re-keyed at most once.
+
+    Args:
+        db: CandidateDatabase
+        inbox: Items from snapshot_inbox()
+
+    Returns:
+        int: Number of records re-keyed
+    """
+    unknown = []
+    unmarked = []
+    for entry in inbox:
+        name = entry["name"] or 'Unknown'
+        candidate_id = candidate_id_for(name, entry["element_id"])
+        candidate = db.db["candidates"].get(candidate_id)
+        if candidate is None:
+            if name != 'Unknown':
+                unknown.append((name, candidate_id))
+        elif (candidate.status is not CandidateStatus.MERGED and
+              candidate.extra_info.get("chat_id_scheme") != CHAT_ID_SCHEME):
+            unmarked.append((name, candidate_id))
+    if unmarked:
+        with db.transaction():
+            for name, candidate_id in unmarked:
+                db.add_or_update_candidate(candidate_id, name, source="chat",
+                                           extra_info={"chat_id_scheme": CHAT_ID_SCHEME})
+    if not unknown:
+        return 0
+
+    legacy = {}
+    for candidate_id, candidate in db.db["candidates"].items():
+        if (candidate.source == "chat" and candidate.status is not CandidateStatus.MERGED and
+                candidate.extra_info.get("chat_id_scheme") != CHAT_ID_SCHEME):
+            legacy.setdefault(candidate.name, []).append(candidate_id)
+
+    names = Counter(name for name, _ in unknown)
+    rekeyed = 0
+    with db.transaction():
+        for name, candidate_id in unknown:
+            old_ids = legacy.get(name, ())
+            if len(old_ids) != 1 or names[name] != 1:
+                continue
+            db.add_or_update_candidate(candidate_id, name, source="chat",
+                                       extra_info={"chat_id_scheme": CHAT_ID_SCHEME})
+            rekeyed += db.merge_candidates(candidate_id, old_ids[0])
+    if rekeyed:
+        logger.info(f"Re-keyed {rekeyed} chat candidates stored under old ids")
+    return rekeyed
+
+
+def inbox_state(entry):
+    """
+    The parts of a chat list item that change with new activity
+
+    The time label is left out: it is relative ("14:05", then "昨天", then
+    "10月17日"), so it changes every day on chats nobody touched.
+    """
+    return {"preview": entry["preview"], "unread": entry["unread"]}
+
+
+def select_changed_conversations(db, inbox):
+    """
+    Conversations of a chat list snapshot with activity since they were
+    last processed
+
+    A conversation is changed when it has an unread badge, or when its
+    preview differs from the state stored for the candidate.
+
+    Args:
+        db: CandidateDatabase
+        inbox: Items from snapshot_inbox()
+
+    Returns:
+        list: (item, candidate_id) tuples, unread first, then most recent
+    """
+    queue = []
+    for entry in inbox:
+        name = entry["name"] or 'Unknown'
+        candidate_id = db.resolve_candidate_id(candidate_id_for(name, entry["element_id"]))
+        candidate = db.get_candidate_by_id(candidate_id)
+        seen = candidate.get("extra_info", {}).get("inbox") if candidate else None
+        if entry["unread"] or not seen or seen.get("preview") != entry["preview"]:
+            queue.append((entry, candidate_id))
+
+    # The chat list is ordered by recency
+    queue.sort(key=lambda item: (not item[0]["unread"], item[0]["position"]))
+    return queue
+
+
+def save_inbox_state(db, driver, list_element, item_xpath, inbox, candidate_ids):
+    """
+    Store the chat list state of processed conversations, so the next run
+    only opens them again when they change
+
+    Args:
+        db: CandidateDatabase
+        driver: Selenium WebDriver instance
+        list_element: WebElement of the chat list
+        item_xpath: XPath of the items relative to the list
+        inbox: Items read before processing, used if the list cannot be re-read
+        candidate_ids: Ids of the processed candidates
+    """
+    if not candidate_ids:
+        return
+    try:
+        inbox = snapshot_inbox(driver, list_element, item_xpath)
+    except Exception as e:
+        logger.debug(f"Could not re-read chat list, keeping earlier state: {e}")
+
+    processed = set(candidate_ids)
+    with db.transaction():
+        for entry in inbox:
+            name = entry["name"] or 'Unknown'
+            candidate_id = db.resolve_candidate_id(candidate_id_for(name, entry["element_id"]))
+            if candidate_id in processed:
+                db.add_or_update_candidate(candidate_id, name, source="chat",
+                                           extra_info={"inbox": inbox_state(entry)})
+
+
+def apply_fetched_resumes(db, fetcher):
+    """
+    Record the outcome of the background resume downloads
+
+    A stored resume marks the candidate as having sent one. After a failed
+    download the candidate's chat list state is cleared, so the next run
+    opens the conversation again and retries the attachment (or asks for
+    the resume).
+
+    Args:
+        db: CandidateDatabase
+        fetcher: ResumeFetcher whose downloads have finished
+    """
+    with db.transaction():
+        for candidate_id, sha256 in fetcher.take_results():
+            if sha256:
+                db.mark_resume_received(candidate_id)
+                continue
+            candidate = db.get_candidate_by_id(candidate_id)
+            if candidate is not None and not candidate.resume_received:
+                logger.warning(
+                    f"Resume download failed for candidate {candidate_id}, reopening the chat next run")
+                db.add_or_update_candidate(candidate_id, candidate.name, source=candidate.source,
+                                           extra_info={"inbox": None})
 
 
 def extract_candidate_info_from_preview(message_item):
@@ -277,13 +527,7 @@ def extract_candidate_info_from_preview(message_item):
 
 def is_chat_window_open(driver):
     """Check if a chat window is currently open"""
-    chat_indicators = [
-        "//div[contains(@class, 'conversation-main')]",
-        "//div[contains(@class, 'base-info-content')]",
-        "//div[contains(@class, 'chat-message-list is-to-top')]"
-    ]
-
-    for indicator in chat_indicators:
+    for indicator in CHAT_PANE_XPATHS:
         try:
             if driver.find_elements(By.XPATH, indicator):
                 return True
@@ -293,6 +537,30 @@ def is_chat_window_open(driver):
     return False
 
 
+def record_resume_request(db, candidate_id, candidate_name, cursor=None):
+    """
+    Record a sent resume request and move the chat cursor past it
+
+    Args:
+        db: CandidateDatabase
+        candidate_id: Candidate the request was sent to
+        candidate_name: Name used in the request
+        cursor: Chat cursor keys read before the request was sent
+    """
+    request_text = f"您好{candidate_name}，感谢您的关注。请问您方便发一份最新的简历过来吗？"
+    with db.transaction():
+        db.record_message(
+            candidate_id,
+            "outbound",
+            request_text,
+            has_resume=False,
+            fingerprint=db.next_message_fingerprint(candidate_id, "outbound", request_text)
+        )
+        # The sent message is already recorded; keep it behind the cursor
+        db.set_chat_cursor(candidate_id, ((cursor or []) + [
+            chat_message_key("self", request_text)])[-CURSOR_LENGTH:])
+
+
 def send_resume_request(driver, candidate_name):
     """
     Send a message requesting a resume to the candidate
@@ -322,7 +590,8 @@ def send_resume_request(driver, candidate_name):
         actions.perform()
 
         logger.debug("Clicked resume attachment button")
-        random_delay(0.5, 1.2)
+        wait_until_ready(driver, CONFIRM_BUTTON_XPATH, timeout=5)
+        pace("dialog")
 
         # Now look for the confirmation button with the exact class
         confirm_btn = driver.find_element(
@@ -337,17 +606,25 @@ def send_resume_request(driver, candidate_name):
             actions.perform()
 
             logger.debug("Clicked confirmation button for resume template")
-            random_delay(0.7, 1.5)
-        else:
-            logger.debug("Confirmation button not found or not displayed")
+            wait_until_ready(driver, CONFIRM_BUTTON_XPATH, timeout=5, absent=True)
+            pace("dialog")
+            return True
+
+        logger.debug("Confirmation button not found or not displayed")
+        return False
     except Exception as e:
         # If any error occurs, just continue with normal sending
         logger.debug(f"No resume attachment process available: {e}")
+        return False
 
 
 def generate_candidate_id(name, element):
     """
-    Generate a unique ID for a candidate based on their name and element
+    Generate a stable ID for a candidate based on their name and element
+
+    Only attributes that identify the conversation are used; the item's
+    class and text change with selection state and the latest message, and
+    would give the same candidate a new ID on every run.
 
     Args:
         name: Candidate name
@@ -356,70 +633,114 @@ def generate_candidate_id(name, element):
     Returns:
         str: Unique ID
     """
-    # Get a unique attribute from the element if possible
+    # Get a unique attribute from the element if possible, else its avatar URL
+    element_id = ''
     try:
-        element_id = element.get_attribute('id') or ''
-        element_class = element.get_attribute('class') or ''
-        element_text = element.text or ''
+        for attribute in INBOX_SELECTORS["id_attributes"]:
+            element_id = element.get_attribute(attribute) or ''
+            if element_id:
+                break
+        if not element_id:
+            avatars = element.find_elements(By.CSS_SELECTOR, INBOX_SELECTORS["avatar"])
+            src = avatars[0].get_attribute('src') if avatars else None
+            element_id = f"avatar:{src}" if src else ''
     except:
         element_id = ''
-        element_class = ''
-        element_text = ''
 
+    return candidate_id_for(name, element_id)
+
+
+def candidate_id_for(name, element_id):
+    """
+    Candidate ID from a name and the identifying attribute of their chat
+    list item, as read by generate_candidate_id() or snapshot_inbox()
+
+    Records created under this scheme are marked with CHAT_ID_SCHEME, see
+    rekey_legacy_chat_ids().
+    """
     # Create a unique string and hash it
-    unique_str = f"{name}_{element_id}_{element_class}_{element_text}"
+    unique_str = f"{name}_{element_id}"
     hashed = hashlib.md5(unique_str.encode()).hexdigest()
 
     return hashed[:16]  # Use first 16 characters of hash
 
 
-def extract_chat_messages(driver):
+def chat_message_key(sender, text, attachment_name=None):
+    """Key of a chat message, as computed by the transcript snapshot script"""
+    return "\x1f".join((sender, text, attachment_name or ""))
+
+
+def extract_chat_messages(driver, cursor=None, capture=None):
     """
     Extract message content from an open chat window using the specific HTML structure
 
+    The transcript is read with a single script call, so the number of
+    WebDriver round trips does not grow with the length of the chat. Given
+    the chat cursor saved on the previous visit, only the messages after it
+    are returned; older history is loaded by scrolling up only while the
+    cursor is not on the page.
+
     Args:
         driver: Selenium WebDriver instance
+        cursor: Message keys from CandidateDatabase.get_chat_cursor(), or None
+            to read everything
+        capture: Started NetworkCapture; a captured message response is
+            used instead of the page when it ends with the page's messages
+            and holds the cursor (or there is no cursor)
 
     Returns:
-        list: List of message dictionaries with sender and content
+        list: Message dictionaries with sender, content and key, in chat
+            order; "after_cursor" is True when they follow the cursor
     """
     try:
         # Wait for the chat container to load
         wait = WebDriverWait(driver, 10)
-        chat_container_xpath = "//*[@id='container']/div[1]/div/div[2]/div[2]/div[2]/div[1]/div[1]/div[2]/div[2]"
 
         try:
             wait.until(EC.presence_of_element_located(
-                (By.XPATH, chat_container_xpath)))
+                (By.XPATH, CHAT_SELECTORS["container_xpath"])))
         except Exception as e:
             logger.warning(f"Chat container not found: {e}")
             return []
 
-        messages = []
-
-        # 1. Find candidate messages (item-friend)
-        candidate_messages = driver.find_elements(
-            By.XPATH, "//div[contains(@class, 'item-friend')]")
-
-        # 2. Find HR messages (item-myself)
-        hr_messages = driver.find_elements(
-            By.XPATH, "//div[contains(@class, 'item-myself')]")
+        # Read the transcript in one script call, in DOM (chronological)
+        # order. A captured response holds the whole history, but is only
+        # used when its last keys are the page's: the cursor saved from it
+        # has to be found by a later run that reads the page.
+        captured = capture.take("messages") if capture else None
+        transcript = snapshot_chat(driver, cursor)
+        if captured:
+            from_capture = messages_after(captured[1], cursor)
+            if from_capture["tail"] != transcript["tail"]:
+                logger.info("Captured chat messages do not match the page, using the page")
+            elif from_capture["anchor_found"] or not cursor:
+                logger.info(f"Using captured chat messages: {captured[0]}")
+                transcript = from_capture
+        if cursor and not transcript["anchor_found"]:
+            for _ in range(MAX_HISTORY_SCROLLS):
+                rendered = load_older_chat_history(driver)
+                wait_until_ready(driver, CHAT_SELECTORS["container_xpath"],
+                                 timeout=HISTORY_LOAD_WAIT)
+                transcript = snapshot_chat(driver, cursor)
+                if transcript["anchor_found"] or len(transcript["messages"]) <= rendered:
+                    break
+            if not transcript["anchor_found"]:
+                logger.info("Chat cursor not found in history, reading the whole chat")
+        after_cursor = transcript["anchor_found"]
 
-        # Process candidate messages
-        for msg in candidate_messages:
-            try:
-                # Extract the text from the span element inside the .text div
-                text_element = msg.find_element(
-                    By.XPATH, ".//div[@class='text']/span | .//div[@class='text']")
-                content = text_element.text.strip()
-
-                # Check for attachments
-                attachment_elements = msg.find_elements(
-                    By.XPATH, ".//h3[contains(@class, 'message-card-top-title')] | .//div[contains(@class, 'message-card-top-content')]")
-                if attachment_elements:
-                    file_name = attachment_elements[0].text.strip()
-                    if file_name:
-                        content += f" [附件: {file_name}]"
+        messages = []
+        candidate_count = 0
+        hr_count = 0
+
+        for snapshot in transcript["messages"]:
+            content = snapshot["text"]
+
+            if snapshot["sender"] == "candidate":
+                candidate_count += 1
+                # Mark attachments in the content
+                if snapshot["has_attachment"]:
+                    if snapshot["attachment_name"]:
+                        content += f" [附件: {snapshot['attachment_name']}]"
                     else:
                         content += " [附件]"
 
@@ -427,47 +748,32 @@ def extract_chat_messages(driver):
                     messages.append({
                         "sender": "candidate",
                         "content": content,
-                        "timestamp": None  # Could extract timestamp if available
+                        "timestamp": None,  # Could extract timestamp if available
+                        "position": snapshot["position"],
+                        "has_attachment": snapshot["has_attachment"],
+                        "key": snapshot["key"],
+                        "after_cursor": after_cursor
                     })
-            except Exception as e:
-                logger.debug(f"Error extracting candidate message: {e}")
-                continue
-
-        # Process HR messages
-        for msg in hr_messages:
-            try:
-                # Extract the text - note the status element that might be present
-                text_container = msg.find_element(
-                    By.XPATH, ".//div[contains(@class, 'text')]")
-
-                # Check for delivery status
-                status_text = ""
-                status_elements = text_container.find_elements(
-                    By.XPATH, ".//i[contains(@class, 'status')]")
-                if status_elements:
-                    status_text = status_elements[0].text.strip()
+            else:
+                hr_count += 1
+                status_text = snapshot["status"] or ""
+                if status_text:
                     logger.debug(f"Message status: {status_text}")
 
-                # Get the main message text
-                span_element = text_container.find_element(By.XPATH, "./span")
-                content = span_element.text.strip()
-
                 if content:
                     messages.append({
                         "sender": "self",
                         "content": content,
                         "timestamp": None,
-                        "status": status_text  # Add delivery status information
+                        "position": snapshot["position"],
+                        "status": status_text,  # Add delivery status information
+                        "read": "已读" in status_text,
+                        "key": snapshot["key"],
+                        "after_cursor": after_cursor
                     })
-            except Exception as e:
-                logger.debug(f"Error extracting HR message: {e}")
-                continue
-
-        # Sort messages to ensure they're in chronological order
-        # (We're assuming the DOM structure already presents them in the correct order)
 
-        logger.info(f"Extracted {len(messages)} messages from chat " +
-                    f"({len(candidate_messages)} from candidate, {len(hr_messages)} from HR)")
+        logger.info(f"Extracted {len(messages)} {'new ' if after_cursor else ''}messages from chat " +
+                    f"({candidate_count} from candidate, {hr_count} from HR)")
 
         return messages
 
@@ -483,19 +789,36 @@ def extract_chat_messages(driver):
         return []
 
 
-def check_and_download_resume(driver, candidate_id):
+def check_and_download_resume(driver, candidate_id, downloads=None, store=None, fetcher=None,
+                              capture=None):
     """
     Check for resume attachments, click to preview them, and download if available
 
+    Attachments already in the resume store are not opened again. When an
+    attachment's file URL is known, from its card or a captured message
+    response, the fetcher downloads it in the background instead of going
+    through the preview dialog; such a resume only counts once the fetch
+    stored it (see ResumeFetcher.awaiting() and apply_fetched_resumes()).
+
     Args:
         driver: Selenium WebDriver instance
         candidate_id: Candidate ID to use for filename
+        downloads: DownloadManager watching the browser's download folder
+        store: ResumeStore the downloaded resumes are moved into
+        fetcher: ResumeFetcher with the browser's cookies, or None to always
+            use the preview dialog
+        capture: Started NetworkCapture to look up attachment URLs in
 
     Returns:
-        bool: True if resume was found and downloaded, False otherwise
+        bool: True if a resume of the candidate is stored, False otherwise
+            (including while a background fetch is still running)
     """
     try:
         logger.info("Checking for resume preview buttons in chat")
+        if downloads is None:
+            downloads = DownloadManager()
+        if store is None:
+            store = ResumeStore()
 
         # Look for "点击预览附件简历" (Click to preview attachment resume) buttons
         resume_preview_buttons = driver.find_elements(
@@ -508,15 +831,35 @@ def check_and_download_resume(driver, candidate_id):
         logger.info(
             f"Found {len(resume_preview_buttons)} resume attachment buttons")
 
+        # Fingerprint every attachment card so stored ones are skipped
+        cards = attachment_cards(driver, resume_preview_buttons)
+        card_occurrences = Counter()
+        fingerprints = []
+        for card in cards:
+            fingerprints.append(attachment_fingerprint(card["text"], card_occurrences[card["text"]]))
+            card_occurrences[card["text"]] += 1
+        resume_already_stored = False
+
         # Try to click each resume preview button
         for i, preview_button in enumerate(resume_preview_buttons):
+            if store.has_resume(candidate_id, fingerprints[i]):
+                logger.info(f"Resume attachment {i+1} already stored, not opening it")
+                resume_already_stored = True
+                continue
+
+            url = cards[i]["url"] or (capture.attachment_url(cards[i]["text"]) if capture else None)
+            if fetcher and url:
+                logger.info(f"Fetching resume attachment {i+1} in the background")
+                fetcher.submit(url, candidate_id, fingerprints[i])
+                continue
+
             try:
                 # Scroll to the button to make it visible
                 driver.execute_script(
                     "arguments[0].scrollIntoView({block: 'center'});", preview_button)
 
                 # Add a small delay to mimic human behavior
-                random_delay(0.5, 1.5)
+                pace("before_click")
 
                 # Click the preview button
                 logger.info(f"Clicking resume preview button {i+1}")
@@ -603,14 +946,14 @@ def check_and_download_resume(driver, candidate_id):
                         # Scroll to and click the download button
                         driver.execute_script(
                             "arguments[0].scrollIntoView({block: 'center'});", download_button)
-                        random_delay(0.5, 1)
+                        pace("before_click")
 
-                        # Click the download button
+                        # Click the download button and wait exactly as long
+                        # as the download takes
                         logger.info("Clicking download button for resume")
+                        token = downloads.begin()
                         download_button.click()
-
-                        # Wait for download to start
-                        random_delay(1, 3)
+                        resume_path = downloads.wait(token, candidate_id)
 
                         # Find close button for the preview dialog and close it
                         close_buttons = driver.find_elements(
@@ -618,10 +961,20 @@ def check_and_download_resume(driver, candidate_id):
                         if close_buttons:
                             close_buttons[0].click()
                             logger.info("Closed resume preview dialog")
-                            random_delay(0.5, 1)
-
+                            wait_until_ready(driver, dialog_xpath, timeout=5, absent=True)
+                            pace("dialog")
+
+                        if resume_path is None:
+                            logger.warning(
+                                f"Resume download failed for candidate {candidate_id}")
+                            continue
+
+                        sha256 = store.add(resume_path, candidate_id, source="boss",
+                                           attachment_fingerprint=fingerprints[i],
+                                           original_name=downloads.original_names.pop(
+                                               resume_path, None))
                         logger.info(
-                            f"Successfully downloaded resume for candidate {candidate_id}")
+                            f"Successfully downloaded resume for candidate {candidate_id}: {sha256[:12]}")
                         return True
                     else:
                         logger.warning(
@@ -643,7 +996,7 @@ def check_and_download_resume(driver, candidate_id):
             except Exception as e:
                 logger.warning(f"Failed to preview resume {i+1}: {e}")
 
-        return False
+        return resume_already_stored
 
     except Exception as e:
         logger.error(f"Error checking for resume attachments: {e}")
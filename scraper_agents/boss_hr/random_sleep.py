@@ -1,8 +1,25 @@
 import random
 from time import sleep
+from config import PACING_DELAYS, PACING_MULTIPLIER
 
 
 def random_delay(min_seconds=2, max_seconds=7):
     """Add a random delay between actions"""
     sleep_time = random.uniform(min_seconds, max_seconds)
     sleep(sleep_time)
+
+
+def pace(action):
+    """
+    Add the human-pacing pause configured for an action
+
+    Readiness waits return as soon as the page is ready; this is the
+    deliberate jitter on top of them, set per action in PACING_DELAYS and
+    scaled by PACING_MULTIPLIER.
+
+    Args:
+        action: Key of PACING_DELAYS, e.g. "before_click"
+    """
+    min_seconds, max_seconds = PACING_DELAYS[action]
+    if PACING_MULTIPLIER > 0:
+        random_delay(min_seconds * PACING_MULTIPLIER, max_seconds * PACING_MULTIPLIER)
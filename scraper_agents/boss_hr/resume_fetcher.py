@@ -0,0 +1,216 @@
+import mimetypes
+import os
+import re
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from utils.logger import logger
+from scraper_agents.boss_hr.download_manager import DOWNLOAD_DIR
+from scraper_agents.boss_hr.resume_store import ResumeStore
+
+# Folder fetched files are written to before they move into the resume store
+FETCH_DIR = os.path.join(DOWNLOAD_DIR, "fetched")
+
+_CONTENT_DISPOSITION_NAME = re.compile(
+    r"filename\*\s*=\s*[^']*'[^']*'([^;]+)|filename\s*=\s*\"?([^\";]+)\"?", re.IGNORECASE)
+
+
+def _file_name_for(response, url):
+    """File name of a response, from its headers or its URL, or "" if neither has one"""
+    match = _CONTENT_DISPOSITION_NAME.search(response.headers.get("Content-Disposition", ""))
+    if match:
+        name = Path(unquote(match.group(1) or match.group(2)).strip()).name
+        if name:
+            return name
+    return Path(unquote(urlparse(url).path)).name
+
+
+def _suffix_for(response, url, name):
+    """File extension of a response, from its file name, its URL or its content type"""
+    for file_name in (name, Path(unquote(urlparse(url).path)).name):
+        suffix = Path(file_name).suffix
+        if suffix:
+            return suffix.lower()
+    # Left empty for generic binary responses; the store then goes by the
+    # file's leading bytes
+    content_type = response.headers.get("Content-Type", "").split(";")[0].strip()
+    if content_type == "application/octet-stream":
+        return ""
+    return mimetypes.guess_extension(content_type) or ""
+
+
+class ResumeFetcher:
+    """
+    Downloads resume attachments over HTTP with the browser's session.
+
+    Cookies and the user agent are copied from the live browser with
+    sync_cookies(); attachment URLs found on chat cards or in captured
+    message responses are then fetched by a small thread pool sharing one
+    pooled requests.Session, so the chat flow moves on to the next
+    conversation while files download. Each finished file is moved into the
+    ResumeStore; the outcome of every fetch is kept until take_results(), so
+    the caller can mark the candidate once the resume is actually stored.
+    The URL can point anywhere, e.g. a local stand-in server from
+    network_capture.serve_recorded().
+    """
+
+    def __init__(self, store=None, download_dir=FETCH_DIR, max_workers=3, timeout=60,
+                 retries=2):
+        """
+        Args:
+            store: ResumeStore the fetched resumes go into
+            download_dir: Folder for files being fetched
+            max_workers: Maximum number of concurrent downloads
+            timeout: Seconds to wait for the server to connect or send data
+            retries: Retries of failed connections
+        """
+        self.store = store or ResumeStore()
+        self.download_dir = Path(download_dir)
+        self.download_dir.mkdir(parents=True, exist_ok=True)
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers,
+                              max_retries=retries)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="resume-fetch")
+        self._pending = {}
+        self._results = []
+        self._lock = threading.Lock()
+
+    def sync_cookies(self, driver):
+        """
+        Copy the cookies, user agent and page URL (as referer) of the browser
+
+        Args:
+            driver: Selenium WebDriver instance
+
+        Returns:
+            bool: True if copied, False on error
+        """
+        try:
+            cookies = driver.get_cookies()
+            user_agent = driver.execute_script("return navigator.userAgent")
+            referer = driver.current_url
+        except Exception as e:
+            logger.warning(f"Could not copy the browser session: {e}")
+            return False
+
+        for cookie in cookies:
+            self.session.cookies.set(cookie["name"], cookie["value"],
+                                     domain=cookie.get("domain"), path=cookie.get("path", "/"))
+        self.session.headers.update({"User-Agent": user_agent, "Referer": referer})
+        logger.debug(f"Copied {len(cookies)} browser cookies to the resume fetcher")
+        return True
+
+    def submit(self, url, candidate_id, attachment_fingerprint=None):
+        """
+        Start downloading a resume in the background
+
+        The same attachment is only fetched once while a download is running.
+
+        Args:
+            url: File URL of the attachment
+            candidate_id: Candidate the resume belongs to
+            attachment_fingerprint: Fingerprint of the chat attachment, for
+                ResumeStore.has_resume()
+
+        Returns:
+            Future: Resolves to the SHA-256 hash of the stored resume, or None
+                if the download failed
+        """
+        key = (candidate_id, attachment_fingerprint or url)
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._executor.submit(
+                    self._fetch, url, candidate_id, attachment_fingerprint)
+                self._pending[key] = future
+                future.add_done_callback(lambda _: self._forget(key))
+        return future
+
+    def _forget(self, key):
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def _fetch(self, url, candidate_id, attachment_fingerprint):
+        """Download one file and move it into the store"""
+        part_path = self.download_dir / f".{uuid.uuid4().hex}.part"
+        try:
+            with self.session.get(url, stream=True, timeout=self.timeout) as response:
+                response.raise_for_status()
+                # An expired session is answered with the login page
+                if response.headers.get("Content-Type", "").startswith("text/html"):
+                    raise ValueError("got an HTML page instead of a file")
+                name = _file_name_for(response, url)
+                suffix = _suffix_for(response, url, name)
+                with open(part_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=1 << 16):
+                        f.write(chunk)
+
+            path = part_path.with_name(f"{candidate_id}_{part_path.stem[1:9]}{suffix}")
+            os.replace(part_path, path)
+            sha256 = self.store.add(path, candidate_id, source="boss",
+                                    attachment_fingerprint=attachment_fingerprint,
+                                    original_name=name or None)
+            logger.info(f"Fetched resume for candidate {candidate_id}: {sha256[:12]}")
+        except Exception as e:
+            logger.error(f"Failed to fetch resume for candidate {candidate_id} from {url}: {e}")
+            part_path.unlink(missing_ok=True)
+            sha256 = None
+        with self._lock:
+            self._results.append((candidate_id, sha256))
+        return sha256
+
+    def awaiting(self, candidate_id):
+        """
+        Whether a resume of a candidate is being fetched, or was stored and
+        not yet taken with take_results()
+
+        Args:
+            candidate_id: Candidate identifier
+
+        Returns:
+            bool: True while a fetch is running or succeeded unreported
+        """
+        with self._lock:
+            return (any(key[0] == candidate_id for key in self._pending) or
+                    any(cid == candidate_id and sha256 for cid, sha256 in self._results))
+
+    def take_results(self):
+        """
+        Outcomes of the fetches finished since the last call
+
+        Returns:
+            list: (candidate_id, sha256) tuples; sha256 is None for a failed
+                fetch
+        """
+        with self._lock:
+            results, self._results = self._results, []
+        return results
+
+    def wait(self, timeout=None):
+        """
+        Wait for the running downloads to finish
+
+        Args:
+            timeout: Maximum seconds to wait, or None to wait for all
+
+        Returns:
+            int: Number of downloads still running
+        """
+        with self._lock:
+            futures = list(self._pending.values())
+        _, not_done = wait_futures(futures, timeout=timeout)
+        return len(not_done)
+
+    def close(self):
+        """Finish the running downloads and release the connections"""
+        self._executor.shutdown(wait=True)
+        self.session.close()
@@ -0,0 +1,246 @@
+import hashlib
+import json
+import mimetypes
+import os
+import time
+from pathlib import Path
+from utils.logger import logger
+from scraper_agents.boss_hr.db_storage import FileLock
+
+# Default location of the store, next to the browser's download folder
+STORE_DIR = "downloaded_files/store"
+
+# Leading bytes of the resume formats, for files without a usable extension
+_MAGIC_TYPES = (
+    (b"%PDF", "application/pdf"),
+    (b"PK\x03\x04", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+    (b"\xd0\xcf\x11\xe0", "application/msword"),
+    (b"\x89PNG", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+)
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """SHA-256 hex digest of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def guess_mime_type(path):
+    """MIME type of a file from its leading bytes, falling back to its name"""
+    with open(path, 'rb') as f:
+        head = f.read(8)
+    for magic, mime_type in _MAGIC_TYPES:
+        if head.startswith(magic):
+            return mime_type
+    return mimetypes.guess_type(str(path))[0] or "application/octet-stream"
+
+
+def attachment_fingerprint(card_text, occurrence=0):
+    """
+    Fingerprint of a resume attachment in a chat, known before it is opened
+
+    Args:
+        card_text: Text of the attachment card (file name, size)
+        occurrence: Number of earlier cards with the same text in the chat
+
+    Returns:
+        str: 16-character hex fingerprint
+    """
+    key = f"{card_text.strip()}\x1f{occurrence}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+
+class ResumeStore:
+    """
+    Content-addressed store of resume files.
+
+    Each file is stored once under its SHA-256 hash
+    (`objects/<hash[:2]>/<hash><ext>`) and hard-linked into
+    `by_candidate/<candidate_id>/`, so downloading the same resume again,
+    or the same file arriving for a merged duplicate, costs no space. A JSON
+    index maps each hash to its candidate ids, source platforms, original
+    names, MIME type and timestamps, and each (candidate, attachment
+    fingerprint) seen in a chat to its hash, so has_resume() can tell the
+    chat flow to skip attachments it already holds.
+
+    The index is rewritten atomically under a lock file and reloaded when
+    another process changed it.
+    """
+
+    def __init__(self, root=STORE_DIR):
+        """
+        Args:
+            root: Directory of the store
+        """
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.candidates_dir = self.root / "by_candidate"
+        self.index_path = self.root / "index.json"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = FileLock(self.root / "index.lock")
+        self._index = {"resumes": {}, "attachments": {}}
+        self._signature = None
+        self._load()
+
+    def _current_signature(self):
+        try:
+            stat = self.index_path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _load(self):
+        """Reload the index if another process changed it"""
+        signature = self._current_signature()
+        if signature is None or signature == self._signature:
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self._index = json.load(f)
+            self._signature = signature
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading resume index {self.index_path}: {e}")
+
+    def _save(self):
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.index_path)
+        self._signature = self._current_signature()
+
+    @staticmethod
+    def _attachment_key(candidate_id, fingerprint):
+        return f"{candidate_id}\x1f{fingerprint}"
+
+    def has_resume(self, candidate_id, attachment_fingerprint):
+        """
+        Whether an attachment of a candidate's chat is already stored
+
+        Args:
+            candidate_id: Candidate identifier
+            attachment_fingerprint: From attachment_fingerprint()
+
+        Returns:
+            bool: True if the attachment was stored before
+        """
+        self._load()
+        sha256 = self._index["attachments"].get(
+            self._attachment_key(candidate_id, attachment_fingerprint))
+        return sha256 is not None and (self.root / self._index["resumes"][sha256]["file"]).exists()
+
+    def add(self, path, candidate_id, source="boss", attachment_fingerprint=None,
+            original_name=None):
+        """
+        Move a downloaded resume into the store
+
+        The file at `path` is consumed: it becomes the stored object, or is
+        deleted when the store already holds the same content.
+
+        Args:
+            path: Downloaded file
+            candidate_id: Candidate the resume belongs to
+            source: Platform the resume came from
+            attachment_fingerprint: Fingerprint of the chat attachment, for has_resume()
+            original_name: Name the file was served or downloaded under, if
+                `path` was renamed since (defaults to the name of `path`)
+
+        Returns:
+            str: SHA-256 hash of the resume
+        """
+        path = Path(path)
+        sha256 = file_sha256(path)
+        mime_type = guess_mime_type(path)
+        suffix = path.suffix.lower() or mimetypes.guess_extension(mime_type) or ""
+        now = time.time()
+
+        with self._lock:
+            self._load()
+            entry = self._index["resumes"].get(sha256)
+            if entry is None:
+                relative = Path("objects") / sha256[:2] / f"{sha256}{suffix}"
+                (self.root / relative).parent.mkdir(parents=True, exist_ok=True)
+                entry = self._index["resumes"][sha256] = {
+                    "file": relative.as_posix(),
+                    "size": path.stat().st_size,
+                    "mime_type": mime_type,
+                    "candidates": [],
+                    "sources": [],
+                    "names": [],
+                    "first_seen": now,
+                    "last_seen": now
+                }
+                os.replace(path, self.root / relative)
+                logger.info(f"Stored new resume {sha256[:12]} for candidate {candidate_id}")
+            else:
+                path.unlink()
+                entry["last_seen"] = now
+                logger.info(f"Resume {sha256[:12]} already stored, linked to candidate {candidate_id}")
+
+            for field, value in (("candidates", candidate_id), ("sources", source),
+                                 ("names", original_name or path.name)):
+                if value not in entry[field]:
+                    entry[field].append(value)
+            if attachment_fingerprint:
+                self._index["attachments"][
+                    self._attachment_key(candidate_id, attachment_fingerprint)] = sha256
+
+            self._link(sha256, entry, candidate_id)
+            self._save()
+        return sha256
+
+    def _link(self, sha256, entry, candidate_id):
+        """Hard-link a stored object into the candidate's folder"""
+        object_path = self.root / entry["file"]
+        link_path = self.candidates_dir / candidate_id / object_path.name
+        if link_path.exists():
+            return
+        link_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(object_path, link_path)
+        except OSError as e:
+            logger.warning(f"Could not link resume {sha256[:12]} for candidate {candidate_id}: {e}")
+
+    def get(self, sha256):
+        """
+        Metadata of a stored resume, with its absolute "path"
+
+        Returns:
+            dict: Index entry, or None if the hash is not stored
+        """
+        self._load()
+        entry = self._index["resumes"].get(sha256)
+        if entry is None:
+            return None
+        return {**entry, "sha256": sha256, "path": self.root / entry["file"]}
+
+    def resumes_for(self, candidate_id):
+        """
+        Metadata of every resume stored for a candidate, oldest first
+
+        Returns:
+            list: Entries as returned by get()
+        """
+        self._load()
+        return sorted((self.get(sha256) for sha256, entry in self._index["resumes"].items()
+                       if candidate_id in entry["candidates"]),
+                      key=lambda entry: entry["first_seen"])
+
+    def hashes_by_candidate(self):
+        """
+        Hashes of the stored resumes of every candidate, in one pass over
+        the index
+
+        Returns:
+            dict: {candidate_id: [sha256, ...]}, oldest first
+        """
+        self._load()
+        by_candidate = {}
+        for sha256, entry in sorted(self._index["resumes"].items(),
+                                    key=lambda item: item[1]["first_seen"]):
+            for candidate_id in entry["candidates"]:
+                by_candidate.setdefault(candidate_id, []).append(sha256)
+        return by_candidate
@@ -4,9 +4,13 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from utils.logger import logger
+from scraper_agents.boss_hr.candidate_db import CandidateDatabase
+from scraper_agents.boss_hr.page_scripts import SEARCH_RESULTS_XPATH, extract_search_cards
+from scraper_agents.boss_hr.page_waits import wait_until_ready
+from scraper_agents.boss_hr.random_sleep import pace
 
 
-def search_candidate(driver, keyword="前端开发工程师·合肥"):
+def search_candidate(driver, keyword="前端开发工程师·合肥", capture=None):
     try:
         logger.info("Beginning job search process")
 
@@ -28,7 +32,7 @@ def search_candidate(driver, keyword="前端开发工程师·合肥"):
                     # Try to find the search input in this iframe
                     search_input = locate_search_input(driver, wait)
                     if search_input:
-                        enter_search_text(driver, wait, search_input, keyword)
+                        enter_search_text(driver, wait, search_input, keyword, capture)
                         return
                     # Switch back to main content to try next iframe
                     driver.switch_to.default_content()
@@ -37,7 +41,7 @@ def search_candidate(driver, keyword="前端开发工程师·合肥"):
                     driver.switch_to.default_content()
 
         # If we found the input, enter the text
-        enter_search_text(driver, wait, search_input, keyword)
+        enter_search_text(driver, wait, search_input, keyword, capture)
 
     except Exception as e:
         logger.critical(f"Error in search process: {e}", exc_info=True)
@@ -158,7 +162,7 @@ def locate_search_input(driver, wait):
     return None
 
 
-def enter_search_text(driver, wait, search_input, keyword):
+def enter_search_text(driver, wait, search_input, keyword, capture=None):
     """Enter text into the search input with multiple fallback strategies"""
     try:
         # Try to scroll the element into view first
@@ -257,6 +261,10 @@ def enter_search_text(driver, wait, search_input, keyword):
                     logger.info(
                         "Found search button without specific data-v attribute")
 
+            # Only a search response from this click should be used
+            if capture:
+                capture.clear("search")
+
             # Try JavaScript click if we found the button
             if search_button:
                 try:
@@ -288,8 +296,10 @@ def enter_search_text(driver, wait, search_input, keyword):
                         arguments[0].dispatchEvent(event);
                     """, search_input)
 
-            # Wait for search results or page change
-            time.sleep(30)  # Delay to allow search to initiate
+            # Wait for the result list to render and settle instead of a
+            # fixed 30s sleep
+            wait_until_ready(driver, SEARCH_RESULTS_XPATH, timeout=30)
+            pace("after_search")
             try:
                 # Check if URL changed or search results appeared
                 WebDriverWait(driver, 5).until(
@@ -302,7 +312,7 @@ def enter_search_text(driver, wait, search_input, keyword):
                     "Couldn't confirm search initiated, proceeding anyway")
 
             logger.info("Search initiated")
-            extract_candidate_information(driver)
+            extract_candidate_information(driver, capture=capture)
 
             return True
         except Exception as e:
@@ -321,24 +331,39 @@ def send_keys_with_delay(element, text, delay=0.09):
         time.sleep(delay)
 
 
-def extract_candidate_information(driver):
+def extract_candidate_information(driver, db=None, capture=None):
     """
     Extract and log candidate information from search results
 
     This function extracts key details about candidates from the search results
-    using specific XPath selectors, and logs the information.
+    in a single script call using the selector map in page_scripts, logs the
+    information and registers each candidate in the database, where they are
+    matched against candidates already found on other platforms or in chat.
+
+    Args:
+        driver: Selenium WebDriver instance
+        db: CandidateDatabase to register candidates in (opened if omitted)
+        capture: Started NetworkCapture; the search response it captured is
+            used instead of the page when there is one
     """
     logger.info("Extracting candidate information from search results")
 
     try:
+        if db is None:
+            db = CandidateDatabase()
+
         # Wait for candidate list to be present
         wait = WebDriverWait(driver, 30)
-        candidate_container = wait.until(EC.presence_of_element_located(
-            (By.XPATH, '//*[@id="is-gray-batch-chat"]/div[1]')
-        ))
+        wait.until(EC.presence_of_element_located((By.XPATH, SEARCH_RESULTS_XPATH)))
 
-        # Find all candidate items (list items)
-        candidate_items = candidate_container.find_elements(By.XPATH, './li')
+        # Prefer the captured search response; otherwise read every card
+        # in one round trip instead of one per field
+        captured = capture.take("search") if capture else None
+        if captured:
+            logger.info(f"Using captured search response: {captured[0]}")
+            candidate_items = captured[1]
+        else:
+            candidate_items = extract_search_cards(driver)
 
         if not candidate_items:
             logger.warning("No candidate items found in the search results")
@@ -347,56 +372,14 @@ def extract_candidate_information(driver):
         logger.info(
             f"Found {len(candidate_items)} candidates in search results")
 
-        # Extract information for each candidate
-        for index, candidate in enumerate(candidate_items):
+        # Log and register each candidate
+        for index, card in enumerate(candidate_items):
             try:
-                # Extract name, job title, experience, etc.
-                candidate_data = {}
-
-                # Basic candidate info (name)
-                try:
-                    candidate_name = candidate.find_element(
-                        By.XPATH, './/div[2]/div/div[2]/div/div[1]/div[1]/span[1]').text
-                    candidate_data["candidate_name"] = candidate_name
-                except Exception as e:
-                    logger.debug(
-                        f"Could not extract basic info for candidate {index+1}: {e}")
-
-                # Education
-                try:
-                    education = candidate.find_element(
-                        By.XPATH, './/div[2]/div/div[2]/div/div[1]/div[2]/span[3]').text
-                    candidate_data["education"] = education
-                except Exception as e:
-                    logger.debug(
-                        f"Could not extract education for candidate {index+1}: {e}")
-
-                # Current location
-                try:
-                    current_location = candidate.find_element(
-                        By.XPATH, './/div[2]/div/div[2]/div/div[2]/ul[1]/li/span[2]').text
-                    candidate_data["current_location"] = current_location
-                except Exception as e:
-                    logger.debug(
-                        f"Could not extract current position for candidate {index+1}: {e}")
-
-                # Age
-                try:
-                    age = candidate.find_element(
-                        By.XPATH, './/div[2]/div/div[2]/div/div[1]/div[2]/span[1]').text
-                    candidate_data["age"] = age
-                except Exception as e:
+                candidate_data = {key: value for key, value in card.items() if value is not None}
+                missing = [key for key, value in card.items() if value is None]
+                if missing:
                     logger.debug(
-                        f"Could not extract age for candidate {index+1}: {e}")
-
-                # Age
-                try:
-                    degree_duration = candidate.find_element(
-                        By.XPATH, './/div[2]/div/div[2]/div/div[1]/div[2]/span[2]').text
-                    candidate_data["degree_duration"] = degree_duration
-                except Exception as e:
-                    logger.debug(
-                        f"Could not extract degree_duration for candidate {index+1}: {e}")
+                        f"Could not extract {', '.join(missing)} for candidate {index+1}")
 
                 # Log the complete candidate information
                 logger.info(f"Candidate {index+1} Information:")
@@ -405,6 +388,10 @@ def extract_candidate_information(driver):
                         f"  • {key.replace('_', ' ').title()}: {value}")
                 logger.info("---")
 
+                if candidate_data.get("candidate_name"):
+                    candidate_id = db.register_candidate(candidate_data, source="search")
+                    logger.debug(f"Registered candidate {index+1} as {candidate_id}")
+
             except Exception as e:
                 logger.error(
                     f"Error extracting information for candidate {index+1}: {e}")
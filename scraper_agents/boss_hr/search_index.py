@@ -0,0 +1,160 @@
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from operator import itemgetter
+
+# ASCII words (keeping the symbols of names like c++, c#, node.js) and runs
+# of CJK ideographs
+_TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*|[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+
+
+def tokenize(text):
+    """
+    Split text into search terms: lowercase ASCII words and CJK bigrams
+    (a lone CJK character is kept as a unigram)
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        list: Terms in text order
+    """
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKC", text).lower()
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(text):
+        run = match.group()
+        if run[0].isascii():
+            tokens.append(run.rstrip("."))
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+class SearchIndex:
+    """
+    In-memory inverted index over candidate text.
+
+    Each candidate is one document made of their messages and their preview
+    text. Postings map a term to {candidate id: term frequency}; queries
+    match candidates holding every query term and rank them with BM25.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self._postings = defaultdict(dict)
+        self._lengths = {}
+        self._total_length = 0
+        self._previews = {}
+
+    def __len__(self):
+        return len(self._lengths)
+
+    def add(self, candidate_id, text):
+        """Index a piece of text (e.g. a message) under a candidate"""
+        self._update(candidate_id, tokenize(text), 1)
+
+    def remove(self, candidate_id, text):
+        """Remove a piece of text previously added for a candidate"""
+        self._update(candidate_id, tokenize(text), -1)
+
+    def set_preview(self, candidate_id, text):
+        """Index a candidate's preview text, replacing the previous one"""
+        previous = self._previews.get(candidate_id)
+        if previous == text:
+            return
+        if previous:
+            self.remove(candidate_id, previous)
+        if text:
+            self.add(candidate_id, text)
+            self._previews[candidate_id] = text
+        else:
+            self._previews.pop(candidate_id, None)
+
+    def _update(self, candidate_id, tokens, sign):
+        if not tokens:
+            return
+        for term, count in Counter(tokens).items():
+            posting = self._postings[term]
+            frequency = posting.get(candidate_id, 0) + sign * count
+            if frequency > 0:
+                posting[candidate_id] = frequency
+            else:
+                posting.pop(candidate_id, None)
+                if not posting:
+                    del self._postings[term]
+
+        length = self._lengths.get(candidate_id, 0) + sign * len(tokens)
+        self._total_length += sign * len(tokens)
+        if length > 0:
+            self._lengths[candidate_id] = length
+        else:
+            self._lengths.pop(candidate_id, None)
+
+    def search(self, query, limit=10, allowed=None):
+        """
+        Candidates whose text holds every term of the query, best match first
+
+        Args:
+            query: Search text, tokenized like the indexed text
+            limit: Maximum number of results
+            allowed: Optional container of candidate ids to restrict to
+
+        Returns:
+            list: (candidate_id, score) tuples
+        """
+        terms = set(tokenize(query))
+        if not terms or not self._lengths:
+            return []
+
+        postings = []
+        for term in terms:
+            posting = self._postings.get(term)
+            if not posting:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+
+        # Intersect from the shortest list; probe the filter instead when it
+        # is the smaller side
+        if allowed is not None and len(allowed) < len(postings[0]):
+            matches = [cid for cid in allowed
+                       if all(cid in posting for posting in postings)]
+        else:
+            matches = postings[0].keys()
+            for posting in postings[1:]:
+                matches = matches & posting.keys()
+            if isinstance(allowed, dict):
+                matches = matches & allowed.keys()
+            elif allowed is not None:
+                matches = [cid for cid in matches if cid in allowed]
+        if not matches:
+            return []
+
+        documents = len(self._lengths)
+        lengths = self._lengths
+        # BM25 with the length normalization folded into two constants:
+        # tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / average))
+        base = self.K1 * (1 - self.B)
+        slope = self.K1 * self.B * documents / self._total_length
+        weights = [(posting, (self.K1 + 1) * math.log(
+            1 + (documents - len(posting) + 0.5) / (len(posting) + 0.5)))
+            for posting in postings]
+
+        if len(weights) == 1:
+            (posting, weight), = weights
+            scored = ((cid, weight * posting[cid] / (posting[cid] + base + slope * lengths[cid]))
+                      for cid in matches)
+        else:
+            scored = ((cid, sum(weight * posting[cid] /
+                                (posting[cid] + base + slope * lengths[cid])
+                                for posting, weight in weights))
+                      for cid in matches)
+        return heapq.nlargest(limit, scored, key=itemgetter(1))
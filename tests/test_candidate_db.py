@@ -0,0 +1,75 @@
+import multiprocessing
+
+import pytest
+
+from scraper_agents.boss_hr.candidate_db import CandidateDatabase, message_fingerprint
+
+WRITERS = 4
+CANDIDATES_PER_WRITER = 15
+
+
+def open_db(tmp_path, backend):
+    suffix = ".db" if backend == "sqlite" else ".json"
+    return CandidateDatabase(tmp_path / f"candidates{suffix}", backend=backend, backups=False)
+
+
+def _write(db_file, backend, writer):
+    db = CandidateDatabase(db_file, backend=backend, backups=False)
+    for i in range(CANDIDATES_PER_WRITER):
+        candidate_id = f"w{writer}-c{i}"
+        with db.transaction():
+            db.add_or_update_candidate(candidate_id, f"Candidate {writer}-{i}")
+            db.record_message(candidate_id, "outbound", "请发一份简历",
+                              fingerprint=message_fingerprint("outbound", "请发一份简历", 0))
+        # Every writer also touches a shared record
+        with db.transaction():
+            db.add_or_update_candidate("shared", "Shared", extra_info={f"w{writer}": i})
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite", "journal"])
+def test_concurrent_writers_lose_no_updates(tmp_path, backend):
+    db = open_db(tmp_path, backend)
+    context = multiprocessing.get_context("fork")
+    writers = [context.Process(target=_write, args=(db.db_path, backend, writer))
+               for writer in range(WRITERS)]
+    for process in writers:
+        process.start()
+    for process in writers:
+        process.join(timeout=120)
+        assert process.exitcode == 0
+
+    db = open_db(tmp_path, backend)
+    candidates = db.db["candidates"]
+    for writer in range(WRITERS):
+        for i in range(CANDIDATES_PER_WRITER):
+            candidate_id = f"w{writer}-c{i}"
+            assert candidate_id in candidates
+            assert len(db.get_candidate_messages(candidate_id)) == 1
+    assert candidates["shared"].extra_info == {
+        f"w{writer}": CANDIDATES_PER_WRITER - 1 for writer in range(WRITERS)}
+    assert db.db["stats"]["messages_sent"] == WRITERS * CANDIDATES_PER_WRITER
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite", "journal"])
+def test_transaction_without_changes_does_not_save(tmp_path, monkeypatch, backend):
+    db = open_db(tmp_path, backend)
+    db.add_or_update_candidate("a", "张三")
+    db.record_message("a", "inbound", "你好", fingerprint="f1")
+
+    saves = []
+    monkeypatch.setattr(db.storage, "save", lambda *args: saves.append(args))
+    with db.transaction():
+        db.get_candidate_by_id("a")
+        db.record_message("a", "inbound", "你好", fingerprint="f1")
+    assert saves == []
+
+    with db.transaction():
+        db.record_message("a", "inbound", "在吗", fingerprint="f2")
+    assert len(saves) == 1
+
+
+def test_record_message_for_unknown_candidate_is_not_stored(tmp_path):
+    db = open_db(tmp_path, "json")
+    assert db.record_message("missing", "inbound", "你好") is False
+    assert len(db.db["message_history"]) == 0
+    assert list(db.get_candidate_messages("missing")) == []
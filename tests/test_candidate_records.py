@@ -0,0 +1,110 @@
+import json
+
+import pytest
+
+from scraper_agents.boss_hr.candidate_records import (
+    CandidateRecord, CandidateStatus, LazyCandidates, MessageDirection, MessageRecord, to_epoch,
+    to_iso)
+from scraper_agents.boss_hr.db_storage import encode_record
+
+CANDIDATE = {
+    "name": "张三", "status": "resume_received", "source": "search",
+    "first_seen": "2026-01-05T10:00:00", "last_updated": "2026-01-06T09:30:00.250000",
+    "resume_received": True, "resume_requested": True,
+    "last_message_sent": "2026-01-05T10:01:00", "last_message_received": None,
+    "follow_up_count": 1, "extra_info": {"tags": ["python"]}, "notes": "",
+}
+MESSAGE = {"candidate_id": "c1", "direction": "inbound", "content": "附件简历",
+           "timestamp": "2026-01-05T10:02:00", "has_resume": True, "fingerprint": "f1", "seq": 3}
+
+
+def test_epoch_and_iso_conversions():
+    epoch = to_epoch("2026-01-05T10:00:00.500000")
+    assert isinstance(epoch, float)
+    assert to_iso(epoch) == "2026-01-05T10:00:00.500000"
+    assert to_epoch(epoch) == epoch and to_epoch(None) is None and to_iso(None) is None
+
+
+def test_candidate_round_trip():
+    record = CandidateRecord.from_dict(CANDIDATE)
+    assert record.status is CandidateStatus.RESUME_RECEIVED
+    assert record.first_seen == to_epoch("2026-01-05T10:00:00")
+    assert record.to_dict() == CANDIDATE
+    assert json.loads(json.dumps(record, default=encode_record, ensure_ascii=False)) == CANDIDATE
+    assert record == CANDIDATE and record == CandidateRecord.from_dict(dict(CANDIDATE))
+
+
+def test_candidate_defaults_and_unknown_status():
+    record = CandidateRecord.from_dict({"name": "李四", "status": "on_hold"})
+    assert record.status == "on_hold" and not isinstance(record.status, CandidateStatus)
+    assert record["status"] == "on_hold"
+    assert (record.source, record.follow_up_count, record.extra_info, record.notes) == (
+        "chat", 0, {}, "")
+    # Every record gets its own extra_info dict
+    assert CandidateRecord(name="王五").extra_info is not record.extra_info
+
+    record["status"] = "qualified"
+    assert record.status is CandidateStatus.QUALIFIED
+
+
+def test_dict_view():
+    record = CandidateRecord.from_dict(CANDIDATE)
+    assert record["first_seen"] == "2026-01-05T10:00:00"
+    assert record["status"] == "resume_received" and type(record["status"]) is str
+    assert record.get("notes") == "" and record.get("missing", 1) == 1
+    assert "name" in record and "missing" not in record
+    assert list(record.keys()) == list(CANDIDATE) and dict(record.items()) == CANDIDATE
+    with pytest.raises(KeyError):
+        record["missing"]
+    with pytest.raises(KeyError):
+        record["missing"] = 1
+
+    record["last_message_received"] = "2026-01-07T08:00:00"
+    assert record.last_message_received == to_epoch("2026-01-07T08:00:00")
+
+    clone = record.clone()
+    clone.extra_info["tags"] = []
+    assert record.extra_info == {"tags": ["python"]} and clone.name == "张三"
+
+
+def test_message_round_trip():
+    record = MessageRecord.from_dict(MESSAGE)
+    assert record.direction is MessageDirection.INBOUND
+    assert record.to_dict() == MESSAGE
+    assert json.loads(json.dumps(record, default=encode_record, ensure_ascii=False)) == MESSAGE
+    assert MessageRecord.from_dict({**MESSAGE, "direction": "system"})["direction"] == "system"
+    assert MessageRecord(candidate_id="c1", direction="outbound").has_resume is False
+    assert record != CandidateRecord.from_dict(CANDIDATE)
+
+
+class RowStorage:
+    def __init__(self, rows):
+        self.rows = rows
+        self.loads = []
+
+    def load_candidate(self, candidate_id):
+        self.loads.append(candidate_id)
+        return self.rows.get(candidate_id)
+
+
+def test_lazy_candidates_load_on_first_access():
+    storage = RowStorage({"c1": CANDIDATE})
+    index_rows = [("c1", "resume_received", True, True, None, 1), ("gone", "new", 0, 0, None, 0)]
+    candidates = LazyCandidates(storage, index_rows)
+
+    assert list(candidates) == ["c1", "gone"] and len(candidates) == 2 and "c1" in candidates
+    assert storage.loads == []
+    assert candidates["c1"].status is CandidateStatus.RESUME_RECEIVED
+    assert candidates["c1"] is candidates["c1"] and storage.loads == ["c1"]
+    with pytest.raises(KeyError):
+        candidates["gone"]
+    with pytest.raises(KeyError):
+        candidates["never"]
+
+    candidates["c2"] = CandidateRecord(name="李四")
+    assert candidates["c2"].name == "李四" and "c2" not in storage.loads
+    del candidates["c1"]
+    assert list(candidates) == ["gone", "c2"]
+
+    assert candidates.take_index_rows() == index_rows
+    assert candidates.take_index_rows() is None
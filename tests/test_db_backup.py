@@ -0,0 +1,140 @@
+import copy
+import gzip
+import json
+from datetime import datetime
+
+import pytest
+
+from scraper_agents.boss_hr import db_backup
+from scraper_agents.boss_hr.candidate_db import CandidateDatabase
+from scraper_agents.boss_hr.db_backup import BackupManager
+
+
+class MemoryStorage:
+    """Database snapshots served from a dict"""
+
+    def __init__(self, path):
+        self.path = path
+        self.db = {"candidates": {}, "stats": {"messages_sent": 0}, "message_history": []}
+
+    def read_snapshot(self):
+        return copy.deepcopy(self.db)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    class Clock(datetime):
+        current = None
+
+        @classmethod
+        def now(cls, tz=None):
+            return cls.current
+
+    monkeypatch.setattr(db_backup, "datetime", Clock)
+    return Clock
+
+
+def add_candidate(storage, candidate_id, message):
+    storage.db["candidates"][candidate_id] = {"id": candidate_id, "name": candidate_id,
+                                               "status": "contacted"}
+    storage.db["message_history"].append({"candidate_id": candidate_id, "direction": "outbound",
+                                          "content": message, "timestamp": 1.0})
+    storage.db["stats"]["messages_sent"] += 1
+
+
+def test_snapshots_chain_prune_and_restore(tmp_path, clock):
+    storage = MemoryStorage(tmp_path / "candidates.json")
+    manager = BackupManager(storage, deltas=True, full_every=2, daily=1, weekly=2)
+    taken = {}
+
+    def snapshot(label, when):
+        clock.current = datetime.fromisoformat(when)
+        entry = manager.snapshot()
+        taken[label] = (entry, storage.read_snapshot())
+        # Every snapshot rebuilds to the database it was taken from
+        assert manager.load_snapshot() == taken[label][1]
+        return entry
+
+    def kept():
+        return [next(label for label, (entry, _) in taken.items() if entry["file"] == kept_entry["file"])
+                for kept_entry in manager.load_manifest()]
+
+    add_candidate(storage, "a", "请发一份简历")
+    assert snapshot("A", "2026-01-05T10:00:00")["kind"] == "full"
+
+    add_candidate(storage, "b", "你好")
+    storage.db["candidates"]["a"]["status"] = "resume_received"
+    b = snapshot("B", "2026-01-05T11:00:00")
+    assert (b["kind"], b["base"]) == ("delta", taken["A"][0]["file"])
+    document = json.loads(gzip.decompress((manager.backup_dir / b["file"]).read_bytes()))
+    assert set(document["candidates"]) == {"a", "b"} and len(document["messages"]) == 1
+    # A delta keeps the snapshot it is built on, even from the same day
+    assert kept() == ["A", "B"]
+
+    del storage.db["candidates"]["b"]
+    assert snapshot("C", "2026-01-06T10:00:00")["kind"] == "full"
+    assert kept() == ["C"]
+    assert not (manager.backup_dir / taken["A"][0]["file"]).exists()
+
+    add_candidate(storage, "c", "请发一份简历")
+    assert snapshot("D", "2026-01-13T10:00:00")["kind"] == "delta"
+    assert snapshot("E", "2026-01-14T10:00:00")["kind"] == "full"
+    # The newest day plus the newest snapshot of the two newest weeks
+    assert kept() == ["C", "E"]
+    assert manager.load_snapshot(taken["C"][0]["file"]) == taken["C"][1]
+
+    restored = manager.restore(tmp_path / "restored.db", taken["C"][0]["file"])
+    db = CandidateDatabase(restored, backups=False)
+    assert sorted(db.db["candidates"]) == ["a"]
+    assert len(db.db["message_history"]) == 2
+    with pytest.raises(FileExistsError):
+        manager.restore(restored)
+
+
+def test_deltas_record_removed_candidates(tmp_path, clock):
+    storage = MemoryStorage(tmp_path / "candidates.json")
+    manager = BackupManager(storage, deltas=True)
+    clock.current = datetime(2026, 1, 5, 10)
+    add_candidate(storage, "a", "你好")
+    add_candidate(storage, "b", "你好")
+    manager.snapshot()
+
+    del storage.db["candidates"]["b"]
+    clock.current = datetime(2026, 1, 5, 11)
+    entry = manager.snapshot()
+    document = json.loads(gzip.decompress((manager.backup_dir / entry["file"]).read_bytes()))
+    assert (document["kind"], document["removed"], document["candidates"]) == ("delta", ["b"], {})
+    assert manager.load_snapshot() == storage.read_snapshot()
+
+
+def test_corrupted_snapshot_is_rejected(tmp_path, clock):
+    storage = MemoryStorage(tmp_path / "candidates.json")
+    manager = BackupManager(storage)
+    clock.current = datetime(2026, 1, 5, 10)
+    add_candidate(storage, "a", "你好")
+    entry = manager.snapshot()
+
+    path = manager.backup_dir / entry["file"]
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        manager.load_snapshot()
+    with pytest.raises(FileNotFoundError):
+        manager.load_snapshot("missing.json.gz")
+    # Nothing is written from a corrupted snapshot
+    with pytest.raises(ValueError):
+        manager.restore(tmp_path / "restored.db")
+    assert not (tmp_path / "restored.db").exists()
+
+
+def test_database_requests_backups_in_the_background(tmp_path):
+    db = CandidateDatabase(tmp_path / "candidates.json", backups={"interval": 3600})
+    db.add_or_update_candidate("a", "张三")
+    db.close()
+
+    # One snapshot per interval, however many saves there were
+    [entry] = db.backups.load_manifest()
+    assert entry["kind"] == "full"
+    assert not db.backups.request()
+    assert BackupManager(db.storage, interval=3600).due() is False
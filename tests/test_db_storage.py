@@ -0,0 +1,108 @@
+import pytest
+
+from scraper_agents.boss_hr.candidate_db import CandidateDatabase
+from scraper_agents.boss_hr.candidate_records import CandidateStatus
+from scraper_agents.boss_hr.db_storage import (
+    JournalStorage, JSONStorage, SQLiteStorage, create_storage, migrate_json_to_sqlite)
+
+
+def populate(db):
+    with db.transaction():
+        for i in range(5):
+            db.add_or_update_candidate(f"c{i}", f"候选人{i}", extra_info={"tags": [f"t{i}"]})
+            db.record_message(f"c{i}", "outbound", "请发一份简历", fingerprint=f"out{i}")
+        db.record_message("c0", "inbound", "附件简历", has_resume=True, fingerprint="in0")
+
+
+def assert_populated(db):
+    assert len(db.db["candidates"]) == 5
+    assert db.get_candidate_by_id("c0").status is CandidateStatus.RESUME_RECEIVED
+    assert db.get_candidate_by_id("c1").status is CandidateStatus.CONTACTED
+    assert db.get_candidate_by_id("c3").extra_info == {"tags": ["t3"]}
+    assert [m.content for m in db.get_candidate_messages("c0")] == ["请发一份简历", "附件简历"]
+    assert db.db["stats"]["messages_sent"] == 5
+
+
+def test_create_storage_infers_backend_from_suffix(tmp_path):
+    assert isinstance(create_storage(tmp_path / "c.db"), SQLiteStorage)
+    assert isinstance(create_storage(tmp_path / "c.json"), JournalStorage)
+    assert isinstance(create_storage(tmp_path / "c.json", "json"), JSONStorage)
+    with pytest.raises(ValueError):
+        create_storage(tmp_path / "c.json", "csv")
+
+
+@pytest.mark.parametrize("backend, file_name", [("sqlite", "c.db"), ("journal", "c.json")])
+def test_backend_round_trip(tmp_path, backend, file_name):
+    db = CandidateDatabase(tmp_path / file_name, backend=backend, backups=False)
+    populate(db)
+    db.storage.close()
+
+    assert_populated(CandidateDatabase(tmp_path / file_name, backend=backend, backups=False))
+
+
+def test_sqlite_lazy_load(tmp_path):
+    populate(CandidateDatabase(tmp_path / "c.db", backups=False))
+
+    db = CandidateDatabase(tmp_path / "c.db", lazy=True, backups=False)
+    assert db.lazy
+    assert_populated(db)
+    db.record_message("c2", "inbound", "你好", fingerprint="in2")
+
+    reopened = CandidateDatabase(tmp_path / "c.db", backups=False)
+    assert reopened.get_candidate_by_id("c2").status is CandidateStatus.RESPONDED
+
+
+def test_journal_replays_after_compaction(tmp_path):
+    db = CandidateDatabase(tmp_path / "c.json", backend="journal", backups=False)
+    populate(db)
+    db.storage.compact()
+    db.add_or_update_candidate("c0", "候选人0", extra_info={"note": "after"})
+    db.storage.close()
+
+    reopened = CandidateDatabase(tmp_path / "c.json", backend="journal", backups=False)
+    assert_populated(reopened)
+    assert reopened.get_candidate_by_id("c0").extra_info["note"] == "after"
+    assert len(reopened.get_candidate_messages("c0")) == 2
+
+
+def test_other_instance_sees_saved_changes(tmp_path):
+    writer = CandidateDatabase(tmp_path / "c.db", backups=False)
+    reader = CandidateDatabase(tmp_path / "c.db", backups=False)
+    populate(writer)
+
+    reader.refresh()
+    assert_populated(reader)
+
+
+@pytest.mark.parametrize("backend", ["json", "journal"])
+def test_migrate_json_to_sqlite(tmp_path, backend):
+    populate(CandidateDatabase(tmp_path / "c.json", backend=backend, backups=False))
+
+    db = CandidateDatabase(tmp_path / "c.json", backend="sqlite", backups=False)
+    assert db.db_path == tmp_path / "c.db"
+    assert_populated(db)
+    # The JSON database is left in place
+    assert len(create_storage(tmp_path / "c.json", backend).read_snapshot()["candidates"]) == 5
+
+    migrate_json_to_sqlite(tmp_path / "c.json", tmp_path / "copy.db")
+    assert_populated(CandidateDatabase(tmp_path / "copy.db", backups=False))
+
+
+def test_default_save_cost_does_not_grow_with_the_database(tmp_path):
+    written = []
+    for size in (10, 1000):
+        db = CandidateDatabase(tmp_path / f"c{size}.json", backups=False)
+        with db.transaction():
+            for i in range(size):
+                db.add_or_update_candidate(f"c{i}", f"候选人{i}", extra_info={"tags": [f"t{i}"]})
+        db.storage.compact()
+        snapshot = db.storage.path.stat()
+        journal_size = db.storage.journal_path.stat().st_size if db.storage.journal_path.exists() else 0
+
+        db.record_message("c0", "inbound", "你好", fingerprint="f")
+        # The snapshot is left alone and only one small record is appended
+        assert db.storage.path.stat().st_mtime_ns == snapshot.st_mtime_ns
+        written.append(db.storage.journal_path.stat().st_size - journal_size)
+        db.storage.close()
+
+    assert abs(written[0] - written[1]) < 256
@@ -0,0 +1,94 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from scraper_agents.boss_hr import download_manager
+from scraper_agents.boss_hr.download_manager import DownloadManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return DownloadManager(tmp_path / "downloads", timeout=5, stable_seconds=0.1)
+
+
+def download_later(directory, name, chunks=3, delay=0.05):
+    """Write a file the way Chrome does: grow a .crdownload, then rename it"""
+    def run():
+        partial = directory / f"{name}.crdownload"
+        for i in range(chunks):
+            with open(partial, 'ab') as f:
+                f.write(b"%PDF" if i == 0 else b"-chunk")
+            time.sleep(delay)
+        partial.rename(directory / name)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+@pytest.mark.parametrize("inotify", [True, False])
+def test_partial_download_is_filed_once_finished(manager, monkeypatch, inotify):
+    if not inotify:
+        # Other platforms poll the folder instead
+        monkeypatch.setattr(download_manager, "sys", SimpleNamespace(platform="win32"))
+        assert not download_manager._DirectoryWatcher(manager.download_dir).uses_inotify
+
+    (manager.download_dir / "old.pdf").write_bytes(b"earlier download")
+    token = manager.begin()
+    writer = download_later(manager.download_dir, "简历.pdf")
+    path = manager.wait(token, "c1")
+    writer.join()
+
+    assert path == manager.target_dir / "c1_1.pdf"
+    assert path.read_bytes() == b"%PDF-chunk-chunk"
+    assert manager.original_names == {path: "简历.pdf"}
+    # Files already present before begin() are not taken
+    assert (manager.download_dir / "old.pdf").exists()
+    assert sorted(p.name for p in manager.download_dir.iterdir()) == ["old.pdf", "resumes"]
+
+
+def test_file_with_a_partial_twin_is_not_taken(manager):
+    token = manager.begin()
+    (manager.download_dir / "r.pdf").write_bytes(b"%PDF")
+    (manager.download_dir / "r.pdf.crdownload").write_bytes(b"%PDF-more")
+    (manager.download_dir / "chrome.lock").write_bytes(b"")
+
+    assert manager.wait(token, "c1", timeout=0.4) is None
+    assert (manager.download_dir / "r.pdf").exists()
+
+    (manager.download_dir / "r.pdf.crdownload").unlink()
+    assert manager.wait(token, "c1", timeout=2) == manager.target_dir / "c1_1.pdf"
+
+
+def test_claim_never_overwrites_a_filed_resume(manager):
+    (manager.target_dir / "c1_1.pdf").write_bytes(b"first")
+    (manager.download_dir / "r.pdf").write_bytes(b"second")
+
+    assert manager._claim("r.pdf", "c1") == manager.target_dir / "c1_2.pdf"
+    assert (manager.target_dir / "c1_1.pdf").read_bytes() == b"first"
+    assert manager._claim("r.pdf", "c1") is None
+
+
+def test_racing_claimers_take_a_file_once(tmp_path):
+    managers = [DownloadManager(tmp_path / "downloads") for _ in range(4)]
+    for round_number in range(20):
+        name = f"r{round_number}.pdf"
+        (managers[0].download_dir / name).write_bytes(b"%PDF")
+        barrier = threading.Barrier(len(managers))
+        claimed = []
+
+        def claim(manager):
+            barrier.wait()
+            claimed.append(manager._claim(name, f"c{round_number}"))
+
+        threads = [threading.Thread(target=claim, args=(m,)) for m in managers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert [path for path in claimed if path is not None] == [
+            managers[0].target_dir / f"c{round_number}_1.pdf"]
+    assert len(list(managers[0].target_dir.iterdir())) == 20
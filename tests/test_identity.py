@@ -0,0 +1,127 @@
+import hashlib
+
+import pytest
+
+from scraper_agents.boss_hr.candidate_db import CandidateDatabase
+from scraper_agents.boss_hr.identity import (
+    MATCH_SCORE, IdentityIndex, match_score, normalize_profile, profile_id)
+
+
+def test_normalize_profile():
+    profile = normalize_profile({
+        "candidate_name": "张 伟", "age": "28岁", "education": "本科", "current_location": "合肥市·蜀山区",
+        "degree_duration": "5年", "phone": "+86 138-0013-8000"})
+    assert profile == {"name": "张伟", "surname": "张", "masked": False, "age": 28,
+                       "education": "bachelor", "location": "合肥", "work_years": 5,
+                       "phone": "13800138000"}
+
+    masked = normalize_profile({"name": "李女士", "degree_duration": "应届生"})
+    assert masked == {"surname": "李", "masked": True, "gender": "female", "work_years": 0}
+    assert normalize_profile({"name": "Unknown", "age": "120"}) == {}
+
+
+@pytest.mark.parametrize("a, b", [
+    ({"name": "张先生", "age": 30}, {"name": "张女士", "age": 30}),
+    ({"name": "张伟", "age": 30}, {"name": "王伟", "age": 30}),
+    ({"name": "张伟", "age": 30}, {"name": "张伟", "age": 35}),
+    ({"name": "张伟", "education": "本科"}, {"name": "张伟", "education": "硕士"}),
+    ({"name": "张伟", "uid": "1"}, {"name": "张伟", "uid": "2"}),
+])
+def test_disagreeing_attributes_veto(a, b):
+    assert match_score(normalize_profile(a), normalize_profile(b)) == -1
+
+
+def test_shared_full_name_and_age_is_only_a_possible_duplicate():
+    a = normalize_profile({"name": "张伟", "age": "28岁"})
+    b = normalize_profile({"name": "张伟", "age": "29岁"})
+    assert match_score(a, b) == MATCH_SCORE - 1
+
+    a["education"] = b["education"] = "bachelor"
+    assert match_score(a, b) >= MATCH_SCORE
+    del a["education"], b["education"]
+    a["uid"] = b["uid"] = "42"
+    assert match_score(a, b) >= MATCH_SCORE
+
+
+def test_masked_names_need_a_strong_field():
+    masked = normalize_profile({"name": "张先生", "age": 30, "education": "本科", "location": "合肥"})
+    full = normalize_profile({"name": "张伟", "age": 30, "education": "本科", "location": "合肥"})
+    assert match_score(masked, full) == MATCH_SCORE - 1
+    assert match_score(full, dict(full)) >= MATCH_SCORE
+
+    masked["phone"] = full["phone"] = "13800138000"
+    assert match_score(masked, full) >= MATCH_SCORE
+
+
+def test_index_resolves_and_records_possible_duplicates():
+    index = IdentityIndex()
+    index.add("full", normalize_profile({"name": "张伟", "age": 30, "education": "本科"}))
+
+    assert index.resolve(normalize_profile({"name": "张伟", "age": 31, "education": "本科"})) == "full"
+    assert index.resolve(normalize_profile({"name": "张伟", "age": 31})) is None
+    masked = normalize_profile({"name": "张先生", "age": 30, "education": "本科"})
+    assert index.resolve(masked, exclude="masked") is None
+    assert index.possible_duplicates() == [(("full", "masked"), MATCH_SCORE - 1)]
+
+    index.remove("full")
+    assert "full" not in index
+    assert index.possible_duplicates() == []
+
+
+def test_profile_id_is_stable():
+    profile = normalize_profile({"name": "张伟", "age": 30, "education": "本科"})
+    assert profile_id(profile, "search") == profile_id(dict(profile), "search")
+    assert profile_id(profile, "search") != profile_id(profile, "chat")
+    # Profiles without a gender or uid keep the id they had before those fields
+    key = "search\x1f张伟\x1f张\x1f30\x1fbachelor\x1f"
+    assert profile_id(profile, "search") == hashlib.md5(key.encode("utf-8")).hexdigest()[:16]
+    assert (profile_id(normalize_profile({"name": "张先生", "age": 30}), "search") !=
+            profile_id(normalize_profile({"name": "张女士", "age": 30}), "search"))
+
+
+@pytest.fixture
+def db(tmp_path):
+    return CandidateDatabase(tmp_path / "candidates.json", backups=False)
+
+
+def test_register_candidate_merges_only_confident_matches(db):
+    first = db.register_candidate({"name": "张伟", "age": 30, "education": "本科"})
+    assert db.register_candidate({"name": "张伟", "age": 31, "education": "本科"}) == first
+
+    sir = db.register_candidate({"name": "张先生", "age": 30, "education": "本科"})
+    madam = db.register_candidate({"name": "张女士", "age": 30, "education": "本科"})
+    assert len({first, sir, madam}) == 3
+    assert db.register_candidate({"name": "张先生", "age": 30, "education": "本科"}) == sir
+
+    pairs = {pair for pair, _ in db.possible_duplicates()}
+    assert tuple(sorted((first, sir))) in pairs
+    assert tuple(sorted((sir, madam))) not in pairs
+    assert db.merge_duplicates() == 0
+
+    assert db.register_candidate({"name": "张伟", "age": "28岁"}) != \
+        db.register_candidate({"name": "张伟", "age": "29岁"})
+
+    with_phone = db.register_candidate({"name": "张先生", "age": 30, "phone": "13800138000"})
+    assert db.register_candidate({"name": "张伟", "age": 30, "phone": "13800138000"}) == with_phone
+
+
+def test_register_candidate_reuses_ids_stored_before_genders(db):
+    legacy = normalize_profile({"name": "张先生", "age": 30})
+    del legacy["gender"]
+    legacy_id = profile_id(legacy, "search")
+    db.add_or_update_candidate(legacy_id, "张先生", source="search", extra_info={"profile": legacy})
+
+    assert db.register_candidate({"name": "张先生", "age": 30}) == legacy_id
+    assert db.register_candidate({"name": "张先生", "age": 30}) == legacy_id
+    assert db.register_candidate({"name": "张女士", "age": 30}) != legacy_id
+
+
+def test_merged_ids_resolve_to_the_primary(db):
+    db.add_or_update_candidate("a", "张伟")
+    db.add_or_update_candidate("b", "张伟")
+    db.record_message("b", "inbound", "你好", fingerprint="f")
+    assert db.merge_candidates("a", "b")
+
+    assert db.resolve_candidate_id("b") == "a"
+    assert [m.content for m in db.get_candidate_messages("a")] == ["你好"]
+    assert db.merge_candidates("a", "b") is False
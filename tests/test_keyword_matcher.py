@@ -0,0 +1,49 @@
+import re
+
+from data_extract.keyword_matcher import KeywordMatcher, default_matcher, taxonomy_phrases
+
+
+def brute_force(phrases, text):
+    """Every occurrence of every phrase, with the matcher's whole-word rule"""
+    text = text.lower()
+    found = set()
+    for phrase, tags in phrases.items():
+        phrase = phrase.lower()
+        pattern = re.escape(phrase)
+        if phrase[0].isascii() and phrase[0].isalnum():
+            pattern = r"(?<![a-z0-9])" + pattern
+        if phrase[-1].isascii() and phrase[-1].isalnum():
+            pattern += r"(?![a-z0-9])"
+        for match in re.finditer(f"(?=({pattern}))", text):
+            found.add((match.start(), match.start() + len(phrase), tuple(tags)))
+    return found
+
+
+def test_scan_matches_brute_force_with_overlaps():
+    phrases = {"he": ["a"], "she": ["b"], "his": ["c"], "hers": ["d"], "测试": ["e"], "性能测试": ["f"]}
+    matcher = KeywordMatcher(phrases)
+    for text in ("ushers", "she said his hers", "性能测试和测试开发", "", "hehehe"):
+        assert set(matcher.scan(text)) == brute_force(phrases, text)
+
+
+def test_ascii_phrases_match_whole_words_only():
+    matcher = KeywordMatcher({"java": "skill:java", "c++": "skill:cpp"})
+    assert matcher.tags("熟悉javascript") == set()
+    assert matcher.tags("熟悉java和C++") == {"skill:java", "skill:cpp"}
+    assert matcher.tags("JAVA") == {"skill:java"}
+
+
+def test_tags_fold_width_and_skip_empty_texts():
+    matcher = KeywordMatcher({"python": ["skill:py", "lang"]})
+    assert matcher.tags(None, "", "ＰＹＴＨＯＮ") == {"skill:py", "lang"}
+
+
+def test_taxonomy_phrases_and_default_matcher():
+    phrases = taxonomy_phrases(skills={1: ["Python", "python"], 2: ["测试"]},
+                               intents={"resume": ["简历"]})
+    assert phrases["python"] == ["skill:1"]
+    assert phrases["简历"] == ["intent:resume"]
+    assert "经验不限" not in phrases
+
+    assert "intent:resume" in default_matcher().tags("这是我的简历")
+    assert default_matcher() is default_matcher()
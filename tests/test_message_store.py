@@ -0,0 +1,44 @@
+from scraper_agents.boss_hr.candidate_records import MessageRecord
+from scraper_agents.boss_hr.message_store import MessageStore
+
+
+def message(candidate_id, content):
+    return MessageRecord(candidate_id=candidate_id, direction="inbound", content=content,
+                         timestamp=1.0)
+
+
+def test_append_numbers_messages_per_candidate():
+    store = MessageStore()
+    for candidate_id, content in (("a", "1"), ("b", "1"), ("a", "2")):
+        store.append(message(candidate_id, content))
+
+    assert len(store) == 3
+    assert [m.seq for m in store] == [0, 0, 1]
+    assert [m.content for m in store.for_candidate("a")] == ["1", "2"]
+    assert store.count("a") == 2
+    assert store.count("missing") == 0
+    assert list(store.for_candidate("missing")) == []
+
+
+def test_candidate_view_is_not_a_copy():
+    store = MessageStore()
+    store.append(message("a", "1"))
+    view = store.for_candidate("a")
+    store.append(message("a", "2"))
+
+    assert len(view) == 2
+    assert view[-1].content == "2"
+    assert [m.content for m in view[:1]] == ["1"]
+
+
+def test_tail_slice_and_truncate():
+    store = MessageStore(message(cid, str(i)) for i, cid in enumerate("abab"))
+
+    assert [m.content for m in store.tail(2)] == ["2", "3"]
+    assert store.tail(0) == []
+    assert [m.content for m in store.slice_from(3)] == ["3"]
+
+    store.truncate(1)
+    assert [m.content for m in store] == ["0"]
+    assert store.count("b") == 0
+    assert store.append(message("b", "4")).seq == 0
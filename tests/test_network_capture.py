@@ -0,0 +1,170 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from scraper_agents.boss_hr.network_capture import (
+    NetworkCapture, align_chat_list, messages_after, parse_chat_list, parse_messages,
+    serve_recorded)
+
+CHAT_LIST_PATH = "/wapi/zprelation/friend/getBossFriendListV2.json"
+MESSAGES_PATH = "/wapi/zpchat/boss/historyMsg"
+
+CHAT_LIST = {"zpData": {"friendList": [
+    {"name": "张三", "uid": 7, "lastMsg": "简历发您了", "lastTime": "14:05", "unreadMsgCount": 2},
+    {"name": " 李四 ", "encryptUid": "e8", "lastText": "好的"},
+]}}
+MESSAGES = {"zpData": {"messages": [
+    {"mid": 3, "time": 3, "from": {"uid": 7}, "body": {"text": "好的"}},
+    {"mid": 1, "time": 1, "from": {"uid": 1}, "body": {"text": "请发一份简历"}, "read": True},
+    {"mid": 2, "time": 2, "from": {"uid": 7}, "pushText": "[简历]",
+     "body": {"resume": {"name": "张三.pdf", "url": "http://files.example/r.pdf"}}},
+    {"mid": 4, "time": 4, "from": {"uid": 7}, "body": {}},
+]}}
+
+
+class CDPDriver:
+    """Stand-in for a Chromium driver: pages loaded through it emit CDP events"""
+
+    def __init__(self, fetch):
+        self.fetch = fetch
+        self.listeners = {}
+        self.bodies = {}
+
+    def execute_cdp_cmd(self, command, params):
+        if command == "Network.getResponseBody":
+            return {"body": self.bodies[params["requestId"]]}
+        return {}
+
+    def add_cdp_listener(self, event, callback):
+        self.listeners[event] = callback
+
+    def load(self, url):
+        request_id = str(len(self.bodies))
+        self.bodies[request_id] = self.fetch(url)
+        self.listeners["Network.responseReceived"]({
+            "method": "Network.responseReceived",
+            "params": {"requestId": request_id, "response": {"url": url}}})
+        self.listeners["Network.loadingFinished"]({
+            "method": "Network.loadingFinished", "params": {"requestId": request_id}})
+
+
+def fetch_fixture(url):
+    return json.dumps(CHAT_LIST if "friend" in url else MESSAGES, ensure_ascii=False)
+
+
+def fetch_http(url):
+    with urllib.request.urlopen(url, timeout=5) as response:
+        return response.read().decode("utf-8")
+
+
+def test_parse_chat_list():
+    assert parse_chat_list(CHAT_LIST) == [
+        {"position": 0, "name": "张三", "preview": "简历发您了", "time": "14:05", "unread": 2,
+         "element_id": "7"},
+        {"position": 1, "name": "李四", "preview": "好的", "time": None, "unread": 0,
+         "element_id": "e8"},
+    ]
+    assert parse_chat_list({}) == []
+
+
+def test_parse_messages_orders_and_keys_like_the_page():
+    messages = parse_messages(MESSAGES, f"https://www.zhipin.com{MESSAGES_PATH}?gid=7&page=1")
+    assert [(m["sender"], m["text"]) for m in messages] == [
+        ("self", "请发一份简历"), ("candidate", "[简历]"), ("candidate", "好的")]
+    assert messages[0]["status"] == "已读"
+    assert messages[1]["has_attachment"] and messages[1]["attachment_url"] == "http://files.example/r.pdf"
+    assert messages[1]["key"] == "candidate\x1f[简历]\x1f张三.pdf"
+    assert [m["position"] for m in messages] == [0, 1, 2]
+
+    found = messages_after(messages, ["candidate\x1f[简历]\x1f张三.pdf"])
+    assert found["anchor_found"] and [m["text"] for m in found["messages"]] == ["好的"]
+    assert not messages_after(messages, ["self\x1f不存在\x1f"])["anchor_found"]
+
+
+def test_record_then_replay_from_local_stand_in(tmp_path):
+    record_dir = tmp_path / "recorded"
+
+    # Record the site's responses...
+    driver = CDPDriver(fetch_fixture)
+    recorder = NetworkCapture(driver, record_dir=record_dir)
+    assert recorder.start()
+    driver.load(f"https://www.zhipin.com{CHAT_LIST_PATH}")
+    driver.load(f"https://www.zhipin.com{MESSAGES_PATH}?gid=7")
+    driver.load("https://www.zhipin.com/wapi/other/unrelated.json")
+    recorded_list = recorder.take("chat_list")[1]
+    recorded_messages = recorder.take("messages")[1]
+    assert sorted(path.name for path in record_dir.iterdir()) == [
+        "wapi_zpchat_boss_historyMsg.json", "wapi_zprelation_friend_getBossFriendListV2.json.json"]
+
+    # ...and capture the same records from the local stand-in serving them
+    (record_dir / "r.pdf").write_bytes(b"%PDF-1.4")
+    server = serve_recorded(record_dir, port=0)
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        driver = CDPDriver(fetch_http)
+        capture = NetworkCapture(driver)
+        assert capture.start()
+        driver.load(f"{base}{CHAT_LIST_PATH}")
+        driver.load(f"{base}{MESSAGES_PATH}?gid=7")
+
+        assert capture.take("chat_list") == (f"{base}{CHAT_LIST_PATH}", recorded_list)
+        assert capture.take("messages")[1] == recorded_messages
+        assert capture.take("messages") is None
+        assert capture.attachment_url("张三.pdf 120KB") == "http://files.example/r.pdf"
+
+        with urllib.request.urlopen(f"{base}/r.pdf", timeout=5) as response:
+            assert response.read() == b"%PDF-1.4"
+            assert response.headers["Content-Type"] == "application/pdf"
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{base}/missing.json", timeout=5)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_without_cdp_nothing_is_captured():
+    class PlainDriver:
+        def execute_cdp_cmd(self, command, params):
+            raise RuntimeError("not a Chromium driver")
+
+    capture = NetworkCapture(PlainDriver())
+    assert not capture.start()
+    assert capture.take("chat_list") is None
+    assert capture.attachment_url("张三.pdf") is None
+
+
+def test_captured_chat_list_only_used_when_rows_line_up():
+    dom = [{"position": 0, "name": "张三", "preview": "", "time": "", "unread": 0, "element_id": "d1"},
+           {"position": 1, "name": "李四", "preview": "", "time": "", "unread": 0, "element_id": "d2"}]
+    aligned = align_chat_list(parse_chat_list(CHAT_LIST), dom)
+    assert [(a["element_id"], a["unread"]) for a in aligned] == [("d1", 2), ("d2", 0)]
+
+    assert align_chat_list(parse_chat_list(CHAT_LIST), dom[::-1]) is None
+    assert align_chat_list(parse_chat_list(CHAT_LIST), dom[:1]) is None
+
+
+def test_extract_chat_messages_falls_back_to_the_page():
+    pytest.importorskip("selenium")
+    pytest.importorskip("requests")
+    from scraper_agents.boss_hr.process_candidate_message import extract_chat_messages
+
+    page = {"messages": [{"position": 0, "sender": "candidate", "text": "在吗", "has_attachment": False,
+                          "attachment_name": None, "status": None, "key": "candidate\x1f在吗\x1f"}],
+            "anchor_found": False, "tail": ["candidate\x1f在吗\x1f"]}
+
+    class PageDriver:
+        def find_element(self, by, value):
+            return object()
+
+        def execute_script(self, script, *args):
+            return page
+
+    class StaleCapture:
+        def take(self, kind):
+            return ("captured", parse_messages(MESSAGES, f"{MESSAGES_PATH}?gid=7"))
+
+    # The capture's keys are not the page's, so the page is read
+    messages = extract_chat_messages(PageDriver(), capture=StaleCapture())
+    assert [(m["sender"], m["content"]) for m in messages] == [("candidate", "在吗")]
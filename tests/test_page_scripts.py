@@ -0,0 +1,122 @@
+import pytest
+
+from scraper_agents.boss_hr.candidate_db import CandidateDatabase
+from scraper_agents.boss_hr.page_scripts import (
+    ATTACHMENT_CARDS_JS, ATTACHMENT_SELECTORS, CHAT_SELECTORS, CURSOR_LENGTH, EXTRACT_INBOX_JS,
+    EXTRACT_SEARCH_CARDS_JS, INBOX_SELECTORS, SCROLL_CHAT_TOP_JS, SEARCH_CARD_SELECTORS,
+    SEARCH_RESULTS_XPATH, SNAPSHOT_CHAT_JS, attachment_cards, extract_search_cards, snapshot_chat,
+    snapshot_inbox)
+
+CARDS = [
+    {"candidate_name": "张三", "education": "本科", "current_location": "合肥",
+     "age": "28岁", "degree_duration": "5年"},
+    {"candidate_name": "李女士", "education": None, "current_location": None,
+     "age": "30岁", "degree_duration": None},
+    {"candidate_name": None, "education": None, "current_location": None,
+     "age": None, "degree_duration": None},
+]
+
+
+class ScriptDriver:
+    """Answers execute_script calls with canned extractor results"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = []
+
+    def execute_script(self, script, *args):
+        self.calls.append((script, args))
+        return self.results.pop(0)
+
+    def find_element(self, by, value):
+        return object()
+
+
+def test_search_cards_are_read_in_one_call():
+    driver = ScriptDriver(CARDS)
+    assert extract_search_cards(driver) == CARDS
+    assert driver.calls == [(EXTRACT_SEARCH_CARDS_JS, (SEARCH_RESULTS_XPATH, SEARCH_CARD_SELECTORS))]
+
+    assert extract_search_cards(ScriptDriver(None)) is None
+
+
+def test_search_cards_are_registered(tmp_path):
+    pytest.importorskip("selenium")
+    from scraper_agents.boss_hr.search_candidate import extract_candidate_information
+
+    db = CandidateDatabase(tmp_path / "candidates.json", backups=False)
+    assert extract_candidate_information(ScriptDriver(CARDS), db=db) is True
+
+    # Cards without a name are logged but not registered; missing fields
+    # are left out of the profile
+    names = sorted(candidate.name for candidate in db.db["candidates"].values())
+    assert names == ["张三", "李女士"]
+    [madam] = [c for c in db.db["candidates"].values() if c.name == "李女士"]
+    assert madam.extra_info["profile"] == {"surname": "李", "masked": True, "gender": "female",
+                                           "age": 30}
+
+    assert extract_candidate_information(ScriptDriver([]), db=db) is None
+
+
+def message(position, sender, text, attachment_name=None, status=None):
+    return {"position": position, "sender": sender, "text": text,
+            "has_attachment": attachment_name is not None, "attachment_name": attachment_name,
+            "status": status, "key": "\x1f".join([sender, text, attachment_name or ""])}
+
+
+def test_chat_and_inbox_snapshots_are_read_in_one_call():
+    snapshot = {"messages": [message(0, "self", "你好")], "anchor_found": False,
+                "tail": ["self\x1f你好\x1f"]}
+    driver = ScriptDriver(snapshot, [{"position": 0, "name": "张三"}], [{"text": "a.pdf", "url": None}])
+
+    assert snapshot_chat(driver, ["k"]) == snapshot
+    assert snapshot_inbox(driver, "list", "./li") == [{"position": 0, "name": "张三"}]
+    assert attachment_cards(driver, ["button"]) == [{"text": "a.pdf", "url": None}]
+    assert driver.calls == [
+        (SNAPSHOT_CHAT_JS, ({**CHAT_SELECTORS, "cursor_length": CURSOR_LENGTH}, ["k"])),
+        (EXTRACT_INBOX_JS, ("list", "./li", INBOX_SELECTORS)),
+        (ATTACHMENT_CARDS_JS, (["button"], ATTACHMENT_SELECTORS)),
+    ]
+
+    # Without a cursor the script gets an empty anchor
+    driver = ScriptDriver(snapshot)
+    snapshot_chat(driver)
+    assert driver.calls[0][1][1] == []
+
+
+def test_chat_snapshot_becomes_messages():
+    pytest.importorskip("selenium")
+    pytest.importorskip("requests")
+    from scraper_agents.boss_hr.process_candidate_message import extract_chat_messages
+
+    messages = [message(0, "self", "请发一份简历", status="已读"),
+                message(1, "candidate", "好的"),
+                message(2, "candidate", "", attachment_name="张三.pdf"),
+                message(3, "self", "收到", status="送达")]
+    snapshot = {"messages": messages, "anchor_found": False, "tail": []}
+
+    result = extract_chat_messages(ScriptDriver(snapshot))
+    assert [(m["sender"], m["content"]) for m in result] == [
+        ("self", "请发一份简历"), ("candidate", "好的"), ("candidate", " [附件: 张三.pdf]"),
+        ("self", "收到")]
+    assert result[0]["read"] and not result[3]["read"] and result[3]["status"] == "送达"
+    assert result[2]["has_attachment"] and result[2]["key"] == "candidate\x1f\x1f张三.pdf"
+    assert not any(m["after_cursor"] for m in result)
+
+
+def test_chat_history_is_scrolled_until_the_cursor_is_found():
+    pytest.importorskip("selenium")
+    pytest.importorskip("requests")
+    from scraper_agents.boss_hr.process_candidate_message import extract_chat_messages
+
+    older = message(0, "self", "请发一份简历")
+    newer = [message(1, "candidate", "好的"), message(2, "candidate", "稍等")]
+    first = {"messages": newer, "anchor_found": False, "tail": [m["key"] for m in newer]}
+    after_scroll = {"messages": newer, "anchor_found": True, "tail": first["tail"]}
+    driver = ScriptDriver(first, 2, after_scroll)
+
+    result = extract_chat_messages(driver, cursor=[older["key"]])
+    assert [script for script, _ in driver.calls] == [
+        SNAPSHOT_CHAT_JS, SCROLL_CHAT_TOP_JS, SNAPSHOT_CHAT_JS]
+    assert [m["content"] for m in result] == ["好的", "稍等"]
+    assert all(m["after_cursor"] for m in result)
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+from scraper_agents.boss_hr.page_waits import (
+    DEFAULT_SCRIPT_TIMEOUT, WAIT_FOR_STABLE_JS, wait_until_ready)
+
+
+class WaitDriver:
+    """Runs the readiness script by answering with a canned result or error"""
+
+    def __init__(self, result, script_timeout=12):
+        self.result = result
+        self.timeouts = SimpleNamespace(script=script_timeout)
+        self.script_timeouts = []
+        self.calls = []
+
+    def set_script_timeout(self, seconds):
+        self.script_timeouts.append(seconds)
+        if hasattr(self, "timeouts"):
+            self.timeouts.script = seconds
+
+    def execute_async_script(self, script, *args):
+        self.calls.append((script, args))
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def test_ready_page():
+    driver = WaitDriver({"ready": True, "elapsed": 42.0})
+    assert wait_until_ready(driver, "//div", timeout=2, quiet_ms=100) is True
+    assert driver.calls == [(WAIT_FOR_STABLE_JS, (["//div"], 100, 2000, False))]
+    # Raised for the wait, then put back
+    assert driver.script_timeouts == [7, 12]
+
+
+def test_timeout_and_absence():
+    driver = WaitDriver({"ready": False, "elapsed": 2000.0})
+    assert wait_until_ready(driver, ["//a", "//b"], timeout=2, absent=True) is False
+    assert driver.calls[0][1][0] == ["//a", "//b"] and driver.calls[0][1][3] is True
+    assert driver.timeouts.script == 12
+
+
+def test_script_timeout_is_restored_when_the_script_fails():
+    driver = WaitDriver(RuntimeError("script timeout"))
+    assert wait_until_ready(driver, "//div", timeout=2) is False
+    assert driver.script_timeouts == [7, 12]
+
+
+def test_default_script_timeout_when_the_driver_cannot_report_it():
+    driver = WaitDriver({"ready": True, "elapsed": 1.0})
+    del driver.timeouts
+    assert wait_until_ready(driver, "//div", timeout=2) is True
+    assert driver.script_timeouts == [7, DEFAULT_SCRIPT_TIMEOUT]
@@ -0,0 +1,96 @@
+import pytest
+
+pytest.importorskip("selenium")
+pytest.importorskip("requests")
+
+from scraper_agents.boss_hr.candidate_db import CandidateDatabase  # noqa: E402
+from scraper_agents.boss_hr.candidate_records import CandidateStatus  # noqa: E402
+from scraper_agents.boss_hr.process_candidate_message import (  # noqa: E402
+    CHAT_ID_SCHEME, apply_fetched_resumes, candidate_id_for, chat_message_key, inbox_state,
+    record_resume_request, rekey_legacy_chat_ids, select_changed_conversations,
+    send_resume_request)
+
+
+def item(position, name, element_id="", preview="", time="", unread=0):
+    return {"position": position, "name": name, "element_id": element_id,
+            "preview": preview, "time": time, "unread": unread}
+
+
+@pytest.fixture
+def db(tmp_path):
+    return CandidateDatabase(tmp_path / "candidates.json", backups=False)
+
+
+def test_candidate_id_is_stable_and_tells_same_names_apart():
+    assert candidate_id_for("张三", "42") == candidate_id_for("张三", "42")
+    assert len(candidate_id_for("张三", "42")) == 16
+    assert candidate_id_for("张三", "avatar:a.png") != candidate_id_for("张三", "avatar:b.png")
+    assert candidate_id_for("张三", "42") != candidate_id_for("李四", "42")
+
+
+def test_relative_time_does_not_reopen_a_chat(db):
+    entry = item(0, "张三", "42", preview="好的", time="14:05")
+    candidate_id = candidate_id_for("张三", "42")
+    db.add_or_update_candidate(candidate_id, "张三", extra_info={"inbox": inbox_state(entry)})
+
+    assert select_changed_conversations(db, [{**entry, "time": "昨天"}]) == []
+    assert len(select_changed_conversations(db, [{**entry, "preview": "简历发您了"}])) == 1
+    assert len(select_changed_conversations(db, [{**entry, "unread": 1}])) == 1
+
+
+def test_legacy_chat_ids_are_rekeyed_once(db):
+    db.add_or_update_candidate("old-zhang", "张三", source="chat",
+                               extra_info={"chat_cursor": {"keys": ["k"], "updated": 1}})
+    db.add_or_update_candidate("old-li-1", "李四", source="chat")
+    db.add_or_update_candidate("old-li-2", "李四", source="chat")
+    inbox = [item(0, "张三"), item(1, "李四", "avatar:li.png")]
+
+    assert rekey_legacy_chat_ids(db, inbox) == 1
+    new_id = candidate_id_for("张三", "")
+    assert db.resolve_candidate_id("old-zhang") == new_id
+    assert db.get_chat_cursor(new_id) == ["k"]
+    assert db.get_candidate_by_id(new_id).extra_info["chat_id_scheme"] == CHAT_ID_SCHEME
+    # Ambiguous names are left alone
+    assert db.resolve_candidate_id("old-li-1") == "old-li-1"
+
+    assert rekey_legacy_chat_ids(db, inbox) == 0
+
+
+class FinishedFetcher:
+    def __init__(self, results):
+        self.results = results
+
+    def take_results(self):
+        results, self.results = self.results, []
+        return results
+
+
+def test_fetched_resumes_are_applied_only_when_stored(db):
+    for candidate_id in ("ok", "failed"):
+        db.add_or_update_candidate(candidate_id, candidate_id,
+                                   extra_info={"inbox": {"preview": "[附件]", "unread": 0}})
+
+    apply_fetched_resumes(db, FinishedFetcher([("ok", "ab" * 32), ("failed", None)]))
+
+    assert db.get_candidate_by_id("ok").status is CandidateStatus.RESUME_RECEIVED
+    failed = db.get_candidate_by_id("failed")
+    assert not failed.resume_received
+    assert failed.extra_info["inbox"] is None
+
+
+def test_sent_resume_request_is_recorded_behind_the_cursor(db):
+    db.add_or_update_candidate("c1", "张三")
+    record_resume_request(db, "c1", "张三", ["k1"])
+
+    [message] = db.get_candidate_messages("c1")
+    assert message.direction == "outbound" and "张三" in message.content
+    assert db.get_chat_cursor("c1") == ["k1", chat_message_key("self", message.content)]
+    assert db.db["stats"]["messages_sent"] == 1
+
+
+def test_send_resume_request_reports_a_missing_button():
+    class EmptyChat:
+        def find_element(self, by, value):
+            raise LookupError(value)
+
+    assert send_resume_request(EmptyChat(), "张三") is False
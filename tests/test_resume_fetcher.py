@@ -0,0 +1,105 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+from scraper_agents.boss_hr.resume_fetcher import ResumeFetcher  # noqa: E402
+from scraper_agents.boss_hr.resume_store import ResumeStore, file_sha256  # noqa: E402
+
+RESUME = "%PDF-1.4 张三的简历".encode("utf-8")
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """Serves one resume to requests carrying the session cookie"""
+
+    cookies = []
+
+    def do_GET(self):
+        StandIn.cookies.append(self.headers.get("Cookie"))
+        if "wt=token" not in (self.headers.get("Cookie") or ""):
+            body, content_type = b"<html>login</html>", "text/html"
+        elif self.path == "/r.pdf":
+            body, content_type = RESUME, "application/octet-stream"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Disposition", 'attachment; filename="resume.pdf"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class BrowserDriver:
+    current_url = "https://www.zhipin.com/web/chat/index"
+
+    def get_cookies(self):
+        return [{"name": "wt", "value": "token", "domain": "127.0.0.1", "path": "/"}]
+
+    def execute_script(self, script):
+        return "Mozilla/5.0 stand-in"
+
+
+@pytest.fixture
+def base_url():
+    StandIn.cookies = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fetcher(tmp_path):
+    fetcher = ResumeFetcher(ResumeStore(tmp_path / "store"), download_dir=tmp_path / "fetched",
+                            retries=0)
+    yield fetcher
+    fetcher.close()
+
+
+def test_fetched_resume_is_stored_with_the_browser_session(fetcher, base_url, tmp_path):
+    assert fetcher.sync_cookies(BrowserDriver())
+    assert fetcher.session.headers["User-Agent"] == "Mozilla/5.0 stand-in"
+
+    sha256 = fetcher.submit(f"{base_url}/r.pdf", "c1", "fp1").result(timeout=10)
+    assert StandIn.cookies == ["wt=token"]
+    assert fetcher.awaiting("c1")
+    assert fetcher.take_results() == [("c1", sha256)]
+    assert not fetcher.awaiting("c1")
+
+    entry = fetcher.store.get(sha256)
+    assert entry["path"].suffix == ".pdf" and file_sha256(entry["path"]) == sha256
+    assert entry["path"].read_bytes() == RESUME
+    # The name the server sent, not the name the file was fetched to
+    assert entry["names"] == ["resume.pdf"]
+    assert fetcher.store.has_resume("c1", "fp1")
+    # Nothing is left behind in the download folder
+    assert list((tmp_path / "fetched").iterdir()) == []
+
+
+def test_fetch_without_the_session_or_file_fails(fetcher, base_url, tmp_path):
+    # Without the cookies the site answers with its login page
+    assert fetcher.submit(f"{base_url}/r.pdf", "c1").result(timeout=10) is None
+
+    assert fetcher.sync_cookies(BrowserDriver())
+    assert fetcher.submit(f"{base_url}/missing.pdf", "c2").result(timeout=10) is None
+    assert fetcher.take_results() == [("c1", None), ("c2", None)]
+    assert not fetcher.awaiting("c2")
+    assert fetcher.store.resumes_for("c2") == []
+    assert list((tmp_path / "fetched").iterdir()) == []
+
+
+def test_sync_cookies_reports_a_closed_browser(fetcher):
+    class ClosedDriver:
+        def get_cookies(self):
+            raise RuntimeError("browser closed")
+
+    assert fetcher.sync_cookies(ClosedDriver()) is False
@@ -0,0 +1,68 @@
+import math
+from collections import Counter
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from data_extract import resume_scoring  # noqa: E402
+from data_extract.resume_scoring import (  # noqa: E402
+    ResumeMatrix, education_rank, score_candidates)
+from scraper_agents.boss_hr.search_index import tokenize  # noqa: E402
+
+DOCUMENTS = ["熟悉 python 和 django", "java 开发 五年", "", "python python 数据分析"]
+
+
+def brute_force_bm25(documents, query, k1=1.2, b=0.75):
+    counts = [Counter(tokenize(text)) for text in documents]
+    lengths = [sum(c.values()) for c in counts]
+    average = sum(lengths) / len(lengths) if sum(lengths) else 1.0
+    scores = []
+    for c, length in zip(counts, lengths):
+        score = 0.0
+        for term in set(tokenize(query)):
+            df = sum(1 for other in counts if term in other)
+            if not df or term not in c:
+                continue
+            idf = math.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+            score += idf * c[term] * (k1 + 1) / (c[term] + k1 * (1 - b + b * length / average))
+        scores.append(score)
+    return scores
+
+
+@pytest.mark.parametrize("use_scipy", [True, False])
+def test_matrix_scores_match_brute_force(monkeypatch, use_scipy):
+    if use_scipy:
+        pytest.importorskip("scipy")
+    else:
+        monkeypatch.setattr(resume_scoring, "sparse", None)
+        monkeypatch.setattr(resume_scoring, "BATCH_ROWS", 2)
+
+    queries = ["python", "java 开发", "golang"]
+    scores = ResumeMatrix(DOCUMENTS).scores(queries)
+    assert scores.shape == (len(DOCUMENTS), len(queries))
+    for column, query in enumerate(queries):
+        assert np.allclose(scores[:, column], brute_force_bm25(DOCUMENTS, query))
+
+
+def test_education_rank():
+    assert education_rank("bachelor") == 3
+    assert education_rank("硕士研究生") == 4
+    assert education_rank("未知") == 0
+    assert education_rank(None) == 0
+
+
+def test_score_candidates_combines_text_and_profile():
+    profiles = [{"education": "bachelor", "age": 28, "work_years": 3},
+                {"education": "associate", "age": 40},
+                {},
+                {"education": "master", "age": 25, "work_years": 0}]
+    requisitions = [{"id": "py", "text": "python", "education": "本科", "max_age": 35, "min_years": 2}]
+
+    scores = score_candidates(DOCUMENTS, profiles, requisitions)
+    assert scores.shape == (4, 1)
+    assert np.all((scores >= 0) & (scores <= 1))
+    # Matching text and full marks on every profile part beat neither
+    assert scores[0, 0] > scores[1, 0]
+    # Unknown profile parts score half marks
+    assert scores[2, 0] == pytest.approx(0.15)
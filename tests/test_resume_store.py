@@ -0,0 +1,65 @@
+import hashlib
+
+import pytest
+
+from scraper_agents.boss_hr.resume_store import ResumeStore, attachment_fingerprint
+
+RESUME = "%PDF-1.4 张三的简历".encode("utf-8")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResumeStore(tmp_path / "store")
+
+
+def download(tmp_path, name, content=RESUME):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return path
+
+
+def test_same_content_is_stored_once_and_linked_per_candidate(store, tmp_path):
+    sha256 = store.add(download(tmp_path, "c1_1.pdf"), "c1", original_name="张三.pdf")
+    assert sha256 == hashlib.sha256(RESUME).hexdigest()
+    assert store.add(download(tmp_path, "c2_1.pdf"), "c2", source="zhilian") == sha256
+
+    entry = store.get(sha256)
+    assert entry["path"] == store.root / "objects" / sha256[:2] / f"{sha256}.pdf"
+    assert entry["candidates"] == ["c1", "c2"]
+    assert entry["sources"] == ["boss", "zhilian"]
+    assert entry["names"] == ["张三.pdf", "c2_1.pdf"]
+    assert entry["mime_type"] == "application/pdf" and entry["size"] == len(RESUME)
+    # The downloads were consumed
+    assert not (tmp_path / "c1_1.pdf").exists() and not (tmp_path / "c2_1.pdf").exists()
+
+    object_inode = entry["path"].stat().st_ino
+    for candidate_id in ("c1", "c2"):
+        link = store.candidates_dir / candidate_id / entry["path"].name
+        assert link.stat().st_ino == object_inode
+    assert store.hashes_by_candidate() == {"c1": [sha256], "c2": [sha256]}
+
+    other = store.add(download(tmp_path, "c1_2.pdf", b"%PDF-1.4 another"), "c1")
+    assert [e["sha256"] for e in store.resumes_for("c1")] == [sha256, other]
+
+
+def test_file_without_extension_is_typed_by_content(store, tmp_path):
+    sha256 = store.add(download(tmp_path, "c1_abcdef12"), "c1")
+    assert store.get(sha256)["path"].suffix == ".pdf"
+    assert store.get("0" * 64) is None
+
+
+def test_has_resume_tracks_chat_attachments(store, tmp_path):
+    fingerprint = attachment_fingerprint("张三.pdf 120KB")
+    assert fingerprint == attachment_fingerprint(" 张三.pdf 120KB ")
+    assert fingerprint != attachment_fingerprint("张三.pdf 120KB", occurrence=1)
+    assert not store.has_resume("c1", fingerprint)
+
+    sha256 = store.add(download(tmp_path, "r.pdf"), "c1", attachment_fingerprint=fingerprint)
+    assert store.has_resume("c1", fingerprint)
+    assert not store.has_resume("c2", fingerprint)
+
+    # Another process opening the same store sees the attachment too
+    assert ResumeStore(store.root).has_resume("c1", fingerprint)
+
+    store.get(sha256)["path"].unlink()
+    assert not store.has_resume("c1", fingerprint)
@@ -0,0 +1,113 @@
+import json
+import os
+import zipfile
+
+import pytest
+
+from data_extract import resume_text
+from data_extract.resume_text import (
+    extract_resume_texts, extract_text, iter_resume_files, load_cached_text, normalize_text,
+    section_of)
+from scraper_agents.boss_hr.resume_store import file_sha256
+
+RESUME = """张三　　ＡＢＣ１２３
+
+【教育经历】
+合肥工业大学　本科
+
+
+
+工作经历：
+２０２０－２０２３  ＸＸ科技  Python开发
+■ Skills
+Python, Django
+"""
+
+DOCX_XML = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>
+<w:p><w:r><w:t>李四</w:t></w:r></w:p>
+<w:p><w:r><w:t>专业技能</w:t></w:r></w:p>
+<w:p><w:r><w:t>Java</w:t><w:tab/><w:t>Spring</w:t><w:br/><w:t>MySQL</w:t></w:r></w:p>
+</w:body></w:document>"""
+
+
+def write_docx(path, xml=DOCX_XML):
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("word/document.xml", xml)
+
+
+def test_normalize_text_folds_width_spacing_and_headers():
+    text, sections = normalize_text(RESUME.replace("\n", "\r\n"))
+    assert text == ("张三 ABC123\n\n教育经历\n合肥工业大学 本科\n\n工作经历\n"
+                    "2020-2023 XX科技 Python开发\n专业技能\nPython, Django")
+    assert sections == {"education": "合肥工业大学 本科",
+                        "experience": "2020-2023 XX科技 Python开发",
+                        "skills": "Python, Django"}
+
+
+def test_section_of():
+    assert section_of("【教育背景】") == "education"
+    assert section_of("Work Experience:") == "experience"
+    assert section_of("自我评价") == "summary"
+    assert section_of("合肥工业大学") is None
+    assert section_of("技能" * 20) is None
+
+
+def test_extract_text_reads_txt_and_docx(tmp_path):
+    txt = tmp_path / "a.txt"
+    txt.write_bytes(RESUME.encode("gb18030"))
+    assert extract_text(txt)["sections"]["skills"] == "Python, Django"
+
+    docx = tmp_path / "b.docx"
+    write_docx(docx)
+    record = extract_text(docx)
+    assert record == {"text": "李四\n专业技能\nJava Spring\nMySQL",
+                      "sections": {"skills": "Java Spring\nMySQL"},
+                      "extractor_version": resume_text.EXTRACTOR_VERSION}
+
+    with pytest.raises(resume_text.UnsupportedResumeError):
+        extract_text(tmp_path / "c.doc")
+
+
+def test_walk_skips_hidden_files_links_and_the_cache(tmp_path):
+    (tmp_path / "store").mkdir()
+    (tmp_path / "cache").mkdir()
+    (tmp_path / "a.txt").write_text("a", encoding="utf-8")
+    os.link(tmp_path / "a.txt", tmp_path / "store" / "a.txt")
+    (tmp_path / ".b.txt.part").write_text("b", encoding="utf-8")
+    (tmp_path / "cache" / "c.txt").write_text("c", encoding="utf-8")
+    (tmp_path / "d.png").write_bytes(b"\x89PNG")
+
+    assert len(list(iter_resume_files(tmp_path, skip_dirs=(tmp_path / "cache",)))) == 1
+
+
+def test_extraction_runs_in_a_pool_and_is_cached_by_content(tmp_path, monkeypatch):
+    monkeypatch.setattr(resume_text, "PdfReader", None)
+    resumes = tmp_path / "resumes"
+    (resumes / "store").mkdir(parents=True)
+    for i in range(12):
+        (resumes / f"r{i}.txt").write_text(f"候选人{i}\n技能\nPython {i}", encoding="utf-8")
+    # The same content under another name is read once
+    (resumes / "store" / "copy.txt").write_text("候选人0\n技能\nPython 0", encoding="utf-8")
+    write_docx(resumes / "b.docx")
+    (resumes / "broken.docx").write_bytes(b"not a zip")
+    (resumes / "scan.pdf").write_bytes(b"%PDF-1.4")
+    cache = tmp_path / "cache"
+
+    texts = extract_resume_texts(resumes, cache, workers=2)
+    assert len(texts) == 13
+    sha256 = file_sha256(resumes / "r3.txt")
+    assert texts[sha256]["sections"] == {"skills": "Python 3"}
+    assert texts[sha256]["source"] == str(resumes / "r3.txt")
+    assert file_sha256(resumes / "scan.pdf") not in texts
+    assert load_cached_text(sha256, cache)["text"] == texts[sha256]["text"]
+
+    # A re-run takes the cached record instead of reading the file again
+    cache_file = cache / sha256[:2] / f"{sha256}.json"
+    record = json.loads(cache_file.read_text(encoding="utf-8"))
+    cache_file.write_text(json.dumps({**record, "text": "cached"}), encoding="utf-8")
+    assert extract_resume_texts(resumes, cache, workers=2)[sha256]["text"] == "cached"
+
+    # A newer extractor ignores the old records
+    monkeypatch.setattr(resume_text, "EXTRACTOR_VERSION", resume_text.EXTRACTOR_VERSION + 1)
+    assert load_cached_text(sha256, cache) is None
@@ -0,0 +1,57 @@
+from scraper_agents.boss_hr.search_index import SearchIndex, tokenize
+
+
+def test_tokenize_splits_cjk_into_bigrams_and_keeps_ascii_words():
+    assert tokenize("已发简历") == ["已发", "发简", "简历"]
+    assert tokenize("熟悉 Python 和 C++") == ["熟悉", "python", "和", "c++"]
+    assert tokenize("ＰＹＴＨＯＮ") == ["python"]
+    assert tokenize("node.js.") == ["node.js"]
+    assert tokenize("") == []
+    assert tokenize(None) == []
+
+
+def test_search_requires_every_term():
+    index = SearchIndex()
+    index.add("a", "熟悉 python 和 java")
+    index.add("b", "熟悉 java")
+
+    assert {cid for cid, _ in index.search("java")} == {"a", "b"}
+    assert [cid for cid, _ in index.search("python java")] == ["a"]
+    assert index.search("golang") == []
+    assert index.search("") == []
+
+
+def test_search_ranks_by_term_frequency_and_length():
+    index = SearchIndex()
+    index.add("dense", "python python python")
+    index.add("sparse", "python 熟悉 数据库 设计 经验 丰富")
+
+    ranked = index.search("python")
+    assert [cid for cid, _ in ranked] == ["dense", "sparse"]
+    assert ranked[0][1] > ranked[1][1] > 0
+
+
+def test_search_respects_allowed_and_limit():
+    index = SearchIndex()
+    for cid in "abcd":
+        index.add(cid, "已发简历")
+
+    assert {cid for cid, _ in index.search("简历", allowed={"b": None, "c": None})} == {"b", "c"}
+    assert {cid for cid, _ in index.search("简历", allowed=["d"])} == {"d"}
+    assert len(index.search("简历", limit=2)) == 2
+
+
+def test_remove_and_preview_replacement():
+    index = SearchIndex()
+    index.add("a", "你好")
+    index.remove("a", "你好")
+    assert len(index) == 0
+    assert index.search("你好") == []
+
+    index.set_preview("a", "期望薪资")
+    assert [cid for cid, _ in index.search("薪资")] == ["a"]
+    index.set_preview("a", "到岗时间")
+    assert index.search("薪资") == []
+    assert [cid for cid, _ in index.search("到岗")] == ["a"]
+    index.set_preview("a", None)
+    assert len(index) == 0